@@ -1,24 +1,39 @@
 import datetime
+import json
 import uuid
+from collections import defaultdict
+from typing import Iterable, NamedTuple, Optional
 from django.conf import settings
-from rest_framework.views import Request
+from rest_framework.views import APIView, Request
 from rest_framework.response import Response
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import ValidationError, NotFound
 from rdflib import URIRef, Graph, Literal, DCTERMS, RDFS, RDF
+from rdflib.term import Node
 from rdf.views import RDFView, graph_from_request
 from rdf.utils import graph_from_triples
 from rdf.renderers import TurtleRenderer, JsonLdRenderer
 
 from accounts.utils import user_to_uriref
-from collect.serializers import check_user_project_authorization
+from annotations.stats import get_annotation_stats
+from annotations.utils import annotation_graph_identifier
+from catalogs.search_index import index_annotations, update_annotation_text, \
+    unindex_annotation, unindex_project_annotations
+from collect.serializers import check_user_project_authorization, \
+    check_user_project_read_authorization
+from collect.utils import collection_exists, collection_graph
+from projects.models import Project
 from triplestore.constants import EDPOPREC, OA, AS, EDPOPCOL
 from triplestore.utils import (
+    Triple,
+    Triples,
+    insert_data,
     replace_blank_nodes_in_triples,
     replace_node,
     sparql_multivalues,
-    triples_to_quads,
 )
 
+# Graph that held the annotations of all projects before they were stored
+# per project; see `annotations.partitioning`.
 ANNOTATION_GRAPH_URI = settings.RDF_NAMESPACE_ROOT + "annotations/"
 ANNOTATION_GRAPH_IDENTIFIER = URIRef(ANNOTATION_GRAPH_URI)
 
@@ -60,6 +75,41 @@ where {
 }
 '''
 
+# Arguments: records_pattern (binds ?record), project_graphs (pairs of a
+# project and its annotation graph)
+records_annotations_query = '''
+construct {{
+  ?annotation ?pa ?oa .
+  ?target ?pt ?ot .
+  ?selector ?ps ?os .
+}}
+where {{
+  {records_pattern}
+  values ( ?project ?annotations ) {{ {project_graphs} }}
+  graph ?annotations {{
+    ?annotation as:context ?project ;
+                oa:hasTarget ?target ;
+                ?pa ?oa .
+    ?target oa:hasSource ?record ;
+            ?pt ?ot .
+    optional {{
+      ?target oa:hasSelector ?selector .
+      ?selector ?ps ?os .
+    }}
+  }}
+}}
+'''.format
+
+given_records_pattern = '''
+  values ?record {{ {records} }}
+'''.format
+
+collection_members_pattern = '''
+  graph {collection} {{
+    {collection} rdfs:member ?record .
+  }}
+'''.format
+
 delete_annotation_update = '''
 delete {
   graph ?annotations {
@@ -102,31 +152,264 @@ where {
 }
 '''
 
+# All annotations in an annotation graph with the record they annotate, in
+# pages
+annotation_texts_query = '''
+select ?annotation ?record ?project ?body
+where {{
+  graph {annotations} {{
+    ?annotation oa:hasTarget ?target ;
+                oa:hasBody ?body ;
+                as:context ?project .
+    ?target oa:hasSource ?record .
+  }}
+}}
+order by ?annotation
+offset {offset}
+limit {limit}
+'''.format
+
+# Record the time of the last change to annotation graphs, for caching
+touch_annotations_update = '''
+delete {{
+  graph ?annotations {{ ?annotations as:updated ?previous }}
+}}
+insert {{
+  graph ?annotations {{ ?annotations as:updated ?now }}
+}}
+where {{
+  values ?annotations {{ {graphs} }}
+  optional {{
+    graph ?annotations {{ ?annotations as:updated ?previous }}
+  }}
+  bind (now() as ?now)
+}}
+'''.format
+
+# Annotations are only recognized in the annotation graph of their project
+# (see `annotation_graph_identifier`); the migrations of this app move them
+# out of the shared annotation graph (see `annotations.partitioning`).
 annotation_in_project_query = '''
-select ?project
+select ?graph ?project
 where {
-  graph ?annotations {
+  graph ?graph {
     ?annotation as:context ?project .
   }
 }
 '''
 
 
+def touch_annotations(store, graphs: Iterable[URIRef]) -> None:
+    '''
+    Record that the annotations in the given annotation graphs changed,
+    without committing.
+    '''
+    store.update(touch_annotations_update(
+        graphs=sparql_multivalues(graphs),
+    ), initNs=NS)
+
+
+def drop_project_annotations(project: Node) -> None:
+    '''
+    Delete all annotations of a project at once, by dropping its annotation
+    graph, and remove them from the full-text index.
+    '''
+    store = settings.RDFLIB_STORE
+    store.update(f'drop silent graph {annotation_graph_identifier(project).n3()}')
+    store.commit()
+    unindex_project_annotations(project)
+
+
+def get_records_annotations(
+        projects: list[URIRef],
+        records: Optional[list[URIRef]] = None,
+        collection: Optional[URIRef] = None,
+) -> Graph:
+    '''
+    Get the annotations in the given projects, with their targets and
+    selectors, of either the given records or the members of a collection,
+    in a single query.
+    '''
+    if collection is not None:
+        records_pattern = collection_members_pattern(collection=collection.n3())
+    else:
+        records_pattern = given_records_pattern(records=sparql_multivalues(records))
+    project_graphs = ' '.join(
+        f'( {project.n3()} {annotation_graph_identifier(project).n3()} )'
+        for project in projects
+    )
+    store = settings.RDFLIB_STORE
+    return graph_from_triples(store.query(records_annotations_query(
+        records_pattern=records_pattern,
+        project_graphs=project_graphs,
+    ), initNs=NS))
+
+
+def group_by_record(graph: Graph) -> dict[URIRef, Graph]:
+    '''
+    Split a graph of annotations into a graph per annotated record.
+    '''
+    groups = {}
+    for target, record in graph.subject_objects(OA.hasSource):
+        group = groups.setdefault(record, Graph())
+        nodes = [target, *graph.objects(target, OA.hasSelector),
+                 *graph.subjects(OA.hasTarget, target)]
+        for node in nodes:
+            for triple in graph.triples((node, None, None)):
+                group.add(triple)
+    return groups
+
+
 def create_annotation_subject_node() -> URIRef:
     return URIRef(RDF_ANNOTATION_ROOT + uuid.uuid4().hex)
 
 
-def check_user_annotation_authorization(user, annotation):
+class NewAnnotation(NamedTuple):
+    '''
+    A posted annotation that passed validation, with the triples that
+    describe it, its target and its selector.
+    '''
+    subject: Node
+    body: Node
+    source: Node
+    project: Node
+    triples: list[Triple]
+
+
+def _describe(
+        nodes: dict[Node, dict[Node, list[Node]]], subject: Node
+) -> list[Triple]:
+    # The triples about a node and the nodes that it refers to
+    triples = []
+    pending = [subject]
+    seen = {subject}
+    while pending:
+        node = pending.pop()
+        for p, objects in nodes.get(node, {}).items():
+            for o in objects:
+                triples.append((node, p, o))
+                if o in nodes and o not in seen:
+                    seen.add(o)
+                    pending.append(o)
+    return triples
+
+
+def _only(values: list[Node], name: str) -> Node:
+    if len(values) != 1:
+        raise ValidationError(f'Needs exactly one {name}')
+    return values[0]
+
+
+def validate_annotations(graph: Graph) -> list[NewAnnotation]:
+    '''
+    Find and validate the annotations in a posted graph, in a single pass
+    over its triples. Every node with a body, target or context is taken to
+    be an annotation. Raise `ValidationError` if any annotation is invalid.
+    '''
+    nodes = defaultdict(lambda: defaultdict(list))
+    for s, p, o in graph:
+        nodes[s][p].append(o)
+    annotations = []
+    for subject, properties in nodes.items():
+        if not any(p in properties for p in (OA.hasBody, OA.hasTarget, AS.context)):
+            continue
+        body = _only(properties[OA.hasBody], 'body')
+        target = _only(properties[OA.hasTarget], 'target')
+        context = _only(properties[AS.context], 'context')
+        if target not in nodes:
+            raise ValidationError('Needs exactly one source')
+        source = _only(nodes[target][OA.hasSource], 'source')
+        motivation = properties[OA.motivatedBy][0] \
+            if properties[OA.motivatedBy] else OA.commenting
+        if motivation in (OA.commenting, OA.editing, OA.describing):
+            if not isinstance(body, Literal):
+                raise ValidationError('Body must be a literal when commenting or editing')
+        elif motivation == OA.tagging:
+            if not isinstance(body, URIRef):
+                raise ValidationError('Tag must be a URI')
+        else:
+            raise ValidationError('Only commenting, tagging, editing and describing are supported')
+        annotations.append(NewAnnotation(
+            subject, body, source, context, _describe(nodes, subject),
+        ))
+    return annotations
+
+
+def store_annotations(annotations: Iterable[tuple[Node, Triples]]) -> None:
+    '''
+    Add annotations, given as pairs of a project and the triples of an
+    annotation, to the annotation graphs of their projects, all in a single
+    INSERT DATA update.
+    '''
+    graphs = defaultdict(list)
+    for project, triples in annotations:
+        graphs[annotation_graph_identifier(project)].extend(triples)
+    if not graphs:
+        return
+    store = settings.RDFLIB_STORE
+    store.update(insert_data(graphs))
+    touch_annotations(store, graphs)
+    store.commit()
+
+
+def create_annotations(user, annotations: list[NewAnnotation]) -> Graph:
+    '''
+    Store validated annotations on behalf of a user and return them as
+    stored. The user needs write access to the project of every annotation;
+    this is checked once per project.
+    '''
+    for project in dict.fromkeys(annotation.project for annotation in annotations):
+        check_user_project_authorization(user, project)
+    published = Literal(datetime.datetime.now())
+    creator = user_to_uriref(user)
+    normalized = (RDF.type, AS.published, DCTERMS.creator)
+    stored = []
+    for annotation in annotations:
+        # Give the annotation a proper URI and wrap the remaining blank
+        # nodes with the bnode: scheme.
+        subject_node = create_annotation_subject_node()
+        triples = [
+            triple for triple in annotation.triples
+            if triple[0] != annotation.subject or triple[1] not in normalized
+        ]
+        triples.extend([
+            (annotation.subject, RDF.type, EDPOPCOL.Annotation),
+            (annotation.subject, AS.published, published),
+            (annotation.subject, DCTERMS.creator, creator),
+        ])
+        triples = replace_node(triples, annotation.subject, subject_node)
+        stored.append((
+            subject_node, annotation,
+            list(replace_blank_nodes_in_triples(triples)),
+        ))
+    store_annotations(
+        (annotation.project, triples) for _, annotation, triples in stored
+    )
+    index_annotations(
+        (subject_node, annotation.source, annotation.project, annotation.body)
+        for subject_node, annotation, _ in stored
+    )
+    return graph_from_triples(
+        triple for _, _, triples in stored for triple in triples
+    )
+
+
+def check_user_annotation_authorization(user, annotation) -> URIRef:
+    '''
+    Check that the user may edit an annotation and return the graph that
+    holds it.
+    '''
     store = settings.RDFLIB_STORE
     projects = [binds.project for binds in store.query(
         annotation_in_project_query,
         initNs=NS,
         initBindings={
-            'annotations': ANNOTATION_GRAPH_IDENTIFIER,
             'annotation': annotation,
-        })]
-    assert len(projects) == 1
+        }) if binds.graph == annotation_graph_identifier(binds.project)]
+    if len(projects) != 1:
+        raise NotFound('Annotation does not exist')
     check_user_project_authorization(user, projects[0])
+    return annotation_graph_identifier(projects[0])
 
 
 class AnnotationView(RDFView):
@@ -135,68 +418,31 @@ class AnnotationView(RDFView):
 
     def post(self, request, **kwargs):
         request_graph = graph_from_request(request)
+        annotations = validate_annotations(request_graph)
+        if len(annotations) != 1:
+            raise ValidationError('Needs exactly one annotation')
+        return Response(create_annotations(request.user, annotations))
 
-        # Step 1: validate the incoming data.
-        bodies = list(request_graph.subject_objects(OA.hasBody))
-        targets = list(request_graph.subject_objects(OA.hasTarget))
-        sources = list(request_graph.subject_objects(OA.hasSource))
-        contexts = list(request_graph.subject_objects(AS.context))
-        if len(bodies) == 1:
-            s1, body = bodies[0]
-        else:
-            raise ValidationError('Needs exactly one body')
-        if len(targets) == 1:
-            s2, target = targets[0]
-        else:
-            raise ValidationError('Needs exactly one target')
-        if len(sources) == 1:
-            s3, source = sources[0]
-        else:
-            raise ValidationError('Needs exactly one source')
-        if len(contexts) == 1:
-            s4, context = contexts[0]
-        else:
-            raise ValidationError('Needs exactly one context')
-        if s1 != s2 or s1 != s4:
-            raise ValidationError('Body, target and context must be annotation properties')
-        check_user_project_authorization(request.user, context)
-        if s3 != target:
-            raise ValidationError('Source must be a property of the target')
-        motivation = request_graph.value(s1, OA.motivatedBy, None, OA.commenting)
-        if motivation in (OA.commenting, OA.editing, OA.describing):
-            if not isinstance(body, Literal):
-                raise ValidationError('Body must be a literal when commenting or editing')
-        elif motivation == OA.tagging:
-            if not isinstance(body, URIRef):
-                raise ValidationError('Tag must be a URI')
-        else:
-            raise ValidationError('Only commenting, tagging, editing and describing are supported')
 
-        # Step 2: normalize the data. We modify the request_graph in place
-        # because this is convenient.
-        published = Literal(datetime.datetime.now())
-        creator = user_to_uriref(request.user)
-        request_graph.set((s1, RDF.type, EDPOPCOL.Annotation))
-        request_graph.set((s1, AS.published, published))
-        request_graph.set((s1, DCTERMS.creator, creator))
-
-        # Step 3: deanonymize all the blank nodes. We give the annotation
-        # subject a proper URI, then wrap the remaing ones with the bnode:
-        # scheme.
-        subject_node = create_annotation_subject_node()
-        triples_with_subject = replace_node(request_graph, s1, subject_node)
-        triples_wo_blank = replace_blank_nodes_in_triples(triples_with_subject)
-        clean_triples = list(triples_wo_blank)
-
-        # Finish: store the final clean data and send them back to the client.
-        graph = Graph(identifier=ANNOTATION_GRAPH_IDENTIFIER)
-        quads = list(triples_to_quads(clean_triples, graph))
-        # Get the existing graph from Blazegraph
-        store = settings.RDFLIB_STORE
-        store.addN(quads)
-        store.commit()
-        response_graph = graph_from_triples(clean_triples)
-        return Response(response_graph)
+class AnnotationsView(RDFView):
+    '''
+    Create many annotations at once, e.g. to tag a selection of records.
+
+    POST a graph with any number of annotations, each of the form accepted
+    by `AnnotationView`. The annotations are validated together and none
+    are stored if one is invalid. They are stored with a single update and
+    returned as stored.
+    '''
+
+    renderer_classes = (JsonLdRenderer, TurtleRenderer)
+    json_ld_context = JSON_LD_CONTEXT
+
+    def post(self, request, **kwargs):
+        request_graph = graph_from_request(request)
+        annotations = validate_annotations(request_graph)
+        if not annotations:
+            raise ValidationError('Needs at least one annotation')
+        return Response(create_annotations(request.user, annotations))
 
 
 class AnnotationEditView(RDFView):
@@ -206,31 +452,35 @@ class AnnotationEditView(RDFView):
     def delete(self, request, **kwargs):
         id_uriref = URIRef(kwargs.get("annotation"))
         store = settings.RDFLIB_STORE
-        check_user_annotation_authorization(request.user, id_uriref)
+        annotations = check_user_annotation_authorization(request.user, id_uriref)
         store.update(delete_annotation_update, initBindings={
-            'annotations': ANNOTATION_GRAPH_IDENTIFIER,
+            'annotations': annotations,
             'annotation': id_uriref,
         }, initNs=NS)
+        touch_annotations(store, [annotations])
         store.commit()
+        unindex_annotation(id_uriref)
         return Response(Graph())
 
     def put(self, request, **kwargs):
         # Allow editing of the body. Other properties cannot be edited.
         id_uriref = URIRef(kwargs.get("annotation"))
         store = settings.RDFLIB_STORE
-        check_user_annotation_authorization(request.user, id_uriref)
+        annotations = check_user_annotation_authorization(request.user, id_uriref)
 
         graph = graph_from_request(request)
         body = graph.value(id_uriref, OA.hasBody, None)
         updated = Literal(datetime.datetime.now())
         # Delete the current body
         store.update(update_annotation_body, initBindings={
-            'annotations': ANNOTATION_GRAPH_IDENTIFIER,
+            'annotations': annotations,
             'annotation': id_uriref,
             'body': body,
             'updated': updated,
         }, initNs=NS)
+        touch_annotations(store, [annotations])
         store.commit()
+        update_annotation_text(id_uriref, body)
         graph.set((id_uriref, AS.updated, updated))
         return Response(graph)
 
@@ -249,7 +499,102 @@ class AnnotationsPerTargetView(RDFView):
         store = settings.RDFLIB_STORE
         query = record_annotations_query
         return graph_from_triples(store.query(query, initBindings={
-            'annotations': ANNOTATION_GRAPH_IDENTIFIER,
+            'annotations': annotation_graph_identifier(project_uri),
             'record': record_uri,
             'project': project_uri,
         }, initNs=NS))
+
+
+def _iri_list(value, name: str) -> Optional[list[str]]:
+    '''
+    Check that a posted value is a list of IRIs, if it is given.
+    '''
+    if value is None:
+        return None
+    if not isinstance(value, list) or \
+            not all(isinstance(item, str) for item in value):
+        raise ValidationError(f'{name} should be a list of IRIs')
+    return value
+
+
+def _unknown_projects(projects: Iterable[Node]) -> list[str]:
+    '''
+    Return the URIs of the projects that do not exist.
+    '''
+    uris = [str(project) for project in projects]
+    known = set(
+        Project.objects.filter(uri__in=uris).values_list('uri', flat=True)
+    )
+    return [uri for uri in uris if uri not in known]
+
+
+class RecordsAnnotationsView(APIView):
+    '''
+    View the annotations of many records within one or more projects at once.
+
+    POST either a list of `records` or a `collection`, and a list of
+    `projects`; for a collection, `projects` defaults to the project of the
+    collection. All annotations are read in a single query and returned as
+    JSON-LD nodes (annotations, targets and selectors) per annotated record.
+    Records without annotations are omitted.
+    '''
+
+    def post(self, request: Request, **kwargs) -> Response:
+        records = _iri_list(request.data.get('records'), 'records')
+        collection = request.data.get('collection')
+        projects = _iri_list(request.data.get('projects'), 'projects')
+        if collection is not None and not isinstance(collection, str):
+            raise ValidationError('collection should be an IRI')
+        if bool(records) == bool(collection):
+            raise ValidationError('Give either records or a collection')
+        if collection:
+            collection = URIRef(collection)
+            if not collection_exists(collection):
+                raise ValidationError('Collection does not exist')
+            project = collection_graph(collection).value(collection, AS.context)
+            if project is None:
+                raise ValidationError('Collection does not belong to a project')
+            check_user_project_read_authorization(request.user, project)
+            projects = projects or [project]
+        if not projects:
+            raise ValidationError('No projects selected')
+        projects = list(map(URIRef, dict.fromkeys(projects)))
+        unknown = _unknown_projects(projects)
+        if unknown:
+            raise ValidationError(f'Project does not exist: {unknown[0]}')
+        for project in projects:
+            check_user_project_read_authorization(request.user, project)
+        graph = get_records_annotations(
+            projects, records and list(map(URIRef, records)), collection or None,
+        )
+        return Response({
+            '@context': JSON_LD_CONTEXT,
+            'records': {
+                str(record): _json_ld_nodes(group)
+                for record, group in group_by_record(graph).items()
+            },
+        })
+
+
+class AnnotationStatsView(APIView):
+    '''
+    Count the annotations in a project per motivation and the number of
+    times each tag is used, for the whole project and per collection.
+    '''
+
+    def get(self, request: Request, **kwargs) -> Response:
+        project = request.query_params.get('project')
+        if not project:
+            raise ValidationError('No project selected')
+        if _unknown_projects([project]):
+            raise NotFound('Project does not exist')
+        check_user_project_read_authorization(request.user, project)
+        return Response(get_annotation_stats(URIRef(project)))
+
+
+def _json_ld_nodes(graph: Graph) -> list[dict]:
+    data = json.loads(graph.serialize(
+        format='json-ld', context=JSON_LD_CONTEXT, auto_compact=True,
+    ))
+    data.pop('@context', None)
+    return data.get('@graph', [data])
@@ -1,9 +1,16 @@
 from urllib.parse import quote_plus
 
-from rdflib import RDF, URIRef, Literal
-from triplestore.constants import EDPOPCOL, OA
+from rdflib import RDF, URIRef, Literal, Graph
+from triplestore.constants import EDPOPCOL, OA, AS
 
-from .api import JSON_LD_CONTEXT
+from catalogs.models import IndexedDocument
+from collect.rdf_models import EDPOPCollection
+from collect.utils import collection_graph, collection_uri
+from projects.models import Project
+from projects.rdf_models import RDFProject
+from .api import JSON_LD_CONTEXT, annotation_graph_identifier, \
+    ANNOTATION_GRAPH_IDENTIFIER
+from .partitioning import partition_annotations
 
 
 def annotation_exists_for_source(triplestore, source):
@@ -35,6 +42,36 @@ def test_create_delete_annotation(client, triplestore, django_test_user, project
     assert not annotation_exists_for_source(triplestore, source)
 
 
+def test_annotation_outside_project_graph(client, triplestore, django_test_user, project):
+    # E.g. an annotation in the shared graph that partition_annotations has
+    # not moved yet
+    annotation = URIRef('http://example.com/annotations/legacy')
+    legacy = Graph(triplestore, ANNOTATION_GRAPH_IDENTIFIER)
+    legacy.add((annotation, AS.context, URIRef(project.uri)))
+    triplestore.commit()
+    client.force_login(django_test_user)
+    response = client.delete(f'/api/annotation/{quote_plus(str(annotation))}/')
+    assert response.status_code == 404
+    assert (annotation, AS.context, URIRef(project.uri)) in legacy
+
+
+def test_partition_annotations(client, triplestore, django_test_user, project):
+    annotation = URIRef('http://example.com/annotations/legacy')
+    target = URIRef('bnode:legacy-target')
+    legacy = Graph(triplestore, ANNOTATION_GRAPH_IDENTIFIER)
+    legacy.add((annotation, AS.context, URIRef(project.uri)))
+    legacy.add((annotation, OA.hasTarget, target))
+    legacy.add((target, OA.hasSource, URIRef('http://example.com/source')))
+    triplestore.commit()
+    assert partition_annotations([URIRef(project.uri)]) == 0
+    assert len(legacy) == 0
+    graph = Graph(triplestore, annotation_graph_identifier(project.identifier()))
+    assert (target, OA.hasSource, URIRef('http://example.com/source')) in graph
+    client.force_login(django_test_user)
+    response = client.delete(f'/api/annotation/{quote_plus(str(annotation))}/')
+    assert response.status_code == 200
+
+
 def test_edit_annotation(client, triplestore, django_test_user, project):
     source = 'http://example.com/source'
     target = {'oa:hasSource': {'@id': source}}
@@ -61,3 +98,207 @@ def test_list_annotations(client, triplestore, django_test_user, project):
     assert response.status_code == 200
     graph = response.data
     assert len(list(graph.triples((None, OA.hasSource, URIRef(source))))) == 2
+
+
+def test_annotations_are_indexed(client, triplestore, django_test_user, project):
+    source = 'http://example.com/source'
+    target = {'oa:hasSource': {'@id': source}}
+    uri = create_annotation(client, target, 'This is an annotation',
+                            django_test_user, project)
+    document = IndexedDocument.objects.get(uri=uri)
+    assert (document.record, document.project, document.text) == \
+        (source, project.uri, 'This is an annotation')
+    client.put(f'/api/annotation/{quote_plus(uri)}/', {
+        '@context': JSON_LD_CONTEXT,
+        '@id': uri,
+        'oa:hasBody': 'This is an edited annotation'
+    }, content_type='application/ld+json')
+    assert IndexedDocument.objects.get(uri=uri).text == 'This is an edited annotation'
+    client.delete(f'/api/annotation/{quote_plus(uri)}/')
+    assert not IndexedDocument.objects.filter(uri=uri).exists()
+
+
+def test_records_annotations(client, triplestore, django_test_user, project):
+    sources = ['http://example.com/source1', 'http://example.com/source2']
+    for source in sources:
+        target = {'oa:hasSource': {'@id': source}}
+        create_annotation(client, target, 'This is an annotation',
+                          django_test_user, project)
+    create_annotation(client, {'oa:hasSource': {'@id': sources[0]}},
+                      'This is another annotation', django_test_user, project)
+    response = client.post('/api/records-annotations/', {
+        'records': sources + ['http://example.com/unannotated'],
+        'projects': [project.uri],
+    }, content_type='application/json')
+    assert response.status_code == 200
+    records = response.json()['records']
+    assert set(records) == set(sources)
+    nodes = records[sources[0]]
+    annotations = [node for node in nodes if 'oa:hasBody' in node]
+    assert len(annotations) == 2
+
+
+def test_records_annotations_collection(client, triplestore, django_test_user, project):
+    source = 'http://example.com/source'
+    create_annotation(client, {'oa:hasSource': {'@id': source}},
+                      'This is an annotation', django_test_user, project)
+    rdf_project = RDFProject(project.graph(), project.identifier())
+    uri = collection_uri('Annotated')
+    collection = EDPOPCollection(collection_graph(uri), uri)
+    collection.name = 'Annotated'
+    collection.project = rdf_project.uri
+    collection.save()
+    collection.add_records([URIRef(source)])
+    response = client.post('/api/records-annotations/', {
+        'collection': str(uri),
+    }, content_type='application/json')
+    assert response.status_code == 200
+    assert list(response.json()['records']) == [source]
+
+
+def test_records_annotations_unreadable_project(client, triplestore, django_test_user):
+    other = Project.objects.create(name='other', display_name='Other')
+    client.force_login(django_test_user)
+    response = client.post('/api/records-annotations/', {
+        'records': ['http://example.com/source'],
+        'projects': [other.uri],
+    }, content_type='application/json')
+    assert response.status_code == 400
+
+
+def test_records_annotations_unknown_project(client, triplestore, django_test_user):
+    client.force_login(django_test_user)
+    response = client.post('/api/records-annotations/', {
+        'records': ['http://example.com/source'],
+        'projects': ['http://example.com/projects/nonexistent'],
+    }, content_type='application/json')
+    assert response.status_code == 400
+    assert 'does not exist' in response.json()[0]
+
+
+def test_records_annotations_invalid_lists(client, triplestore, django_test_user, project):
+    client.force_login(django_test_user)
+    for data in [
+        {'records': 'http://example.com/source', 'projects': [project.uri]},
+        {'records': ['http://example.com/source'], 'projects': project.uri},
+        {'records': 42, 'projects': [project.uri]},
+        {'records': ['http://example.com/source', 42], 'projects': [project.uri]},
+        {'collection': ['http://example.com/collection']},
+    ]:
+        response = client.post('/api/records-annotations/', data,
+                               content_type='application/json')
+        assert response.status_code == 400
+
+
+def test_records_annotations_collection_without_project(client, triplestore, django_test_user):
+    uri = collection_uri('Orphaned')
+    collection_graph(uri).add((uri, RDF.type, EDPOPCOL.Collection))
+    triplestore.commit()
+    client.force_login(django_test_user)
+    response = client.post('/api/records-annotations/', {
+        'collection': str(uri),
+    }, content_type='application/json')
+    assert response.status_code == 400
+
+
+def test_annotations_are_stored_per_project(client, triplestore, django_test_user, project):
+    source = 'http://example.com/source'
+    uri = create_annotation(client, {'oa:hasSource': {'@id': source}},
+                            'This is an annotation', django_test_user, project)
+    graph = Graph(triplestore, annotation_graph_identifier(project.identifier()))
+    assert (URIRef(uri), OA.hasBody, Literal('This is an annotation')) in graph
+
+
+def test_project_annotations_deleted_with_project(client, triplestore, django_test_user, project):
+    source = 'http://example.com/source'
+    uri = create_annotation(client, {'oa:hasSource': {'@id': source}},
+                            'This is an annotation', django_test_user, project)
+    project.delete()
+    assert not annotation_exists_for_source(triplestore, source)
+    assert not IndexedDocument.objects.filter(uri=uri).exists()
+
+
+def test_create_annotations(client, triplestore, django_test_user, project):
+    sources = ['http://example.com/source1', 'http://example.com/source2']
+    tag = 'https://popular-print-glossary.sites.uu.nl/glossary/chapbook/'
+    data = {
+        '@context': JSON_LD_CONTEXT,
+        '@graph': [{
+            'oa:hasTarget': {'oa:hasSource': {'@id': source}},
+            'oa:hasBody': {'@id': tag},
+            'oa:motivatedBy': {'@id': str(OA.tagging)},
+            'as:context': {'@id': project.uri},
+        } for source in sources] + [{
+            'oa:hasTarget': {'oa:hasSource': {'@id': sources[0]}},
+            'oa:hasBody': 'This is an annotation',
+            'as:context': {'@id': project.uri},
+        }],
+    }
+    client.force_login(django_test_user)
+    response = client.post('/api/annotations/', data, content_type='application/ld+json')
+    assert response.status_code == 200
+    uris = list(response.data.subjects(RDF.type, EDPOPCOL.Annotation))
+    assert len(uris) == 3
+    stored = Graph(triplestore, annotation_graph_identifier(project.identifier()))
+    for uri in uris:
+        assert len(list(stored.triples((uri, OA.hasTarget, None)))) == 1
+    assert len(list(stored.triples((None, OA.hasBody, URIRef(tag))))) == 2
+    assert IndexedDocument.objects.filter(uri__in=map(str, uris)).count() == 3
+
+
+def test_create_annotations_invalid(client, triplestore, django_test_user, project):
+    source = 'http://example.com/source'
+    data = {
+        '@context': JSON_LD_CONTEXT,
+        '@graph': [{
+            'oa:hasTarget': {'oa:hasSource': {'@id': source}},
+            'oa:hasBody': 'This is an annotation',
+            'as:context': {'@id': project.uri},
+        }, {
+            'oa:hasTarget': {'oa:hasSource': {'@id': source}},
+            'oa:hasBody': 'This is not a tag',
+            'oa:motivatedBy': {'@id': str(OA.tagging)},
+            'as:context': {'@id': project.uri},
+        }],
+    }
+    client.force_login(django_test_user)
+    response = client.post('/api/annotations/', data, content_type='application/ld+json')
+    assert response.status_code == 400
+    assert not annotation_exists_for_source(triplestore, source)
+    # The single annotation view still takes exactly one annotation
+    response = client.post('/api/annotation/', data, content_type='application/ld+json')
+    assert response.status_code == 400
+
+
+def test_create_annotations_unauthorized(client, triplestore, django_test_user, project):
+    other = Project.objects.create(name='other', display_name='Other')
+    source = 'http://example.com/source'
+    data = {
+        '@context': JSON_LD_CONTEXT,
+        '@graph': [{
+            'oa:hasTarget': {'oa:hasSource': {'@id': source}},
+            'oa:hasBody': 'This is an annotation',
+            'as:context': {'@id': uri},
+        } for uri in (project.uri, other.uri)],
+    }
+    client.force_login(django_test_user)
+    response = client.post('/api/annotations/', data, content_type='application/ld+json')
+    assert response.status_code == 400
+    assert not annotation_exists_for_source(triplestore, source)
+
+
+def test_annotation_stats(client, triplestore, django_test_user, project):
+    source = 'http://example.com/source'
+    create_annotation(client, {'oa:hasSource': {'@id': source}},
+                      'This is an annotation', django_test_user, project)
+    response = client.get(f'/api/annotation-stats/?project={quote_plus(project.uri)}')
+    assert response.status_code == 200
+    assert response.json() == {
+        'motivations': {'commenting': 1}, 'tags': [], 'collections': {},
+    }
+    other = Project.objects.create(name='other', display_name='Other')
+    response = client.get(f'/api/annotation-stats/?project={quote_plus(other.uri)}')
+    assert response.status_code == 400
+    unknown = 'http://example.com/projects/nonexistent'
+    response = client.get(f'/api/annotation-stats/?project={quote_plus(unknown)}')
+    assert response.status_code == 404
@@ -0,0 +1,25 @@
+from django.core.management import BaseCommand
+
+from annotations.api import ANNOTATION_GRAPH_IDENTIFIER
+from annotations.partitioning import move_project_annotations, \
+    count_graph_annotations
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = ('Move the annotations in the shared annotation graph to the '
+            'annotation graph of their project. This is also done by the '
+            'migrations of the annotations app.')
+
+    def handle(self, **options):
+        for project in Project.objects.all():
+            annotations = move_project_annotations(project.identifier())
+            self.stdout.write(
+                f'{project.name}: {count_graph_annotations(annotations)} annotations'
+            )
+        remaining = count_graph_annotations(ANNOTATION_GRAPH_IDENTIFIER)
+        if remaining:
+            self.stdout.write(
+                f'{remaining} annotations of unknown projects remain in '
+                f'{ANNOTATION_GRAPH_IDENTIFIER}'
+            )
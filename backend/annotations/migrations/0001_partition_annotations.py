@@ -0,0 +1,28 @@
+from django.db import migrations
+from rdflib import URIRef
+
+from annotations.partitioning import partition_annotations
+
+
+def move_annotations_to_project_graphs(apps, schema_editor):
+    '''
+    Annotations are read from the annotation graph of their project only, so
+    move those that are still in the shared annotation graph.
+    '''
+    Project = apps.get_model('projects', 'Project')
+    uris = Project.objects.exclude(uri='').values_list('uri', flat=True)
+    partition_annotations(map(URIRef, uris))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_alter_project_uri'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            move_annotations_to_project_graphs,
+            reverse_code=migrations.RunPython.noop,
+        )
+    ]
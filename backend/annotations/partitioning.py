@@ -0,0 +1,99 @@
+'''
+Moving annotations from the graph that held the annotations of all projects
+(`ANNOTATION_GRAPH_IDENTIFIER`) to the annotation graph of their project
+(see `annotation_graph_identifier`). Annotations are only read from the
+graphs of their projects, so this is done on deploy by a data migration;
+the partition_annotations command does the same on demand.
+'''
+
+from typing import Iterable
+
+from django.conf import settings
+from rdflib import URIRef
+
+from annotations.api import ANNOTATION_GRAPH_IDENTIFIER, NS, touch_annotations
+from annotations.utils import annotation_graph_identifier
+
+# Arguments: legacy, annotations, project. Move the annotations of a project,
+# with their targets and selectors, from the legacy graph to the graph of
+# the project.
+move_project_annotations_update = '''
+delete {{
+  graph {legacy} {{
+    ?annotation ?pa ?oa .
+    ?target ?pt ?ot .
+    ?selector ?ps ?os .
+  }}
+}}
+insert {{
+  graph {annotations} {{
+    ?annotation ?pa ?oa .
+    ?target ?pt ?ot .
+    ?selector ?ps ?os .
+  }}
+}}
+where {{
+  graph {legacy} {{
+    ?annotation as:context {project} ;
+                ?pa ?oa .
+    optional {{
+      ?annotation oa:hasTarget ?target .
+      ?target ?pt ?ot .
+      optional {{
+        ?target oa:hasSelector ?selector .
+        ?selector ?ps ?os .
+      }}
+    }}
+  }}
+}}
+'''.format
+
+count_annotations_query = '''
+select (count(distinct ?annotation) as ?count)
+where {{
+  graph {annotations} {{
+    ?annotation as:context ?project .
+  }}
+}}
+'''.format
+
+
+def count_graph_annotations(graph: URIRef) -> int:
+    '''
+    Count the annotations in an annotation graph.
+    '''
+    store = settings.RDFLIB_STORE
+    result = store.query(
+        count_annotations_query(annotations=graph.n3()), initNs=NS,
+    )
+    return int(next(iter(result))[0])
+
+
+def move_project_annotations(project: URIRef) -> URIRef:
+    '''
+    Move the annotations of a project from the legacy graph to the graph of
+    the project, and return that graph.
+    '''
+    store = settings.RDFLIB_STORE
+    annotations = annotation_graph_identifier(project)
+    store.update(move_project_annotations_update(
+        legacy=ANNOTATION_GRAPH_IDENTIFIER.n3(),
+        annotations=annotations.n3(),
+        project=project.n3(),
+    ), initNs=NS)
+    touch_annotations(store, [annotations])
+    store.commit()
+    return annotations
+
+
+def partition_annotations(projects: Iterable[URIRef]) -> int:
+    '''
+    Move the annotations of the given projects out of the legacy graph.
+    Return the number of annotations that remain there, i.e. those of
+    unknown projects.
+    '''
+    if count_graph_annotations(ANNOTATION_GRAPH_IDENTIFIER) == 0:
+        return 0
+    for project in projects:
+        move_project_annotations(project)
+    return count_graph_annotations(ANNOTATION_GRAPH_IDENTIFIER)
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from annotations.api import drop_project_annotations
+from projects.models import Project
+
+
+@receiver(post_delete, sender=Project)
+def delete_project_annotations(sender, instance: Project, **kwargs):
+    '''
+    Delete all annotations in the project.
+    '''
+    drop_project_annotations(instance.identifier())
@@ -0,0 +1,162 @@
+'''
+Statistics of the annotations in a project: the number of annotations per
+motivation and the number of times each tag is used, for the project as a
+whole and for each of its collections.
+
+Statistics are counted in the triplestore with grouped queries, so the
+annotations are not transferred. They are cached per generation of the
+annotation graph of the project and of its collections, i.e. per value of
+their `as:updated`, which is touched whenever annotations are written or
+the members of a collection change.
+'''
+
+from typing import Dict, List, Tuple
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rdflib import RDFS, URIRef
+
+from annotations.utils import annotation_graph_identifier
+from triplestore.constants import AS, OA
+
+CACHE_KEY_PREFIX = 'annotation-stats:'
+
+NS = {'rdfs': RDFS, 'oa': OA, 'as': AS}
+
+# Annotations that have no motivation are comments; see
+# `validate_annotations`.
+annotation_pattern = '''
+  graph {annotations} {{
+    ?annotation as:context {project} .
+    optional {{ ?annotation oa:motivatedBy ?motivatedBy }}
+    optional {{
+      ?annotation oa:motivatedBy oa:tagging ;
+                  oa:hasBody ?tag .
+    }}
+  }}
+  bind ( coalesce(?motivatedBy, oa:commenting) as ?motivation )
+'''.format
+
+project_counts_query = '''
+select ?motivation ?tag (count(distinct ?annotation) as ?count)
+where {{
+  {annotation_pattern}
+}}
+group by ?motivation ?tag
+'''.format
+
+collection_counts_query = '''
+select ?collection ?motivation ?tag (count(distinct ?annotation) as ?count)
+where {{
+  {annotation_pattern}
+  graph {annotations} {{
+    ?annotation oa:hasTarget ?target .
+    ?target oa:hasSource ?record .
+  }}
+  graph ?collection {{
+    ?collection as:context {project} ;
+                rdfs:member ?record .
+  }}
+}}
+group by ?collection ?motivation ?tag
+'''.format
+
+generation_query = '''
+select ?graph ?updated
+where {{
+  {{
+    graph {annotations} {{ {annotations} as:updated ?updated }}
+    bind ( {annotations} as ?graph )
+  }}
+  union
+  {{
+    graph ?graph {{
+      ?graph as:context {project} ;
+             as:updated ?updated .
+    }}
+  }}
+}}
+'''.format
+
+
+def _empty_counts() -> Dict:
+    return {'motivations': {}, 'tags': {}}
+
+
+def _add(counts: Dict, motivation: URIRef, tag: URIRef, count: int) -> None:
+    name = str(motivation)[len(str(OA)):] \
+        if str(motivation).startswith(str(OA)) else str(motivation)
+    counts['motivations'][name] = counts['motivations'].get(name, 0) + count
+    if tag is not None:
+        counts['tags'][str(tag)] = counts['tags'].get(str(tag), 0) + count
+
+
+def _sorted_tags(counts: Dict) -> Dict:
+    tags = sorted(counts['tags'].items(), key=lambda t: (-t[1], t[0]))
+    return {
+        'motivations': counts['motivations'],
+        'tags': [{'tag': tag, 'count': count} for tag, count in tags],
+    }
+
+
+def count_annotations(project: URIRef) -> Dict:
+    '''
+    Count the annotations of a project per motivation and per tag, both for
+    the whole project and for each collection in the project. Tags are
+    ordered by descending count; collections without annotations are
+    omitted.
+    '''
+    store = settings.RDFLIB_STORE
+    annotations = annotation_graph_identifier(project)
+    pattern = annotation_pattern(
+        annotations=annotations.n3(), project=project.n3(),
+    )
+    totals = _empty_counts()
+    for row in store.query(
+        project_counts_query(annotation_pattern=pattern), initNs=NS,
+    ):
+        _add(totals, row.motivation, row.tag, int(row['count']))
+    collections = {}
+    for row in store.query(collection_counts_query(
+        annotation_pattern=pattern,
+        annotations=annotations.n3(),
+        project=project.n3(),
+    ), initNs=NS):
+        counts = collections.setdefault(str(row.collection), _empty_counts())
+        _add(counts, row.motivation, row.tag, int(row['count']))
+    return {
+        **_sorted_tags(totals),
+        'collections': {
+            collection: _sorted_tags(counts)
+            for collection, counts in collections.items()
+        },
+    }
+
+
+def annotations_generation(project: URIRef) -> List[Tuple[str, str]]:
+    '''
+    Get the times of the last change to the annotations of a project and to
+    the members of each of its collections.
+    '''
+    store = settings.RDFLIB_STORE
+    annotations = annotation_graph_identifier(project)
+    result = store.query(generation_query(
+        annotations=annotations.n3(), project=project.n3(),
+    ), initNs=NS)
+    return sorted((str(row.graph), str(row.updated)) for row in result)
+
+
+def get_annotation_stats(project: URIRef) -> Dict:
+    '''
+    Get the statistics of the annotations of a project (see
+    `count_annotations`), from the cache if this generation of the project
+    was counted before.
+    '''
+    generation = repr((str(project), annotations_generation(project)))
+    key = CACHE_KEY_PREFIX + hashlib.sha224(generation.encode()).hexdigest()
+    stats = cache.get(key)
+    if stats is None:
+        stats = count_annotations(project)
+        cache.set(key, stats, settings.ANNOTATION_STATS_CACHE_TIMEOUT)
+    return stats
@@ -0,0 +1,73 @@
+from rdflib import URIRef
+
+from collect.rdf_models import EDPOPCollection
+from collect.utils import collection_graph, collection_uri
+from projects.rdf_models import RDFProject
+from triplestore.constants import OA
+from .api import JSON_LD_CONTEXT
+from .stats import get_annotation_stats
+
+TAG = 'https://popular-print-glossary.sites.uu.nl/glossary/chapbook/'
+SOURCES = ['http://example.com/source1', 'http://example.com/source2']
+
+
+def annotate(client, django_test_user, project, annotations):
+    client.force_login(django_test_user)
+    response = client.post('/api/annotations/', {
+        '@context': JSON_LD_CONTEXT,
+        '@graph': [{
+            'oa:hasTarget': {'oa:hasSource': {'@id': source}},
+            'as:context': {'@id': project.uri},
+            **body,
+        } for source, body in annotations],
+    }, content_type='application/ld+json')
+    assert response.status_code == 200
+
+
+def tag():
+    return {'oa:hasBody': {'@id': TAG}, 'oa:motivatedBy': {'@id': str(OA.tagging)}}
+
+
+def comment():
+    return {'oa:hasBody': 'This is an annotation'}
+
+
+def create_collection(project, records):
+    rdf_project = RDFProject(project.graph(), project.identifier())
+    uri = collection_uri('Annotated')
+    collection = EDPOPCollection(collection_graph(uri), uri)
+    collection.name = 'Annotated'
+    collection.project = rdf_project.uri
+    collection.save()
+    collection.add_records([URIRef(record) for record in records])
+    return collection
+
+
+def test_annotation_stats(client, triplestore, django_test_user, project):
+    annotate(client, django_test_user, project, [
+        (SOURCES[0], tag()), (SOURCES[1], tag()), (SOURCES[0], comment()),
+    ])
+    collection = create_collection(project, SOURCES[:1])
+    stats = get_annotation_stats(project.identifier())
+    assert stats['motivations'] == {'tagging': 2, 'commenting': 1}
+    assert stats['tags'] == [{'tag': TAG, 'count': 2}]
+    assert stats['collections'] == {
+        str(collection.uri): {
+            'motivations': {'tagging': 1, 'commenting': 1},
+            'tags': [{'tag': TAG, 'count': 1}],
+        },
+    }
+
+
+def test_annotation_stats_new_generation(client, triplestore, django_test_user, project):
+    annotate(client, django_test_user, project, [(SOURCES[0], comment())])
+    collection = create_collection(project, SOURCES[:1])
+    assert get_annotation_stats(project.identifier())['motivations'] == \
+        {'commenting': 1}
+    annotate(client, django_test_user, project, [(SOURCES[1], comment())])
+    assert get_annotation_stats(project.identifier())['motivations'] == \
+        {'commenting': 2}
+    collection.add_records([URIRef(SOURCES[1])])
+    stats = get_annotation_stats(project.identifier())
+    assert stats['collections'][str(collection.uri)]['motivations'] == \
+        {'commenting': 2}
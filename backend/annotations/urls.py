@@ -5,5 +5,8 @@ from . import api
 urlpatterns = [
     re_path(r'api/annotation/(?P<annotation>.+)/', api.AnnotationEditView.as_view(), name='annotation_edit'),
     path('api/annotation/', api.AnnotationView.as_view(), name='annotation'),
+    path('api/annotations/', api.AnnotationsView.as_view(), name='annotations'),
+    path('api/annotation-stats/', api.AnnotationStatsView.as_view(), name='annotation_stats'),
+    path('api/records-annotations/', api.RecordsAnnotationsView.as_view(), name='records_annotations'),
     re_path(r'api/record-annotations/(?P<record>.+)/', api.AnnotationsPerTargetView.as_view(), name='record_annotations')
 ]
@@ -0,0 +1,9 @@
+from rdflib import URIRef
+from rdflib.term import Node
+
+
+def annotation_graph_identifier(project: Node) -> URIRef:
+    '''
+    Identifier of the named graph that holds the annotations of a project.
+    '''
+    return URIRef(str(project).rstrip('/') + '/annotations/')
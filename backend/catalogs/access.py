@@ -0,0 +1,86 @@
+"""Track how often and how recently users open stored records, so that
+garbage collection can keep frequently used records (see
+`catalogs.retention`).
+
+Accesses are buffered per process and written in one update, because
+opening a record should not cost an extra request to the triplestore."""
+from collections import Counter
+import atexit
+import datetime as dt
+import threading
+import time
+
+from django.conf import settings
+from rdflib import Literal, URIRef
+
+from catalogs.triplestore import RECORDS_GC_GRAPH_URI, SCHEMA
+
+# Arguments: gc_graph, date, accesses (rows of a record and its number of new
+# accesses). Only records that are tracked for garbage collection are
+# updated.
+record_access_update = '''
+delete {{
+  graph <{gc_graph}> {{
+    ?r schema:lastReviewed ?a ;
+       schema:userInteractionCount ?count .
+  }}
+}}
+insert {{
+  graph <{gc_graph}> {{
+    ?r schema:lastReviewed {date} ;
+       schema:userInteractionCount ?count_upd .
+  }}
+}}
+where {{
+  values ( ?r ?n ) {{ {accesses} }}
+  graph <{gc_graph}> {{
+    ?r schema:uploadDate ?d .
+    optional {{ ?r schema:lastReviewed ?a }}
+    optional {{ ?r schema:userInteractionCount ?count }}
+  }}
+  bind ( coalesce(?count, 0) + ?n as ?count_upd )
+}}
+'''.format
+
+_lock = threading.Lock()
+_pending: Counter = Counter()
+_last_flush = time.monotonic()
+
+
+def record_access(record: URIRef) -> None:
+    """Register that a stored record was opened. The access is written
+    to the triplestore together with other accesses once enough have been
+    collected or enough time has passed."""
+    with _lock:
+        _pending[record] += 1
+        flush_due = (
+            len(_pending) >= settings.RECORD_ACCESS_FLUSH_SIZE or
+            time.monotonic() - _last_flush >=
+            settings.RECORD_ACCESS_FLUSH_INTERVAL
+        )
+    if flush_due:
+        flush_record_access()
+
+
+def flush_record_access() -> None:
+    """Write all buffered record accesses to the triplestore."""
+    global _pending, _last_flush
+    with _lock:
+        accesses, _pending = _pending, Counter()
+        _last_flush = time.monotonic()
+    if not accesses:
+        return
+    rows = ' '.join(
+        f'( {record.n3()} {Literal(count).n3()} )'
+        for record, count in accesses.items()
+    )
+    store = settings.RDFLIB_STORE
+    store.update(record_access_update(
+        gc_graph=RECORDS_GC_GRAPH_URI,
+        date=Literal(dt.date.today()).n3(),
+        accesses=rows,
+    ), initNs={'schema': SCHEMA})
+    store.commit()
+
+
+atexit.register(flush_record_access)
@@ -0,0 +1,38 @@
+from rdflib import Literal
+import datetime as dt
+
+from .access import record_access, flush_record_access
+from .triplestore import SCHEMA
+
+
+def test_record_access_is_buffered(working_data_saved, triplestore, settings):
+    settings.RECORD_ACCESS_FLUSH_SIZE = 10
+    settings.RECORD_ACCESS_FLUSH_INTERVAL = 60
+    nodes, _, _ = working_data_saved
+    flush_record_access()
+    record_access(nodes[0])
+    record_access(nodes[0])
+    assert not any(triplestore.triples((nodes[0], SCHEMA.lastReviewed, None)))
+    flush_record_access()
+    assert any(triplestore.triples(
+        (nodes[0], SCHEMA.lastReviewed, Literal(dt.date.today()))
+    ))
+    assert any(triplestore.triples(
+        (nodes[0], SCHEMA.userInteractionCount, Literal(2))
+    ))
+    record_access(nodes[0])
+    flush_record_access()
+    counts = list(triplestore.triples(
+        (nodes[0], SCHEMA.userInteractionCount, None)
+    ))
+    assert len(counts) == 1
+    assert counts[0][0][2] == Literal(3)
+    assert not any(triplestore.triples((nodes[1], SCHEMA.lastReviewed, None)))
+
+
+def test_record_access_flushes_when_buffer_full(working_data_saved, triplestore,
+                                                settings):
+    settings.RECORD_ACCESS_FLUSH_SIZE = 1
+    nodes, _, _ = working_data_saved
+    record_access(nodes[1])
+    assert any(triplestore.triples((nodes[1], SCHEMA.lastReviewed, None)))
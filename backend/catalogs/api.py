@@ -1,18 +1,37 @@
 from django.conf import settings
-from edpop_explorer import ReaderError
-from edpop_explorer.readers.utils import get_record_by_uri
+from edpop_explorer import ReaderError, NotFoundError
 from typing import Optional
 
 from rdf.renderers import TurtleRenderer, JsonLdRenderer
 from rest_framework import views
 from rdf.views import RDFView
-from rdflib import Graph, URIRef
+from rdflib import Graph, URIRef, Literal, RDF, SDO
 from rest_framework.exceptions import ParseError
+from rest_framework.permissions import IsAdminUser
 from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 
 from triplestore.constants import EDPOPREC, AS
-from .graphs import SearchGraphBuilder, get_catalogs_graph, get_reader_by_uriref
-from .triplestore import get_single_record, save_to_triplestore, remove_from_triplestore
+from . import negative_cache
+from .access import record_access
+from .freshness import Freshness, get_freshness_policy, refresh_record, \
+    schedule_refresh
+from .projection import get_projection, project_graph, is_summary
+from .graphs import SearchGraphBuilder, get_catalogs_graph, \
+    get_reader_by_uriref, get_reader_by_slug, ordered_results_graph, \
+    READERS_BASE_URI
+from .triplestore import get_single_record, get_stored_records, \
+    get_record_summaries, get_upload_date
+from . import search_index
+from collect.utils import collection_exists, collection_graph, \
+    collection_records, project_records
+from projects.api import readable_projects
+
+# The local full-text index of stored records is offered as a catalog
+LOCAL_CATALOG_URIREF = URIRef(READERS_BASE_URI + "stored-records")
+LOCAL_CATALOG_NAME = "Stored records"
+LOCAL_CATALOG_DESCRIPTION = ("Records that were retrieved before, searched "
+                             "together with their annotations")
 
 JSON_LD_CONTEXT = {
     "edpoprec": str(EDPOPREC),
@@ -21,41 +40,70 @@ JSON_LD_CONTEXT = {
 
 
 class RecordView(RDFView):
-    """Get a single record."""
+    """Get a single record. Pass `fields` and/or `profile` to get only some
+    of its properties (see `catalogs.projection`)."""
     renderer_classes = (JsonLdRenderer,)
     json_ld_context = JSON_LD_CONTEXT
 
     def get_graph(self, request: views.Request, **kwargs) -> Graph:
         force_reload = request.headers.get("Force-Reload") == "true"
+        properties = get_projection(request)
         reader = kwargs.get("reader")
         record_id = kwargs.get("record")
-        record_uri = "https://edpop.hum.uu.nl/readers/" + reader + "/" + record_id
+        try:
+            record_uri = get_reader_by_slug(reader).IRI_PREFIX + record_id
+        except KeyError:
+            # Records of readers that are no longer activated may still
+            # be stored
+            record_uri = READERS_BASE_URI + reader + "/" + record_id
         record_uriref = URIRef(record_uri)
 
+        stored = None
         if not force_reload:
             # First check if it is already in the triplestore
-            graph = get_single_record(record_uriref)
-            if (record_uriref, None, None) in graph:
-                # Record exists in triplestore; return it
-                return graph
+            stored = get_single_record(record_uriref, properties)
+            if (record_uriref, None, None) in stored:
+                catalog = stored.value(record_uriref, EDPOPREC.fromCatalog)
+                freshness = get_freshness_policy(catalog).classify(
+                    get_upload_date(record_uriref)
+                )
+                if freshness != Freshness.EXPIRED:
+                    # Serve the stored copy; replace it in the background
+                    # if it is stale.
+                    if freshness == Freshness.STALE:
+                        schedule_refresh(record_uri)
+                    record_access(record_uriref)
+                    return stored
+            else:
+                stored = None
 
-        try:
-            record = get_record_by_uri(record_uri, settings.CATALOG_READERS)
-        except ReaderError as e:
-            raise ParseError("Could not fetch record: " + str(e))
-        if record is not None:
-            graph = record.to_graph()
-            if force_reload:
-                # In case of force reload, the record might already be in the
-                # triplestore. Remove it to avoid duplications.
-                remove_from_triplestore([record])
-            save_to_triplestore(graph, [record_uriref])
-            return graph
-        raise ParseError(f"Could not fetch record")
+        failure = None if force_reload else negative_cache.get_failure(record_uri)
+        if failure is None:
+            try:
+                graph = refresh_record(record_uri)
+            except NotFoundError:
+                # NotFoundError is a ReaderError, but the catalog answered
+                graph = None
+            except ReaderError as e:
+                failure = (negative_cache.UPSTREAM_ERROR,
+                           "Could not fetch record: " + str(e))
+            if failure is None:
+                if graph is not None:
+                    negative_cache.forget_failure(record_uri)
+                    return project_graph(graph, [record_uriref], properties)
+                failure = (negative_cache.NOT_FOUND, "Could not fetch record")
+            negative_cache.remember_failure(record_uri, *failure)
+        if stored is not None:
+            # Better an expired copy than nothing at all
+            return stored
+        raise ParseError(failure[1])
 
 
 class SearchView(RDFView):
-    """Search in a given external catalog according to a query."""
+    """Search in a given external catalog according to a query. Pass
+    `fields` and/or `profile` to get only some properties of the records
+    (see `catalogs.projection`). Summaries of stored records are read from
+    the materialized record summaries."""
     renderer_classes = (JsonLdRenderer,)
     json_ld_context = JSON_LD_CONTEXT
 
@@ -75,6 +123,8 @@ class SearchView(RDFView):
         start = int(start)
         if end is not None:
             end = int(end)
+        if catalog_uriref == LOCAL_CATALOG_URIREF:
+            return self.get_local_graph(request, query, start, end)
 
         try:
             readerclass = get_reader_by_uriref(catalog_uriref)
@@ -86,7 +136,53 @@ class SearchView(RDFView):
             builder.perform_fetch()
         except ReaderError as e:
             raise ParseError(str(e))
-        return builder.get_result_graph()
+        return project_graph(
+            builder.get_result_graph(),
+            [record.subject_node for record in builder.records],
+            get_projection(request),
+        )
+
+    def get_local_graph(
+            self, request: views.Request, query: str, start: int,
+            end: Optional[int],
+    ) -> Graph:
+        """Search the records stored in the triplestore, by their own text
+        and by the annotations in the projects that the user may read. The
+        search can be limited to a `collection` or to the collections of a
+        `project`."""
+        projects = [p.uri for p in readable_projects(request.user)]
+        records = None
+        if 'collection' in request.query_params:
+            collection = URIRef(request.query_params['collection'])
+            if not collection_exists(collection):
+                raise ParseError(f"Collection does not exist: {collection}")
+            project = collection_graph(collection).value(collection, AS.context)
+            if str(project) not in projects:
+                raise ParseError("No permission to read this collection")
+            records = collection_records(collection)
+        elif 'project' in request.query_params:
+            project = request.query_params['project']
+            if project not in projects:
+                raise ParseError("No permission to read this project")
+            projects = [project]
+            records = project_records(URIRef(project))
+        if end is None:
+            end = start + 50
+        found, total = search_index.search(query, projects, records, start, end)
+        if is_summary(request):
+            records = get_record_summaries(found)
+        else:
+            records = get_stored_records(found, get_projection(request))
+        return ordered_results_graph(found, total) + records
+
+
+class LookupMetricsView(views.APIView):
+    """Return the metrics of the negative cache for record lookups."""
+    renderer_classes = (JSONRenderer,)
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request: views.Request, **kwargs) -> Response:
+        return Response(negative_cache.get_metrics())
 
 
 class CatalogsView(RDFView):
@@ -104,4 +200,8 @@ class CatalogsView(RDFView):
 
     def get_graph(self, request: views.Request, **kwargs) -> Graph:
         graph = get_catalogs_graph()
+        graph.add((LOCAL_CATALOG_URIREF, RDF.type, EDPOPREC.Catalog))
+        graph.add((LOCAL_CATALOG_URIREF, SDO.name, Literal(LOCAL_CATALOG_NAME)))
+        graph.add((LOCAL_CATALOG_URIREF, SDO.description, Literal(LOCAL_CATALOG_DESCRIPTION)))
+        graph.add((LOCAL_CATALOG_URIREF, EDPOPREC.allowEmptyQuery, Literal(False)))
         return graph
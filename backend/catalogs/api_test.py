@@ -1,6 +1,9 @@
 import pytest
-from rdflib import Graph
+from rdflib import Graph, RDF
 
+from triplestore.constants import EDPOPREC
+
+from .api import LOCAL_CATALOG_URIREF
 from .graphs import refresh_readers
 from .graphs_test import MockReader
 
@@ -16,7 +19,7 @@ def mockreader_installed(settings):
     refresh_readers()
 
 
-def test_search_view_happy_path(client, mockreader_installed):
+def test_search_view_happy_path(db, client, mockreader_installed):
     # Assert that view works correctly in normal situations. Special
     # situations are mostly tested in the tests for SearchGraphBuilder.
     response = client.get("/api/catalogs/search/?source=http://example.com/reader&query=test")
@@ -38,3 +41,14 @@ def test_catalogs_view(client, mockreader_installed):
     assert "application/ld+json" in response.headers['Content-Type']
 
 
+    graph = Graph().parse(response.content, format="json-ld")
+    assert (LOCAL_CATALOG_URIREF, RDF.type, EDPOPREC.Catalog) in graph
+
+
+def test_search_view_local_catalog_nonexisting_collection(db, client, triplestore):
+    response = client.get("/api/catalogs/search/", {
+        "source": str(LOCAL_CATALOG_URIREF),
+        "query": "test",
+        "collection": "https://example.org/collections/nothing",
+    })
+    assert response.status_code == 400
@@ -0,0 +1,109 @@
+import pytest
+import datetime as dt
+from contextlib import contextmanager
+from operator import attrgetter
+
+from django.core.cache import cache
+from edpop_explorer import Record, ReaderError, NotFoundError
+from rdflib import Graph, URIRef
+
+from .graphs import refresh_readers
+from .graphs_test import MockReader
+from .triplestore import save_to_triplestore
+
+
+@pytest.fixture
+def working_data_records() -> list[Record]:
+    reader = MockReader()
+    reader.fetch(10)
+    record0 = reader.records[0]
+    record1 = reader.records[1]
+    return [record0, record1]
+
+
+@pytest.fixture
+def working_data_graph(working_data_records) -> tuple[list[Record], Graph]:
+    record0, record1 = working_data_records
+    """Create some data to work with, as a list of records (needed for
+    removal) and as a graph."""
+    graph = record0.to_graph() + record1.to_graph()
+    return [record0, record1], graph
+
+
+def record_nodes(record_instances):
+    return map(attrgetter('subject_node'), record_instances)
+
+
+@pytest.fixture
+def working_data_saved(db, working_data_graph, triplestore):
+    records, graph = working_data_graph
+    nodes = list(record_nodes(records))
+    save_to_triplestore(graph, nodes)
+    return nodes, records, graph
+
+
+class LocalMockReader(MockReader):
+    """MockReader that can be accessed through RecordView."""
+    IRI_PREFIX = "https://edpop.hum.uu.nl/readers/mock/"
+    CATALOG_URIREF = URIRef("https://edpop.hum.uu.nl/readers/mock")
+
+
+# Freshness policy under which records of LocalMockReader are refetched
+LOCAL_MOCK_FRESHNESS = {
+    'default': {
+        'soft_ttl': dt.timedelta(days=7),
+        'hard_ttl': dt.timedelta(days=30),
+    },
+}
+
+
+@contextmanager
+def readers_installed(settings, readers, **overrides):
+    """Use the given catalog readers, and other overridden settings, within
+    the block. Tests of other apps use this to make their own fixtures,
+    because the fixtures in this file are only available in this app."""
+    previous = settings.CATALOG_READERS
+    settings.CATALOG_READERS = readers
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    refresh_readers()
+    try:
+        yield
+    finally:
+        settings.CATALOG_READERS = previous
+        refresh_readers()
+
+
+@pytest.fixture
+def local_mockreader_installed(settings):
+    with readers_installed(settings, [LocalMockReader],
+                           RECORD_FRESHNESS=LOCAL_MOCK_FRESHNESS):
+        yield
+
+
+class FailingMockReader(LocalMockReader):
+    """Reader that knows records with even identifiers only, and that
+    fails for identifiers starting with 'error'. Like real readers, it
+    raises NotFoundError for unknown records, except for identifiers
+    starting with 'none', for which it returns nothing. Counts its calls."""
+    calls = 0
+
+    @classmethod
+    def get_by_id(cls, identifier: str):
+        cls.calls += 1
+        if identifier.startswith('error'):
+            raise ReaderError('Catalog unavailable')
+        if identifier.startswith('none'):
+            return None
+        if int(identifier) % 2:
+            raise NotFoundError(f'No record {identifier}')
+        return super().get_by_id(identifier)
+
+
+@pytest.fixture
+def failing_reader_installed(settings, triplestore):
+    FailingMockReader.calls = 0
+    cache.clear()
+    with readers_installed(settings, [FailingMockReader]):
+        yield
+    cache.clear()
@@ -0,0 +1,217 @@
+"""Fetching many records from their catalogs at once. The records are grouped
+by catalog and fetched in parallel, while the requests to each catalog are
+limited according to its `RateLimit`, so that no catalog is overloaded."""
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+import logging
+import threading
+import time
+
+from django.conf import settings
+from edpop_explorer import Reader, Record, ReaderError, NotFoundError
+
+from catalogs import negative_cache
+from catalogs.graphs import get_reader_by_record_iri
+from catalogs.retention import get_catalog_policies, DEFAULT_POLICY
+from triplestore.utils import Progress
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_CATALOG = 'unknown'
+
+
+class RateLimit:
+    """Limit the requests to a catalog to at most `concurrency` at the same
+    time, started at least `interval` seconds apart."""
+    concurrency: int
+    interval: float
+
+    def __init__(self, concurrency: int = 2, interval: float = 0.0):
+        self.concurrency = concurrency
+        self.interval = interval
+
+
+def get_rate_limit(catalog: Optional[str]) -> RateLimit:
+    """Return the rate limit configured in `CATALOG_RATE_LIMITS` for the
+    given catalog."""
+    limits = get_catalog_policies('CATALOG_RATE_LIMITS', RateLimit)
+    return limits.get(catalog, limits[DEFAULT_POLICY])
+
+
+class _Throttle:
+    """Context manager that enforces a `RateLimit` across threads."""
+
+    def __init__(self, limit: RateLimit):
+        self._slots = threading.BoundedSemaphore(limit.concurrency)
+        self._lock = threading.Lock()
+        self._interval = limit.interval
+        self._next_start = 0.0
+
+    def __enter__(self):
+        self._slots.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self._interval
+        if start > now:
+            time.sleep(start - now)
+
+    def __exit__(self, *exc_info):
+        self._slots.release()
+
+
+class CatalogReport:
+    """Outcome of fetching records from one catalog. `seconds` is the
+    wall-clock time from the start of the first request to the catalog
+    until the end of the last one."""
+    fetched: int
+    not_found: int
+    failed: dict[str, str]
+    seconds: float
+
+    def __init__(self):
+        self.fetched = 0
+        self.not_found = 0
+        self.failed = {}
+        self.seconds = 0.0
+        self._first_start: Optional[float] = None
+        self._last_end: Optional[float] = None
+
+    def add_request(self, start: float, end: float) -> None:
+        """Account for a request that ran from `start` until `end`, in
+        seconds of `time.monotonic()`."""
+        if self._first_start is None or start < self._first_start:
+            self._first_start = start
+        if self._last_end is None or end > self._last_end:
+            self._last_end = end
+        self.seconds = self._last_end - self._first_start
+
+    @property
+    def throughput(self) -> Optional[float]:
+        """Number of records fetched per second."""
+        if not self.seconds:
+            return None
+        return self.fetched / self.seconds
+
+    def to_dict(self) -> dict:
+        return {
+            'fetched': self.fetched,
+            'not_found': self.not_found,
+            'failed': self.failed,
+            'seconds': round(self.seconds, 3),
+            'throughput': self.throughput,
+        }
+
+
+class FetchResult:
+    """Records fetched by `fetch_records` by IRI, the IRIs of records that
+    their catalogs do not know or that could not be fetched, and a report
+    per catalog."""
+    records: dict[str, Record]
+    not_found: list[str]
+    failed: dict[str, str]
+    catalogs: dict[str, CatalogReport]
+
+    def __init__(self):
+        self.records = {}
+        self.not_found = []
+        self.failed = {}
+        self.catalogs = defaultdict(CatalogReport)
+
+
+def fetch_records(
+        iris: Iterable[str],
+        max_requests: Optional[int] = None,
+        progress: Optional[Progress] = None,
+) -> FetchResult:
+    """Fetch the records with the given IRIs from their catalogs.
+
+    At most `max_requests` requests are sent at the same time, to all
+    catalogs together; the default is `RECORD_FETCH_WORKERS`. Lookups that
+    failed recently according to the negative cache are not repeated, and
+    new failures are remembered there. If given, `progress` is called
+    after every record."""
+    iris = list(dict.fromkeys(iris))
+    result = FetchResult()
+    lock = threading.Lock()
+    done = 0
+
+    def finish() -> None:
+        nonlocal done
+        done += 1
+        if progress:
+            progress(done, len(iris))
+
+    def fetch(iri: str, reader: type[Reader], throttle: _Throttle,
+              report: CatalogReport) -> None:
+        record = None
+        failure = None
+        with throttle:
+            start = time.monotonic()
+            try:
+                record = reader.get_by_iri(iri)
+            except NotFoundError:
+                pass
+            except ReaderError as e:
+                failure = (negative_cache.UPSTREAM_ERROR,
+                           'Could not fetch record: ' + str(e))
+            except Exception as e:
+                logger.exception(f'Unexpected error while fetching {iri}')
+                failure = (negative_cache.UPSTREAM_ERROR,
+                           'Could not fetch record: ' + repr(e))
+            end = time.monotonic()
+        if record is None and failure is None:
+            failure = (negative_cache.NOT_FOUND, 'Could not fetch record')
+        if failure is None:
+            negative_cache.forget_failure(iri)
+        else:
+            negative_cache.remember_failure(iri, *failure)
+        with lock:
+            report.add_request(start, end)
+            _count(result, report, iri, record, failure)
+            finish()
+
+    tasks = []
+    throttles = {}
+    for iri in iris:
+        try:
+            reader = get_reader_by_record_iri(iri)
+        except KeyError:
+            result.catalogs[UNKNOWN_CATALOG].failed[iri] = \
+                'No catalog for this record'
+            result.failed[iri] = 'No catalog for this record'
+            finish()
+            continue
+        catalog = str(reader.CATALOG_URIREF)
+        report = result.catalogs[catalog]
+        failure = negative_cache.get_failure(iri)
+        if failure is not None:
+            _count(result, report, iri, None, failure)
+            finish()
+            continue
+        if catalog not in throttles:
+            throttles[catalog] = _Throttle(get_rate_limit(reader.CATALOG_URIREF))
+        tasks.append((iri, reader, throttles[catalog], report))
+
+    if tasks:
+        workers = max_requests or settings.RECORD_FETCH_WORKERS
+        with ThreadPoolExecutor(max_workers=workers,
+                                thread_name_prefix='record-fetch') as executor:
+            for future in [executor.submit(fetch, *task) for task in tasks]:
+                future.result()
+    result.catalogs = dict(result.catalogs)
+    return result
+
+
+def _count(result: FetchResult, report: CatalogReport, iri: str,
+           record: Optional[Record], failure: Optional[tuple[str, str]]) -> None:
+    if record is not None:
+        result.records[iri] = record
+        report.fetched += 1
+    elif failure[0] == negative_cache.NOT_FOUND:
+        result.not_found.append(iri)
+        report.not_found += 1
+    else:
+        result.failed[iri] = failure[1]
+        report.failed[iri] = failure[1]
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from .fetching import fetch_records, RateLimit, get_rate_limit, UNKNOWN_CATALOG, \
+    CatalogReport
+from .conftest import LocalMockReader, FailingMockReader
+from .graphs import refresh_readers
+
+PREFIX = LocalMockReader.IRI_PREFIX
+CATALOG = str(LocalMockReader.CATALOG_URIREF)
+
+
+def test_fetch_records(failing_reader_installed):
+    progress = []
+    result = fetch_records(
+        [PREFIX + '0', PREFIX + '1', PREFIX + 'error', 'https://example.org/1'],
+        progress=lambda done, total: progress.append((done, total)),
+    )
+    assert list(result.records) == [PREFIX + '0']
+    assert result.records[PREFIX + '0'].identifier == '0'
+    assert result.not_found == [PREFIX + '1']
+    assert set(result.failed) == {PREFIX + 'error', 'https://example.org/1'}
+    report = result.catalogs[CATALOG]
+    assert (report.fetched, report.not_found, list(report.failed)) == \
+        (1, 1, [PREFIX + 'error'])
+    assert list(result.catalogs[UNKNOWN_CATALOG].failed) == ['https://example.org/1']
+    assert progress[-1] == (4, 4)
+
+
+def test_fetch_records_remembers_failures(failing_reader_installed):
+    fetch_records([PREFIX + '1', PREFIX + 'error'])
+    result = fetch_records([PREFIX + '1', PREFIX + 'error'])
+    assert FailingMockReader.calls == 2
+    assert result.not_found == [PREFIX + '1']
+    assert list(result.failed) == [PREFIX + 'error']
+
+
+def test_fetch_records_unexpected_error(failing_reader_installed):
+    # The reader cannot parse this identifier as a number
+    result = fetch_records([PREFIX + 'broken', PREFIX + '0'])
+    assert list(result.records) == [PREFIX + '0']
+    assert list(result.failed) == [PREFIX + 'broken']
+    assert list(result.catalogs[CATALOG].failed) == [PREFIX + 'broken']
+
+
+def test_catalog_report_wall_clock_time():
+    report = CatalogReport()
+    # Two requests that ran at the same time for most of their duration
+    report.add_request(10.0, 12.0)
+    report.add_request(11.0, 13.0)
+    assert report.seconds == 3.0
+    report.fetched = 6
+    assert report.throughput == 2.0
+
+
+class SlowMockReader(FailingMockReader):
+    """Reader that keeps track of how many requests run at the same time."""
+    running = 0
+    most_running = 0
+    lock = threading.Lock()
+
+    @classmethod
+    def get_by_id(cls, identifier: str):
+        with cls.lock:
+            cls.running += 1
+            cls.most_running = max(cls.most_running, cls.running)
+        time.sleep(0.01)
+        with cls.lock:
+            cls.running -= 1
+        return super().get_by_id(identifier)
+
+
+def test_fetch_records_rate_limit(failing_reader_installed, settings):
+    settings.CATALOG_READERS = [SlowMockReader]
+    settings.CATALOG_RATE_LIMITS = {
+        'default': {'concurrency': 4},
+        CATALOG: {'concurrency': 1, 'interval': 0.01},
+    }
+    refresh_readers()
+    result = fetch_records([PREFIX + str(i * 2) for i in range(5)], max_requests=4)
+    assert len(result.records) == 5
+    assert SlowMockReader.most_running == 1
+    assert result.catalogs[CATALOG].seconds > 0
+
+
+def test_rate_limit_by_catalog(settings):
+    settings.CATALOG_RATE_LIMITS = {
+        'default': {'concurrency': 3},
+        CATALOG: {'interval': 1.0},
+    }
+    limit = get_rate_limit(LocalMockReader.CATALOG_URIREF)
+    assert (limit.concurrency, limit.interval) == (3, 1.0)
+    assert get_rate_limit(None).interval == RateLimit().interval
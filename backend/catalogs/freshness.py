@@ -0,0 +1,102 @@
+"""Freshness of stored records. A stored copy of a record is served as long
+as it is fresh. Once it becomes stale, it is still served, but it is
+refetched from its catalog in the background. Once it has expired, it is
+refetched before it is served."""
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import Enum
+from typing import Optional
+import datetime as dt
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+from edpop_explorer import ReaderError
+from rdflib import Graph, URIRef
+
+from catalogs.graphs import get_record_by_iri
+from catalogs.retention import get_catalog_policies, DEFAULT_POLICY
+from catalogs.triplestore import replace_in_triplestore
+
+logger = logging.getLogger(__name__)
+
+
+class Freshness(Enum):
+    FRESH = 0
+    STALE = 1
+    EXPIRED = 2
+
+
+class FreshnessPolicy:
+    """Determine for how long a stored record is fresh (`soft_ttl`) and
+    after how long it expires (`hard_ttl`), counting from the date on
+    which it was retrieved. A TTL of `None` means never."""
+    soft_ttl: Optional[dt.timedelta]
+    hard_ttl: Optional[dt.timedelta]
+
+    def __init__(
+            self,
+            soft_ttl: Optional[dt.timedelta] = dt.timedelta(weeks=1),
+            hard_ttl: Optional[dt.timedelta] = None,
+    ):
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+
+    def classify(self, upload_date: Optional[dt.date]) -> Freshness:
+        """Return the freshness of a record retrieved on `upload_date`. A
+        record of which the upload date is unknown is considered stale."""
+        if upload_date is None:
+            return Freshness.STALE
+        age = dt.date.today() - upload_date
+        if self.hard_ttl is not None and age > self.hard_ttl:
+            return Freshness.EXPIRED
+        if self.soft_ttl is not None and age > self.soft_ttl:
+            return Freshness.STALE
+        return Freshness.FRESH
+
+
+def get_freshness_policy(catalog: Optional[URIRef]) -> FreshnessPolicy:
+    """Return the freshness policy configured in `RECORD_FRESHNESS` for the
+    given catalog."""
+    policies = get_catalog_policies('RECORD_FRESHNESS', FreshnessPolicy)
+    return policies.get(catalog, policies[DEFAULT_POLICY])
+
+
+def refresh_record(record_uri: str) -> Optional[Graph]:
+    """Fetch a record from its catalog and replace the stored copy. Return
+    the graph of the record, or `None` if the catalog does not know it. A
+    ReaderError is raised if the record could not be fetched."""
+    record = get_record_by_iri(record_uri)
+    if record is None:
+        return None
+    return replace_in_triplestore(record)
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.RECORD_REFRESH_WORKERS,
+    thread_name_prefix='record-refresh',
+)
+_lock = threading.Lock()
+_in_flight: dict[str, Future] = {}
+
+
+def _refresh_in_background(record_uri: str) -> None:
+    try:
+        refresh_record(record_uri)
+    except ReaderError as e:
+        logger.warning(f'Could not refresh record {record_uri}: {e}')
+    finally:
+        with _lock:
+            del _in_flight[record_uri]
+        close_old_connections()
+
+
+def schedule_refresh(record_uri: str) -> Future:
+    """Refresh a record in the background. If a refresh of the same record
+    is already underway, return that one instead of starting another."""
+    with _lock:
+        future = _in_flight.get(record_uri)
+        if future is None:
+            future = _executor.submit(_refresh_in_background, record_uri)
+            _in_flight[record_uri] = future
+    return future
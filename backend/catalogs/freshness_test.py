@@ -0,0 +1,87 @@
+import pytest
+import datetime as dt
+
+from rdflib import Graph, Literal, URIRef
+
+from triplestore.store_test import recording_store
+from .freshness import Freshness, FreshnessPolicy, get_freshness_policy, \
+    refresh_record, schedule_refresh
+from .conftest import LocalMockReader
+from .triplestore import SCHEMA, RECORDS_GC_GRAPH_IDENTIFIER, \
+    get_upload_date, get_single_record
+
+
+def set_upload_date(triplestore, record: URIRef, date: dt.date):
+    gc_graph = Graph(store=triplestore, identifier=RECORDS_GC_GRAPH_IDENTIFIER)
+    gc_graph.set((record, SCHEMA.uploadDate, Literal(date)))
+    triplestore.commit()
+
+
+def test_freshness_policy():
+    policy = FreshnessPolicy(
+        soft_ttl=dt.timedelta(days=7), hard_ttl=dt.timedelta(days=30)
+    )
+    today = dt.date.today()
+    assert policy.classify(today) == Freshness.FRESH
+    assert policy.classify(today - dt.timedelta(days=8)) == Freshness.STALE
+    assert policy.classify(today - dt.timedelta(days=31)) == Freshness.EXPIRED
+    assert policy.classify(None) == Freshness.STALE
+    never = FreshnessPolicy(soft_ttl=None, hard_ttl=None)
+    assert never.classify(today - dt.timedelta(days=1000)) == Freshness.FRESH
+
+
+def test_freshness_policy_by_catalog(settings):
+    settings.RECORD_FRESHNESS = {
+        'default': {'soft_ttl': dt.timedelta(days=7)},
+        'http://example.com/reader': {'hard_ttl': dt.timedelta(days=10)},
+    }
+    default = get_freshness_policy(URIRef('http://example.com/other'))
+    assert default.soft_ttl == dt.timedelta(days=7)
+    assert default.hard_ttl is None
+    policy = get_freshness_policy(URIRef('http://example.com/reader'))
+    assert policy.soft_ttl == dt.timedelta(days=7)
+    assert policy.hard_ttl == dt.timedelta(days=10)
+
+
+def test_schedule_refresh(db, triplestore, local_mockreader_installed):
+    record = URIRef(LocalMockReader.IRI_PREFIX + '1')
+    assert get_upload_date(record) is None
+    schedule_refresh(str(record)).result()
+    assert get_upload_date(record) == dt.date.today()
+    assert (record, None, None) in get_single_record(record)
+
+
+def test_refresh_sends_purge_and_save_together(db, 
+        settings, monkeypatch, local_mockreader_installed):
+    store, requests = recording_store(monkeypatch)
+    settings.RDFLIB_STORE = store
+    refresh_record(LocalMockReader.IRI_PREFIX + '1')
+    assert len(requests) == 1
+    update = requests[0].lower()
+    assert 0 <= update.index('delete {') < update.index('insert data')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_record_view_stale(client, triplestore, local_mockreader_installed):
+    record = URIRef(LocalMockReader.IRI_PREFIX + '1')
+    response = client.get('/readers/mock/1')
+    assert response.status_code == 200
+    assert get_upload_date(record) == dt.date.today()
+
+    stale_date = dt.date.today() - dt.timedelta(days=10)
+    set_upload_date(triplestore, record, stale_date)
+    response = client.get('/readers/mock/1')
+    assert response.status_code == 200
+    # The stale copy is served while it is replaced in the background
+    schedule_refresh(str(record)).result()
+    assert get_upload_date(record) == dt.date.today()
+
+
+def test_record_view_expired(db, client, triplestore, local_mockreader_installed):
+    record = URIRef(LocalMockReader.IRI_PREFIX + '1')
+    client.get('/readers/mock/1')
+    expired_date = dt.date.today() - dt.timedelta(days=40)
+    set_upload_date(triplestore, record, expired_date)
+    response = client.get('/readers/mock/1')
+    assert response.status_code == 200
+    assert get_upload_date(record) == dt.date.today()
@@ -16,6 +16,9 @@ from triplestore.constants import AS
 # Cache timeout in seconds for readers that fetch all results at once
 CACHE_TIMEOUT = 60 * 60
 
+# Base URI of the records of the readers that are served by RecordView
+READERS_BASE_URI = "https://edpop.hum.uu.nl/readers/"
+
 
 def _hash(input_str: str) -> str:
     """Return a hashed (hex digest) version of the input string."""
@@ -37,14 +40,32 @@ def _get_reader_dict() -> dict[URIRef, type[Reader]]:
             if x.CATALOG_URIREF}
 
 
+def _get_iri_prefix_dict() -> dict[str, type[Reader]]:
+    """Return a dict allowing access to reader classes by the prefix of the
+    IRIs of their records."""
+    return {str(x.IRI_PREFIX): x for x in settings.CATALOG_READERS
+            if x.IRI_PREFIX}
+
+
+def _get_slug_dict() -> dict[str, type[Reader]]:
+    """Return a dict allowing access to reader classes by the slug that
+    identifies them in record URLs (``readers/<slug>/<record>``)."""
+    return {x.IRI_PREFIX[len(READERS_BASE_URI):].rstrip('/'): x
+            for x in settings.CATALOG_READERS
+            if x.IRI_PREFIX and x.IRI_PREFIX.startswith(READERS_BASE_URI)}
+
+
 def refresh_readers() -> None:
     """Refresh the list of loaded readers. Currently only used
     for unit tests."""
-    global READERS_BY_URIREF
+    global READERS_BY_URIREF, READERS_BY_IRI_PREFIX, READERS_BY_SLUG
     READERS_BY_URIREF = _get_reader_dict()
-
+    READERS_BY_IRI_PREFIX = _get_iri_prefix_dict()
+    READERS_BY_SLUG = _get_slug_dict()
 
 READERS_BY_URIREF = _get_reader_dict()
+READERS_BY_IRI_PREFIX = _get_iri_prefix_dict()
+READERS_BY_SLUG = _get_slug_dict()
 
 
 def get_reader_by_uriref(uriref: URIRef) -> type[Reader]:
@@ -53,6 +74,37 @@ def get_reader_by_uriref(uriref: URIRef) -> type[Reader]:
     return READERS_BY_URIREF[uriref]
 
 
+def get_reader_by_record_iri(iri: str) -> type[Reader]:
+    """Return the reader class of a record according to the record's IRI.
+    Raise KeyError if no reader exists for the IRI."""
+    # IRI prefixes end in a slash, so only prefixes up to a slash have to
+    # be looked up. Try the longest one first.
+    end = iri.rfind('/')
+    while end != -1:
+        reader = READERS_BY_IRI_PREFIX.get(iri[:end + 1])
+        if reader is not None:
+            return reader
+        end = iri.rfind('/', 0, end)
+    raise KeyError(iri)
+
+
+def get_reader_by_slug(slug: str) -> type[Reader]:
+    """Return the reader class according to the slug in its record URLs.
+    Raise KeyError if reader does not exist."""
+    return READERS_BY_SLUG[slug]
+
+
+def get_record_by_iri(iri: str) -> Optional[Record]:
+    """Fetch a record by its IRI using the reader it belongs to. Return
+    `None` if there is no such reader. A ReaderError is raised if the
+    record could not be fetched."""
+    try:
+        reader = get_reader_by_record_iri(iri)
+    except KeyError:
+        return None
+    return reader.get_by_iri(iri)
+
+
 def get_catalogs_graph() -> Graph:
     """Get a graph containing information about all catalogs."""
     graphs = [x.catalog_to_graph() for x in _get_activated_readers()]
@@ -76,6 +128,22 @@ def range_available_in_reader(reader: Reader, r: range) -> bool:
     return all(i in reader.records for i in r)
 
 
+def ordered_results_graph(records: list[URIRef], total: Optional[int]) -> Graph:
+    """Return a graph with an ActivityStreams Collection containing
+    references to the given search results in order, and the total number
+    of results."""
+    graph = Graph()
+    subject_node = BNode()
+    graph.add((subject_node, RDF.type, AS.OrderedCollection))
+    collection_node = BNode()
+    collection = graph.collection(collection_node)
+    graph.add((subject_node, AS.orderedItems, collection_node))
+    for record in records:
+        collection.append(record)
+    graph.add((subject_node, AS.totalItems, Literal(total)))
+    return graph
+
+
 class SearchGraphBuilder:
     """Prepare and perform queries and build graphs from the results."""
     reader: Reader
@@ -173,21 +241,11 @@ class SearchGraphBuilder:
     def _get_collection_graph(self) -> Graph:
         """Return a graph with an ActivityStreams Collection containing
         references to the requested records in the right order."""
-        graph = Graph()
-        subject_node = BNode()
-        graph.add((subject_node, RDF.type, AS.OrderedCollection))
-        collection_node = BNode()
-        collection = graph.collection(collection_node)
-        graph.add((subject_node, AS.orderedItems, collection_node))
-        for record in self.records:
-            if record.iri is not None:
-                collection.append(URIRef(record.iri))
-        graph.add((
-            subject_node,
-            AS.totalItems,
-            Literal(self.reader.number_of_results)
-        ))
-        return graph
+        return ordered_results_graph(
+            [URIRef(record.iri) for record in self.records
+             if record.iri is not None],
+            self.reader.number_of_results,
+        )
 
     def get_result_graph(self) -> Graph:
         """Represent the fetched records in a graph with an ActivityStreams
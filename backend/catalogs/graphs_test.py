@@ -4,7 +4,7 @@ from edpop_explorer import readers, Reader, Record, BibliographicalRecord
 from rdflib import URIRef
 
 from .graphs import SearchGraphBuilder, _get_reader_dict, get_reader_by_uriref, get_catalogs_graph, \
-    range_available_in_reader
+    range_available_in_reader, get_reader_by_record_iri, get_reader_by_slug, get_record_by_iri
 
 
 class MockReader(Reader):
@@ -82,6 +82,23 @@ def test_get_reader_by_uriref():
         pytest.skip("registered reader has no URIRef")
 
 
+def test_get_reader_by_record_iri():
+    reader = readers.ALL_READERS[0]
+    assert get_reader_by_record_iri(reader.IRI_PREFIX + "123") == reader
+    assert get_reader_by_record_iri(reader.IRI_PREFIX + "a/b") == reader
+    with pytest.raises(KeyError):
+        get_reader_by_record_iri("https://example.com/unknown/123")
+    assert get_record_by_iri("https://example.com/unknown/123") is None
+
+
+def test_get_reader_by_slug():
+    reader = readers.ALL_READERS[0]
+    slug = reader.IRI_PREFIX.split("/")[-2]
+    assert get_reader_by_slug(slug) == reader
+    with pytest.raises(KeyError):
+        get_reader_by_slug("unknown")
+
+
 def test_get_catalogs_graph():
     graph = get_catalogs_graph()
     sample_uriref = readers.ALL_READERS[0].CATALOG_URIREF
@@ -97,20 +114,20 @@ def mock_builder(query, **kwargs):
     return builder
 
 
-def test_builder_first_results():
+def test_builder_first_results(db):
     builder = mock_builder("hoi", start=0, end=10)
     assert builder.records[0].identifier == "0"
     assert len(builder.records) == 10
 
 
-def test_buider_later_results():
+def test_buider_later_results(db):
     builder = mock_builder("hoi", start=5, end=15)
     assert len(builder.records) == 10
     # Builder stores a list of records starting with the first acquired record
     assert builder.records[0].identifier == "5"
 
 
-def test_builder_more_than_available():
+def test_builder_more_than_available(db):
     builder = mock_builder("hoi", start=5, end=50)
     # Assert that only the available records are fetched, which is 
     # 20 because there are 25 records and we started with 5
@@ -118,7 +135,7 @@ def test_builder_more_than_available():
     assert builder.records[0].identifier == "5"
 
 
-def test_builder_with_caching():
+def test_builder_with_caching(db):
     builder = SearchGraphBuilder(FetchAllMockReader)
     graph = builder.query_to_graph("hoi", end=10)
     # Just make sure that running this again does not cause any errors
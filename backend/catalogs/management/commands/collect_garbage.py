@@ -0,0 +1,69 @@
+import datetime as dt
+import time
+
+from django.core.management import BaseCommand, CommandError
+from rdflib import Literal, URIRef, XSD
+
+from catalogs.access import flush_record_access
+from catalogs.triplestore import collect_garbage, count_garbage
+
+
+class Command(BaseCommand):
+    help = ('Forget stored records that are not in any collection and that '
+            'have not been retrieved or opened recently.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--until', type=dt.date.fromisoformat, default=None,
+            help='Only forget records last used before this date '
+                 '(YYYY-MM-DD); defaults to the retention policy of each '
+                 'catalog',
+        )
+        parser.add_argument(
+            '--page-size', type=int, default=500,
+            help='Number of records to delete per update (default: 500)',
+        )
+        parser.add_argument(
+            '--budget', type=float, default=None,
+            help='Stop starting new pages after this many seconds',
+        )
+        parser.add_argument(
+            '--after', nargs=2, metavar=('DATE', 'RECORD'), default=None,
+            help='Resume after the given position of an earlier run',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report how many records would be forgotten',
+        )
+
+    def handle(self, **options):
+        until = options['until']
+        flush_record_access()
+        self.stdout.write(f'Found {count_garbage(until)} unused records.')
+        if options['dry_run']:
+            return
+        after = None
+        if options['after']:
+            date, record = options['after']
+            try:
+                dt.date.fromisoformat(date)
+            except ValueError:
+                raise CommandError(f'Invalid date: {date}')
+            after = (Literal(date, datatype=XSD.date), URIRef(record))
+        budget = options['budget']
+        deadline = time.monotonic() + budget if budget is not None else None
+        deleted, finished, cursor = collect_garbage(
+            until, options['page_size'], deadline, after
+        )
+        self.stdout.write(f'Forgot {deleted} records.')
+        if not finished:
+            resume = []
+            if until is not None:
+                resume.append(f'--until {until}')
+            if cursor is not None:
+                date, record = cursor
+                resume.append(f'--after {date} {record}')
+            message = 'Time budget exhausted; run again to continue'
+            if resume:
+                message += ' with ' + ' '.join(resume)
+            self.stdout.write(message + '.')
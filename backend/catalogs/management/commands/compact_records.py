@@ -0,0 +1,54 @@
+import time
+
+from django.core.management import BaseCommand
+
+from catalogs.triplestore import (
+    count_orphaned_field_nodes,
+    find_orphaned_field_nodes,
+    delete_field_nodes,
+    count_dangling_gc_entries,
+    find_dangling_gc_entries,
+    delete_gc_entries,
+    delete_in_batches,
+)
+
+
+class Command(BaseCommand):
+    help = ('Remove field nodes that no record refers to and garbage '
+            'collection entries of records that no longer exist.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Number of nodes to delete per update (default: 500)',
+        )
+        parser.add_argument(
+            '--budget', type=float, default=None,
+            help='Stop starting new batches after this many seconds',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report how many nodes would be removed',
+        )
+
+    def handle(self, **options):
+        batch_size = options['batch_size']
+        budget = options['budget']
+        deadline = time.monotonic() + budget if budget is not None else None
+        steps = [
+            ('orphaned field nodes', count_orphaned_field_nodes,
+             find_orphaned_field_nodes, delete_field_nodes),
+            ('dangling GC entries', count_dangling_gc_entries,
+             find_dangling_gc_entries, delete_gc_entries),
+        ]
+        for description, count, find, delete in steps:
+            self.stdout.write(f'Found {count()} {description}.')
+            if options['dry_run']:
+                continue
+            deleted, finished = delete_in_batches(
+                find, delete, batch_size, deadline
+            )
+            self.stdout.write(f'Removed {deleted} {description}.')
+            if not finished:
+                self.stdout.write('Time budget exhausted; run again to continue.')
+                return
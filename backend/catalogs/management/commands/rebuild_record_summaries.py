@@ -0,0 +1,23 @@
+from django.core.management import BaseCommand
+
+from catalogs.models import RecordSummary
+from catalogs.summaries import summarize_records
+from catalogs.triplestore import iterate_stored_records, get_stored_records
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the record summaries from the records in the triplestore.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size', type=int, default=500,
+            help='Number of records to summarize at a time (default: 500)',
+        )
+
+    def handle(self, **options):
+        RecordSummary.objects.all().delete()
+        summarized = 0
+        for page in iterate_stored_records(options['page_size']):
+            summarize_records(get_stored_records(page), page)
+            summarized += len(page)
+            self.stdout.write(f'Summarized {summarized} records')
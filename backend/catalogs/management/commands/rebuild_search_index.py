@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from annotations.api import NS, annotation_graph_identifier, \
+    annotation_texts_query
+from catalogs.models import IndexedDocument
+from catalogs.search_index import index_records, index_annotation
+from catalogs.triplestore import iterate_stored_records, get_stored_records
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = ('Rebuild the local full-text index from the records and '
+            'annotations in the triplestore.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size', type=int, default=500,
+            help='Number of records to index at a time (default: 500)',
+        )
+
+    def handle(self, **options):
+        page_size = options['page_size']
+        IndexedDocument.objects.all().delete()
+        indexed = 0
+        for page in iterate_stored_records(page_size):
+            index_records(get_stored_records(page), page)
+            indexed += len(page)
+            self.stdout.write(f'Indexed {indexed} records')
+
+        store = settings.RDFLIB_STORE
+        indexed = 0
+        for project in Project.objects.all():
+            annotations = annotation_graph_identifier(project.identifier())
+            offset = 0
+            while True:
+                rows = list(store.query(annotation_texts_query(
+                    annotations=annotations.n3(),
+                    offset=offset,
+                    limit=page_size,
+                ), initNs=NS))
+                for row in rows:
+                    index_annotation(row.annotation, row.record, row.project, row.body)
+                offset += len(rows)
+                if len(rows) < page_size:
+                    break
+            indexed += offset
+        self.stdout.write(f'Indexed {indexed} annotations')
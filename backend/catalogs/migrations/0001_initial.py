@@ -0,0 +1,32 @@
+# Generated by Django 4.2.29 on 2026-10-19 14:43
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexedDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uri', models.CharField(help_text='URI of the record or annotation', max_length=512, unique=True)),
+                ('kind', models.CharField(choices=[('record', 'Record'), ('annotation', 'Annotation')], max_length=16)),
+                ('record', models.CharField(db_index=True, help_text='URI of the record; for annotations, the annotated record', max_length=512)),
+                ('project', models.CharField(blank=True, db_index=True, help_text='URI of the project of an annotation', max_length=256)),
+                ('title', models.TextField(blank=True, help_text='Text that weighs heaviest in the ranking, such as titles and names')),
+                ('text', models.TextField(blank=True, help_text='All other indexed text')),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='catalogs_in_search__93c4fa_gin')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.29 on 2026-10-19 14:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecordSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uri', models.CharField(help_text='URI of the record', max_length=512, unique=True)),
+                ('record_type', models.CharField(help_text='RDF type of the record', max_length=256)),
+                ('catalog', models.CharField(blank=True, db_index=True, help_text='URI of the catalog of the record', max_length=512)),
+                ('identifier', models.TextField(blank=True, help_text='Identifier of the record in its catalog')),
+                ('public_url', models.TextField(blank=True, help_text='Link to the record in its catalog')),
+                ('title', models.TextField(blank=True, help_text='Title, or name of a person')),
+                ('contributors', models.JSONField(default=list, help_text='Responsible persons')),
+                ('dating', models.TextField(blank=True, help_text='Date of publication, or timespan of a person')),
+                ('places', models.JSONField(default=list, help_text='Places of publication, or places of activity of a person')),
+            ],
+            options={
+                'verbose_name_plural': 'record summaries',
+            },
+        ),
+    ]
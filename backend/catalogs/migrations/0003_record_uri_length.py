@@ -0,0 +1,33 @@
+# Generated by Django 4.2.29 on 2026-10-19 15:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalogs', '0002_recordsummary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='indexeddocument',
+            name='record',
+            field=models.TextField(db_index=True, help_text='URI of the record; for annotations, the annotated record'),
+        ),
+        migrations.AlterField(
+            model_name='indexeddocument',
+            name='uri',
+            field=models.TextField(help_text='URI of the record or annotation', unique=True),
+        ),
+        migrations.AlterField(
+            model_name='recordsummary',
+            name='catalog',
+            field=models.TextField(blank=True, db_index=True, help_text='URI of the catalog of the record'),
+        ),
+        migrations.AlterField(
+            model_name='recordsummary',
+            name='uri',
+            field=models.TextField(help_text='URI of the record', unique=True),
+        ),
+    ]
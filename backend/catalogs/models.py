@@ -1,3 +1,107 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
-# Create your models here.
+
+class IndexedDocument(models.Model):
+    '''
+    Text of a record stored in the triplestore, or of the body of an
+    annotation, in the local full-text index (see `catalogs.search_index`).
+
+    The index is a copy of data in the triplestore, kept up to date whenever
+    records or annotations are written; it can be rebuilt at any time.
+    '''
+
+    RECORD = 'record'
+    ANNOTATION = 'annotation'
+
+    uri = models.TextField(
+        unique=True,
+        help_text='URI of the record or annotation',
+    )
+    kind = models.CharField(
+        max_length=16,
+        choices=[(RECORD, 'Record'), (ANNOTATION, 'Annotation')],
+    )
+    record = models.TextField(
+        db_index=True,
+        help_text='URI of the record; for annotations, the annotated record',
+    )
+    project = models.CharField(
+        max_length=256,
+        blank=True,
+        db_index=True,
+        help_text='URI of the project of an annotation',
+    )
+    title = models.TextField(
+        blank=True,
+        help_text='Text that weighs heaviest in the ranking, such as titles and names',
+    )
+    text = models.TextField(
+        blank=True,
+        help_text='All other indexed text',
+    )
+    search_vector = SearchVectorField(null=True)
+
+    class Meta:
+        indexes = [GinIndex(fields=['search_vector'])]
+
+    def __str__(self) -> str:
+        return self.uri
+
+
+class RecordSummary(models.Model):
+    '''
+    The properties of a record stored in the triplestore that lists of
+    records show, so that lists can be rendered without reading the records
+    from the triplestore (see `catalogs.summaries`).
+
+    Like the full-text index, the summaries are a copy of data in the
+    triplestore that is written whenever records are saved; they can be
+    rebuilt at any time. Each property holds the text that is displayed,
+    i.e. the summary text of the field or otherwise its original text.
+    '''
+
+    uri = models.TextField(
+        unique=True,
+        help_text='URI of the record',
+    )
+    record_type = models.CharField(
+        max_length=256,
+        help_text='RDF type of the record',
+    )
+    catalog = models.TextField(
+        blank=True,
+        db_index=True,
+        help_text='URI of the catalog of the record',
+    )
+    identifier = models.TextField(
+        blank=True,
+        help_text='Identifier of the record in its catalog',
+    )
+    public_url = models.TextField(
+        blank=True,
+        help_text='Link to the record in its catalog',
+    )
+    title = models.TextField(
+        blank=True,
+        help_text='Title, or name of a person',
+    )
+    contributors = models.JSONField(
+        default=list,
+        help_text='Responsible persons',
+    )
+    dating = models.TextField(
+        blank=True,
+        help_text='Date of publication, or timespan of a person',
+    )
+    places = models.JSONField(
+        default=list,
+        help_text='Places of publication, or places of activity of a person',
+    )
+
+    class Meta:
+        verbose_name_plural = 'record summaries'
+
+    def __str__(self) -> str:
+        return self.uri
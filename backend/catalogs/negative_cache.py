@@ -0,0 +1,70 @@
+"""Negative cache for record lookups. When a record cannot be fetched from
+its catalog, this is remembered for a while, so that repeated lookups of the
+same record IRI do not reach the catalog again. Records that the catalog
+does not know and records that could not be fetched because of an upstream
+failure are remembered separately, each with its own timeout."""
+from typing import Optional
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+NOT_FOUND = 'not-found'
+UPSTREAM_ERROR = 'upstream-error'
+
+KEY_PREFIX = 'failed-record-lookup:'
+METRICS_KEY_PREFIX = 'failed-record-lookup-metrics:'
+METRICS = ('hits', 'misses', NOT_FOUND, UPSTREAM_ERROR)
+
+
+def _key(record_uri: str) -> str:
+    return KEY_PREFIX + hashlib.sha224(record_uri.encode()).hexdigest()
+
+
+def _timeout(kind: str) -> int:
+    if kind == NOT_FOUND:
+        return settings.RECORD_NOT_FOUND_CACHE_TIMEOUT
+    return settings.RECORD_ERROR_CACHE_TIMEOUT
+
+
+def _count(metric: str) -> None:
+    key = METRICS_KEY_PREFIX + metric
+    # Metrics do not expire; add() is a no-op if the counter exists
+    cache.add(key, 0, None)
+    cache.incr(key)
+
+
+def get_failure(record_uri: str) -> Optional[tuple[str, str]]:
+    """Return the kind of failure (`NOT_FOUND` or `UPSTREAM_ERROR`) and the
+    error message of a recent failed lookup of the given record, or `None`
+    if there is none."""
+    entry = cache.get(_key(record_uri))
+    if entry is None:
+        _count('misses')
+        return None
+    stored_uri, kind, message = entry
+    if stored_uri != record_uri:
+        # Hash collision
+        _count('misses')
+        return None
+    _count('hits')
+    return kind, message
+
+
+def remember_failure(record_uri: str, kind: str, message: str = '') -> None:
+    """Remember that a lookup of the given record failed."""
+    cache.set(_key(record_uri), (record_uri, kind, message), _timeout(kind))
+    _count(kind)
+
+
+def forget_failure(record_uri: str) -> None:
+    """Forget a failed lookup, e.g. because the record was fetched after
+    all."""
+    cache.delete(_key(record_uri))
+
+
+def get_metrics() -> dict[str, int]:
+    """Return how often the negative cache was hit and missed, and how many
+    failed lookups of each kind were remembered."""
+    counts = cache.get_many([METRICS_KEY_PREFIX + m for m in METRICS])
+    return {m: counts.get(METRICS_KEY_PREFIX + m, 0) for m in METRICS}
@@ -0,0 +1,52 @@
+from . import negative_cache
+from .conftest import LocalMockReader, FailingMockReader
+
+
+def test_not_found_is_remembered(db, client, failing_reader_installed):
+    response = client.get('/readers/mock/1')
+    assert response.status_code == 400
+    response = client.get('/readers/mock/1')
+    assert response.status_code == 400
+    assert FailingMockReader.calls == 1
+    assert negative_cache.get_failure(LocalMockReader.IRI_PREFIX + '1')[0] \
+        == negative_cache.NOT_FOUND
+    response = client.get('/readers/mock/2')
+    assert response.status_code == 200
+    metrics = negative_cache.get_metrics()
+    assert metrics[negative_cache.NOT_FOUND] == 1
+    assert metrics[negative_cache.UPSTREAM_ERROR] == 0
+
+
+def test_missing_record_is_remembered(client, failing_reader_installed):
+    # A reader that returns nothing instead of raising NotFoundError
+    response = client.get('/readers/mock/none1')
+    assert response.status_code == 400
+    assert negative_cache.get_failure(LocalMockReader.IRI_PREFIX + 'none1')[0] \
+        == negative_cache.NOT_FOUND
+
+
+def test_upstream_error_is_remembered(client, failing_reader_installed):
+    response = client.get('/readers/mock/error1')
+    assert response.status_code == 400
+    assert 'Catalog unavailable' in response.content.decode()
+    response = client.get('/readers/mock/error1')
+    assert 'Catalog unavailable' in response.content.decode()
+    assert FailingMockReader.calls == 1
+    metrics = negative_cache.get_metrics()
+    assert metrics[negative_cache.UPSTREAM_ERROR] == 1
+    assert metrics['hits'] == 1
+    assert metrics['misses'] == 1
+
+
+def test_failure_timeouts(client, failing_reader_installed, settings):
+    settings.RECORD_NOT_FOUND_CACHE_TIMEOUT = 0
+    settings.RECORD_ERROR_CACHE_TIMEOUT = 0
+    client.get('/readers/mock/1')
+    client.get('/readers/mock/1')
+    assert FailingMockReader.calls == 2
+
+
+def test_force_reload_bypasses_cache(client, failing_reader_installed):
+    client.get('/readers/mock/error1')
+    client.get('/readers/mock/error1', headers={'Force-Reload': 'true'})
+    assert FailingMockReader.calls == 2
@@ -0,0 +1,121 @@
+"""Sparse fieldsets for the views that return records. Instead of all
+properties and field nodes of each record, clients can request only some
+`edpoprec` properties, either by name with the `fields` query parameter or
+as a named profile with the `profile` query parameter. The properties that
+identify a record are always included."""
+from typing import Iterable, Optional
+
+from edpop_explorer import BibliographicalRecord, BiographicalRecord
+from rdflib import Graph, RDF
+from rdflib.term import Node, URIRef
+from rest_framework.exceptions import ParseError
+from rest_framework.request import Request
+
+from triplestore.constants import EDPOPREC
+from triplestore.utils import sparql_multivalues
+
+# Properties that are included in every projection
+IDENTIFYING_PROPERTIES = (
+    RDF.type, EDPOPREC.fromCatalog, EDPOPREC.identifier, EDPOPREC.publicURL,
+)
+
+SUMMARY_PROFILE = 'summary'
+
+# Named projections; the summary holds what lists of records show, and is
+# also kept for every stored record (see `catalogs.summaries`)
+PROFILES = {
+    SUMMARY_PROFILE: (
+        EDPOPREC.title, EDPOPREC.contributor, EDPOPREC.dating,
+        EDPOPREC.placeOfPublication, EDPOPREC.name, EDPOPREC.timespan,
+        EDPOPREC.placeOfActivity,
+    ),
+}
+
+
+def _record_properties() -> dict[str, URIRef]:
+    properties = {}
+    for record_class in (BibliographicalRecord, BiographicalRecord):
+        for _, prop, _ in record_class(None)._fields:
+            properties[str(prop)[len(str(EDPOPREC)):]] = prop
+    return properties
+
+
+# The properties that can be requested by name
+RECORD_PROPERTIES = _record_properties()
+
+
+def parse_projection(
+        fields: Optional[str], profile: Optional[str]
+) -> Optional[list[URIRef]]:
+    """Return the properties that were requested with a comma-separated
+    list of `fields` and/or a `profile`, or `None` if neither is given,
+    which means all properties. Raise `ValueError` if a field or profile
+    does not exist."""
+    if fields is None and profile is None:
+        return None
+    properties = list(IDENTIFYING_PROPERTIES)
+    if profile is not None:
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile: {profile}")
+        properties.extend(PROFILES[profile])
+    for field in (fields or '').split(','):
+        field = field.strip()
+        if not field:
+            continue
+        if field not in RECORD_PROPERTIES:
+            raise ValueError(f"Unknown field: {field}")
+        properties.append(RECORD_PROPERTIES[field])
+    return list(dict.fromkeys(properties))
+
+
+def get_projection(request: Request) -> Optional[list[URIRef]]:
+    """Return the properties requested with the `fields` and `profile`
+    query parameters (see `parse_projection`)."""
+    try:
+        return parse_projection(
+            request.query_params.get('fields'),
+            request.query_params.get('profile'),
+        )
+    except ValueError as e:
+        raise ParseError(str(e))
+
+
+def is_summary(request: Request) -> bool:
+    """Return whether exactly the summary profile was requested."""
+    return request.query_params.get('profile') == SUMMARY_PROFILE and \
+        not request.query_params.get('fields')
+
+
+def property_values(
+        variable: str, properties: Optional[Iterable[URIRef]]
+) -> str:
+    """Return a SPARQL VALUES clause that restricts `variable` to the
+    properties, or nothing if all properties are requested."""
+    if properties is None:
+        return ''
+    return f'values {variable} {{ {sparql_multivalues(properties)} }}'
+
+
+def project_graph(
+        graph: Graph, records: Iterable[Node],
+        properties: Optional[Iterable[URIRef]],
+) -> Graph:
+    """Return the part of a graph with the given properties of the records
+    and their field nodes. Other triples, such as those of the collection
+    of search results, are kept as they are."""
+    if properties is None:
+        return graph
+    properties = set(properties)
+    records = set(records)
+    projected = Graph()
+    dropped = set()
+    for s, p, o in graph:
+        if s in records and p not in properties:
+            dropped.add(o)
+    for s, p, o in graph:
+        if s in records:
+            if p in properties:
+                projected.add((s, p, o))
+        elif s not in dropped:
+            projected.add((s, p, o))
+    return projected
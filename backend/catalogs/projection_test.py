@@ -0,0 +1,60 @@
+import pytest
+from edpop_explorer import Field
+from rdflib import RDF, URIRef
+
+from triplestore.constants import EDPOPREC
+from .graphs_test import MockReader
+from .projection import parse_projection, project_graph, PROFILES, \
+    IDENTIFYING_PROPERTIES
+from .triplestore import save_to_triplestore, get_stored_records
+
+
+def record_with_fields(identifier: str):
+    record = MockReader.get_by_id(identifier)
+    record.title = Field('Emblemata')
+    record.place_of_publication = Field('Antwerpen')
+    return record
+
+
+def test_parse_projection():
+    assert parse_projection(None, None) is None
+    summary = parse_projection(None, 'summary')
+    assert set(summary) == set(IDENTIFYING_PROPERTIES) | set(PROFILES['summary'])
+    fields = parse_projection('title, placeOfPublication', None)
+    assert EDPOPREC.placeOfPublication in fields
+    assert EDPOPREC.dating not in fields
+    with pytest.raises(ValueError):
+        parse_projection('originalData', None)
+    with pytest.raises(ValueError):
+        parse_projection(None, 'everything')
+
+
+def test_project_graph():
+    record = record_with_fields('1')
+    graph = record.to_graph()
+    projected = project_graph(graph, [record.subject_node],
+                              parse_projection('title', None))
+    title = projected.value(record.subject_node, EDPOPREC.title)
+    assert projected.value(title, EDPOPREC.originalText) is not None
+    assert projected.value(record.subject_node, RDF.type) is not None
+    assert projected.value(record.subject_node, EDPOPREC.placeOfPublication) is None
+    assert len(projected) < len(graph)
+
+
+def test_get_stored_records_projected(db, triplestore):
+    record = record_with_fields('1')
+    save_to_triplestore(record.to_graph(), [record.subject_node])
+    uri = URIRef(record.iri)
+    full = get_stored_records([uri])
+    titles = get_stored_records([uri], parse_projection('title', None))
+    assert (uri, EDPOPREC.placeOfPublication, None) in full
+    assert (uri, EDPOPREC.placeOfPublication, None) not in titles
+    title = titles.value(uri, EDPOPREC.title)
+    assert titles.value(title, EDPOPREC.originalText) is not None
+
+
+def test_record_view_fields(db, client, triplestore, local_mockreader_installed):
+    response = client.get('/readers/mock/1', {'fields': 'title'})
+    assert response.status_code == 200
+    response = client.get('/readers/mock/1', {'fields': 'nonsense'})
+    assert response.status_code == 400
@@ -0,0 +1,63 @@
+"""Retention policies for records that are stored in the triplestore but
+that are not in any collection."""
+from typing import Optional
+import datetime as dt
+
+from django.conf import settings
+from rdflib import URIRef
+
+DEFAULT_POLICY = 'default'
+
+
+class RetentionPolicy:
+    """Determine how long an unused record is kept after it was last
+    uploaded or opened. Records that were opened at least
+    `frequent_accesses` times are kept for `frequent_max_idle` instead of
+    `max_idle`."""
+    max_idle: dt.timedelta
+    frequent_accesses: int
+    frequent_max_idle: dt.timedelta
+
+    def __init__(
+            self,
+            max_idle: dt.timedelta = dt.timedelta(weeks=2),
+            frequent_accesses: int = 5,
+            frequent_max_idle: dt.timedelta = dt.timedelta(weeks=8),
+    ):
+        self.max_idle = max_idle
+        self.frequent_accesses = frequent_accesses
+        self.frequent_max_idle = frequent_max_idle
+
+    def cutoffs(
+            self, until: Optional[dt.date] = None
+    ) -> tuple[dt.date, dt.date]:
+        """Return the dates before which infrequently and frequently opened
+        records, respectively, were last used if they may be forgotten.
+
+        If `until` is given, it replaces the cutoff for infrequently opened
+        records; the cutoff for frequently opened records shifts along."""
+        if until is None:
+            until = dt.date.today() - self.max_idle
+        return until, until - (self.frequent_max_idle - self.max_idle)
+
+
+def get_catalog_policies(setting: str, policy_class: type) -> dict:
+    """Instantiate `policy_class` for every catalog configured in the given
+    setting, which is a dict of keyword arguments by catalog URI. The
+    `DEFAULT_POLICY` key applies to all other catalogs; catalog-specific
+    arguments override the default ones."""
+    configured = getattr(settings, setting, {})
+    default_kwargs = configured.get(DEFAULT_POLICY, {})
+    policies = {DEFAULT_POLICY: policy_class(**default_kwargs)}
+    for catalog, kwargs in configured.items():
+        if catalog != DEFAULT_POLICY:
+            policies[URIRef(catalog)] = policy_class(
+                **{**default_kwargs, **kwargs}
+            )
+    return policies
+
+
+def get_retention_policies() -> dict[str, RetentionPolicy]:
+    """Return the retention policies configured in `RECORD_RETENTION` by
+    catalog URI."""
+    return get_catalog_policies('RECORD_RETENTION', RetentionPolicy)
@@ -0,0 +1,178 @@
+"""Local full-text index over the records that are stored in the triplestore
+and over the bodies of annotations, kept in PostgreSQL (see
+`IndexedDocument`). Records are indexed whenever they are saved to the
+triplestore and annotations whenever they are written, so that stored
+records can be searched like a catalog without querying the triplestore."""
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, Max, Q, QuerySet
+from rdflib import Graph, Literal, RDF, URIRef
+from rdflib.term import Node
+
+from catalogs.models import IndexedDocument
+from triplestore.constants import EDPOPREC
+from triplestore.utils import replace_blank_node
+
+# Properties of which the text weighs heaviest in the ranking
+TITLE_PROPERTIES = (EDPOPREC.title, EDPOPREC.alternativeTitle, EDPOPREC.name)
+
+# Properties that do not hold text that users search for
+UNINDEXED_PROPERTIES = (
+    RDF.type, EDPOPREC.fromCatalog, EDPOPREC.publicURL, EDPOPREC.originalData,
+)
+
+# Subfields of fields that hold the text of the field
+TEXT_SUBFIELDS = (EDPOPREC.originalText, EDPOPREC.summaryText)
+
+
+def _field_texts(graph: Graph, value: Node) -> list[str]:
+    if isinstance(value, Literal):
+        return [str(value)]
+    return list(dict.fromkeys(
+        str(text) for subfield in TEXT_SUBFIELDS
+        for text in graph.objects(value, subfield)
+    ))
+
+
+def record_text(graph: Graph, record: Node) -> tuple[str, str]:
+    """Return the title text and the other text of a record in a graph."""
+    title = []
+    text = []
+    for prop, value in graph.predicate_objects(record):
+        if prop in UNINDEXED_PROPERTIES:
+            continue
+        target = title if prop in TITLE_PROPERTIES else text
+        target.extend(_field_texts(graph, value))
+    return '\n'.join(title), '\n'.join(text)
+
+
+def _update_vectors(documents: QuerySet) -> None:
+    config = settings.SEARCH_INDEX_CONFIG
+    documents.update(search_vector=(
+        SearchVector('title', weight='A', config=config) +
+        SearchVector('text', weight='B', config=config)
+    ))
+
+
+def index_records(graph: Graph, records: Iterable[Node]) -> None:
+    """Add records to the index, or update them. `graph` holds the records
+    as they are saved to the triplestore."""
+    documents = []
+    for record in records:
+        uri = str(replace_blank_node(record))
+        title, text = record_text(graph, record)
+        documents.append(IndexedDocument(
+            uri=uri, kind=IndexedDocument.RECORD, record=uri,
+            title=title, text=text,
+        ))
+    if not documents:
+        return
+    IndexedDocument.objects.bulk_create(
+        documents, update_conflicts=True, unique_fields=['uri'],
+        update_fields=['title', 'text'],
+    )
+    _update_vectors(IndexedDocument.objects.filter(
+        uri__in=[document.uri for document in documents]
+    ))
+
+
+def unindex_records(records: Iterable[Node]) -> None:
+    """Remove records from the index. Their annotations remain indexed."""
+    IndexedDocument.objects.filter(
+        kind=IndexedDocument.RECORD, uri__in=[str(r) for r in records],
+    ).delete()
+
+
+def index_annotations(
+        annotations: Iterable[tuple[URIRef, Node, Node, Node]]
+) -> None:
+    """Add annotations to the index, or update them. Each annotation is given
+    with the record it annotates, its project and its body."""
+    documents = [
+        IndexedDocument(
+            uri=str(annotation), kind=IndexedDocument.ANNOTATION,
+            record=str(record), project=str(project), text=str(body),
+        )
+        for annotation, record, project, body in annotations
+    ]
+    if not documents:
+        return
+    IndexedDocument.objects.bulk_create(
+        documents, update_conflicts=True, unique_fields=['uri'],
+        update_fields=['kind', 'record', 'project', 'text'],
+    )
+    _update_vectors(IndexedDocument.objects.filter(
+        uri__in=[document.uri for document in documents]
+    ))
+
+
+def index_annotation(
+        annotation: URIRef, record: Node, project: Node, body: Node
+) -> None:
+    """Add an annotation to the index, or update it."""
+    index_annotations([(annotation, record, project, body)])
+
+
+def update_annotation_text(annotation: URIRef, body: Node) -> None:
+    """Update the indexed body of an annotation."""
+    documents = IndexedDocument.objects.filter(uri=str(annotation))
+    documents.update(text=str(body))
+    _update_vectors(documents)
+
+
+def unindex_annotation(annotation: URIRef) -> None:
+    """Remove an annotation from the index."""
+    IndexedDocument.objects.filter(uri=str(annotation)).delete()
+
+
+def unindex_project_annotations(project: Node) -> None:
+    """Remove all annotations of a project from the index."""
+    IndexedDocument.objects.filter(
+        kind=IndexedDocument.ANNOTATION, project=str(project),
+    ).delete()
+
+
+def search(
+        query: str,
+        projects: Iterable[str],
+        records: Optional[Iterable[str]] = None,
+        start: int = 0,
+        end: Optional[int] = None,
+) -> tuple[list[URIRef], int]:
+    """Search the index. A record matches if its own text matches the query,
+    or the body of one of its annotations in one of the given `projects`.
+    If `records` is given, only those records are searched. Up to
+    `SEARCH_SCOPE_MAX_RECORDS` records are passed to the database; the ranked
+    matches of a search in more records are filtered as they are read.
+
+    Return the URIs of the matching records from `start` to `end`, ranked by
+    relevance, and the total number of matching records."""
+    search_query = SearchQuery(
+        query, search_type='websearch', config=settings.SEARCH_INDEX_CONFIG,
+    )
+    documents = IndexedDocument.objects.filter(search_vector=search_query).filter(
+        Q(kind=IndexedDocument.RECORD) |
+        Q(kind=IndexedDocument.ANNOTATION, project__in=list(projects))
+    )
+    scope = None
+    if records is not None:
+        scope = {str(record) for record in records}
+        if len(scope) <= settings.SEARCH_SCOPE_MAX_RECORDS:
+            documents = documents.filter(record__in=scope)
+            scope = None
+    ranked = documents.values('record').annotate(
+        rank=Max(SearchRank(F('search_vector'), search_query))
+    ).order_by('-rank', 'record')
+    if scope is None:
+        total = ranked.count()
+        page = [row['record'] for row in ranked[start:end]]
+    else:
+        matches = [
+            row['record'] for row in ranked.iterator() if row['record'] in scope
+        ]
+        total = len(matches)
+        page = matches[start:end]
+    return [URIRef(record) for record in page], total
+
@@ -0,0 +1,99 @@
+import datetime as dt
+
+import pytest
+from django.db import connection
+from edpop_explorer import BibliographicalRecord, Field
+from rdflib import Graph, URIRef
+
+from .graphs_test import MockReader
+from .models import IndexedDocument
+from .search_index import record_text, search, index_annotation
+from .triplestore import save_to_triplestore, collect_garbage
+
+# Ranking needs the full-text search of PostgreSQL
+postgres_only = pytest.mark.skipif(
+    connection.vendor != 'postgresql', reason='requires PostgreSQL',
+)
+
+
+def titled_record(identifier: str, title: str, place: str) -> BibliographicalRecord:
+    record = MockReader.get_by_id(identifier)
+    record.title = Field(title)
+    record.place_of_publication = Field(place)
+    return record
+
+
+def save_records(*records: BibliographicalRecord) -> list[URIRef]:
+    graph = sum((record.to_graph() for record in records), Graph())
+    nodes = [record.subject_node for record in records]
+    save_to_triplestore(graph, nodes)
+    return [URIRef(record.iri) for record in records]
+
+
+def test_record_text():
+    record = titled_record('1', 'Emblemata', 'Antwerpen')
+    title, text = record_text(record.to_graph(), record.subject_node)
+    assert title == 'Emblemata'
+    assert 'Antwerpen' in text
+    assert MockReader.IRI_PREFIX not in text
+
+
+def test_records_are_indexed_when_saved(db, triplestore):
+    [uri] = save_records(titled_record('1', 'Emblemata', 'Antwerpen'))
+    document = IndexedDocument.objects.get(uri=str(uri))
+    assert document.kind == IndexedDocument.RECORD
+    assert document.title == 'Emblemata'
+    save_records(titled_record('1', 'Emblemata nova', 'Antwerpen'))
+    assert IndexedDocument.objects.get(uri=str(uri)).title == 'Emblemata nova'
+
+
+def test_long_record_iri_is_indexed(db, triplestore):
+    # E.g. a record of which the identifier is a long search query
+    [uri] = save_records(titled_record('1' + '0' * 1000, 'Emblemata', 'Antwerpen'))
+    assert len(str(uri)) > 1000
+    assert IndexedDocument.objects.get(uri=str(uri)).title == 'Emblemata'
+
+
+def test_garbage_is_unindexed(db, triplestore):
+    [uri] = save_records(titled_record('1', 'Emblemata', 'Antwerpen'))
+    collect_garbage(dt.date.today() - dt.timedelta(weeks=1))
+    assert IndexedDocument.objects.filter(uri=str(uri)).exists()
+    collect_garbage(dt.date.today() + dt.timedelta(weeks=1))
+    assert not IndexedDocument.objects.filter(uri=str(uri)).exists()
+
+
+@postgres_only
+def test_search(db, triplestore):
+    emblemata, psalms, bible = save_records(
+        titled_record('1', 'Emblemata', 'Antwerpen'),
+        titled_record('2', 'Psalmen', 'Emblemata Antwerpen'),
+        titled_record('3', 'Biblia', 'Leiden'),
+    )
+    found, total = search('emblemata', projects=[])
+    assert found == [emblemata, psalms]
+    assert total == 2
+    found, total = search('antwerpen', projects=[], records=[str(psalms)])
+    assert found == [psalms]
+
+
+@postgres_only
+def test_search_in_many_records(db, triplestore, settings):
+    settings.SEARCH_SCOPE_MAX_RECORDS = 1
+    emblemata, psalms, bible = save_records(
+        titled_record('1', 'Emblemata', 'Antwerpen'),
+        titled_record('2', 'Psalmen', 'Emblemata Antwerpen'),
+        titled_record('3', 'Biblia', 'Antwerpen'),
+    )
+    scope = [str(psalms), str(bible)]
+    assert search('antwerpen', projects=[], records=scope) == ([psalms, bible], 2)
+    assert search('antwerpen', projects=[], records=scope, start=1) == ([bible], 2)
+
+
+@postgres_only
+def test_search_annotations(db, triplestore):
+    [bible] = save_records(titled_record('3', 'Biblia', 'Leiden'))
+    project = 'https://example.org/projects/1'
+    index_annotation(URIRef('https://example.org/annotations/1'), bible,
+                     URIRef(project), 'Owned by Plantin')
+    assert search('plantin', projects=[project]) == ([bible], 1)
+    assert search('plantin', projects=['https://example.org/projects/2']) == ([], 0)
@@ -0,0 +1,131 @@
+"""Materialized summaries of the records that are stored in the triplestore,
+kept in the database (see `RecordSummary`). A summary holds what lists of
+records show, i.e. the `summary` profile of `catalogs.projection`. Summaries
+are written whenever records are saved to the triplestore, so that lists of
+stored records can be rendered with one indexed query instead of reading
+the records and their fields from the triplestore."""
+from typing import Iterable, Optional
+
+from rdflib import BNode, Graph, Literal, RDF, URIRef
+from rdflib.term import Node
+
+from catalogs.models import RecordSummary
+from triplestore.constants import EDPOPREC
+from triplestore.utils import replace_blank_node
+
+# The record properties that the summary columns hold, by type of record.
+# Other types of records are summarized as bibliographical records.
+SUMMARY_PROPERTIES = {
+    EDPOPREC.BibliographicalRecord: {
+        'title': EDPOPREC.title,
+        'contributors': EDPOPREC.contributor,
+        'dating': EDPOPREC.dating,
+        'places': EDPOPREC.placeOfPublication,
+    },
+    EDPOPREC.BiographicalRecord: {
+        'title': EDPOPREC.name,
+        'dating': EDPOPREC.timespan,
+        'places': EDPOPREC.placeOfActivity,
+    },
+}
+
+# Columns that hold a list of values rather than a single value
+LIST_COLUMNS = ('contributors', 'places')
+
+
+def _properties(record_type: Optional[Node]) -> dict[str, URIRef]:
+    return SUMMARY_PROPERTIES.get(
+        record_type, SUMMARY_PROPERTIES[EDPOPREC.BibliographicalRecord]
+    )
+
+
+def _display_text(graph: Graph, value: Node) -> str:
+    text = graph.value(value, EDPOPREC.summaryText) or \
+        graph.value(value, EDPOPREC.originalText)
+    return str(text if text is not None else value)
+
+
+def summarize_record(graph: Graph, record: Node) -> RecordSummary:
+    """Return the summary of a record in a graph."""
+    types = set(graph.objects(record, RDF.type))
+    # Records may have several types; prefer one that is summarized as such
+    record_type = next(
+        (t for t in SUMMARY_PROPERTIES if t in types), min(types, default=None)
+    )
+    summary = RecordSummary(
+        uri=str(replace_blank_node(record)),
+        record_type=str(record_type or EDPOPREC.Record),
+        catalog=str(graph.value(record, EDPOPREC.fromCatalog) or ''),
+        identifier=str(graph.value(record, EDPOPREC.identifier) or ''),
+        public_url=str(graph.value(record, EDPOPREC.publicURL) or ''),
+    )
+    for column, prop in _properties(record_type).items():
+        texts = sorted(
+            _display_text(graph, value) for value in graph.objects(record, prop)
+        )
+        if column in LIST_COLUMNS:
+            setattr(summary, column, texts)
+        else:
+            setattr(summary, column, texts[0] if texts else '')
+    return summary
+
+
+def summarize_records(graph: Graph, records: Iterable[Node]) -> list[RecordSummary]:
+    """Write the summaries of records, replacing any previous ones, and
+    return them. `graph` holds the records as they are saved to the
+    triplestore."""
+    summaries = [summarize_record(graph, record) for record in records]
+    if not summaries:
+        return summaries
+    RecordSummary.objects.bulk_create(
+        summaries, update_conflicts=True, unique_fields=['uri'],
+        update_fields=[
+            'record_type', 'catalog', 'identifier', 'public_url', 'title',
+            'contributors', 'dating', 'places',
+        ],
+    )
+    return summaries
+
+
+def forget_summaries(records: Iterable[Node]) -> None:
+    """Delete the summaries of records."""
+    RecordSummary.objects.filter(uri__in=[str(r) for r in records]).delete()
+
+
+def _add_field(graph: Graph, record: URIRef, prop: URIRef, text: str) -> None:
+    field = BNode()
+    graph.add((record, prop, field))
+    graph.add((field, RDF.type, EDPOPREC.Field))
+    graph.add((field, EDPOPREC.summaryText, Literal(text)))
+
+
+def summaries_graph(summaries: Iterable[RecordSummary]) -> Graph:
+    """Represent summaries as records with the summarized properties. Each
+    field has the displayed text as its summary text."""
+    graph = Graph()
+    for summary in summaries:
+        record = URIRef(summary.uri)
+        record_type = URIRef(summary.record_type)
+        graph.add((record, RDF.type, record_type))
+        if summary.catalog:
+            graph.add((record, EDPOPREC.fromCatalog, URIRef(summary.catalog)))
+        if summary.identifier:
+            graph.add((record, EDPOPREC.identifier, Literal(summary.identifier)))
+        if summary.public_url:
+            graph.add((record, EDPOPREC.publicURL, Literal(summary.public_url)))
+        for column, prop in _properties(record_type).items():
+            value = getattr(summary, column)
+            texts = value if column in LIST_COLUMNS else [value] if value else []
+            for text in texts:
+                _add_field(graph, record, prop, text)
+    return graph
+
+
+def get_summaries(records: list[URIRef]) -> tuple[Graph, list[URIRef]]:
+    """Get the summaries of the given records in one query. Return a graph
+    of the records that have a summary and the records that have none, e.g.
+    because they were stored before summaries were kept."""
+    summaries = list(RecordSummary.objects.filter(uri__in=[str(r) for r in records]))
+    found = {summary.uri for summary in summaries}
+    missing = [record for record in records if str(record) not in found]
+    return summaries_graph(summaries), missing
@@ -0,0 +1,74 @@
+import datetime as dt
+
+from edpop_explorer import Field
+from rdflib import RDF, URIRef
+
+from triplestore.constants import EDPOPREC
+from .graphs_test import MockReader
+from .models import RecordSummary
+from .summaries import summarize_record, get_summaries
+from .triplestore import save_to_triplestore, collect_garbage, \
+    get_record_summaries
+
+
+def record_with_fields(identifier: str):
+    record = MockReader.get_by_id(identifier)
+    record.title = Field('Emblemata')
+    record.contributors = [Field('Alciato'), Field('Plantin')]
+    record.place_of_publication = Field('Antwerpen')
+    return record
+
+
+def test_summarize_record():
+    record = record_with_fields('1')
+    summary = summarize_record(record.to_graph(), record.subject_node)
+    assert summary.uri == record.iri
+    assert summary.record_type == str(EDPOPREC.Record)
+    assert summary.catalog == str(MockReader.CATALOG_URIREF)
+    assert summary.title == 'Emblemata'
+    assert summary.contributors == ['Alciato', 'Plantin']
+    assert summary.places == ['Antwerpen']
+    assert summary.dating == ''
+
+
+def test_summaries_are_written_when_saved(db, triplestore):
+    record = record_with_fields('1')
+    save_to_triplestore(record.to_graph(), [record.subject_node])
+    assert RecordSummary.objects.get(uri=record.iri).title == 'Emblemata'
+
+    record.title = Field('Emblemata nova')
+    save_to_triplestore(record.to_graph(), [record.subject_node])
+    assert RecordSummary.objects.get(uri=record.iri).title == 'Emblemata nova'
+
+    collect_garbage(dt.date.today() + dt.timedelta(weeks=1))
+    assert not RecordSummary.objects.filter(uri=record.iri).exists()
+
+
+def test_get_summaries(db, triplestore):
+    record = record_with_fields('1')
+    save_to_triplestore(record.to_graph(), [record.subject_node])
+    unknown = URIRef(MockReader.IRI_PREFIX + '2')
+    graph, missing = get_summaries([URIRef(record.iri), unknown])
+    assert missing == [unknown]
+    uri = URIRef(record.iri)
+    assert len(list(graph.objects(uri, EDPOPREC.contributor))) == 2
+    title = graph.value(uri, EDPOPREC.title)
+    assert str(graph.value(title, EDPOPREC.summaryText)) == 'Emblemata'
+
+
+def test_get_record_summaries_without_summary(db, triplestore):
+    # Records that were stored before summaries were kept are read from
+    # the triplestore
+    record = record_with_fields('1')
+    save_to_triplestore(record.to_graph(), [record.subject_node])
+    RecordSummary.objects.all().delete()
+    uri = URIRef(record.iri)
+    graph = get_record_summaries([uri])
+    assert (uri, EDPOPREC.title, None) in graph
+    assert (uri, EDPOPREC.originalData, None) not in graph
+    # The same shape as records that have a summary
+    title = graph.value(uri, EDPOPREC.title)
+    assert set(graph.predicates(title)) == {RDF.type, EDPOPREC.summaryText}
+    summarized = get_record_summaries([uri])
+    assert len(graph) == len(summarized)
+    assert RecordSummary.objects.filter(uri=record.iri).exists()
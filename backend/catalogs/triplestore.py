@@ -1,22 +1,33 @@
 """Functions that deal with adding and updating catalog records in the
 triplestore."""
-from typing import Optional
+from typing import Optional, Callable, Iterator
 from itertools import chain
 import datetime as dt
+import time
 from django.conf import settings
 from edpop_explorer import Record
 from rdf.utils import prune_triples, graph_from_triples
 from rdflib import URIRef, Literal, Graph, Namespace, RDFS
+from rdflib.query import Result
 from rdflib.term import Node
 
+from catalogs.projection import property_values, parse_projection, \
+    SUMMARY_PROFILE
+from catalogs.retention import get_retention_policies, DEFAULT_POLICY
+from catalogs.search_index import index_records, unindex_records
+from catalogs.summaries import summarize_records, forget_summaries, \
+    get_summaries, summaries_graph
+from triplestore.constants import EDPOPREC
 from triplestore.utils import replace_blank_node, \
-    replace_blank_nodes_in_triples, triples_to_quads, sparql_multivalues
+    replace_blank_nodes_in_triples, triples_to_quads, sparql_multivalues, \
+    update_in_batches, batched, Progress
 
 RECORDS_GRAPH_URI = settings.RDF_NAMESPACE_ROOT + "records/"
 RECORDS_GRAPH_IDENTIFIER = URIRef(RECORDS_GRAPH_URI)
 RECORDS_GC_GRAPH_URI = settings.RDF_NAMESPACE_ROOT + "records-gc/"
 RECORDS_GC_GRAPH_IDENTIFIER = URIRef(RECORDS_GC_GRAPH_URI)
 SCHEMA = Namespace('https://schema.org/')
+GARBAGE_NS = {'schema': SCHEMA, 'edpoprec': EDPOPREC}
 
 # When we retrieve records from a catalog, they might be duplicates of records
 # that were retrieved before. The following query gets rid of the duplicates. It
@@ -46,52 +57,239 @@ where {{
 }}
 '''.format
 
-# The following update query identifies and removes records that are not in any
-# collection and that have not been retrieved since the given `cutoff_date`.
-garbage_collect_update = '''
-delete {{
-  graph <{records_graph}> {{
+# Garbage collection removes records that are not in any collection and that
+# have not been retrieved or opened recently. How recently depends on the
+# retention policy of the catalog and on how often the record was opened (see
+# `catalogs.retention`); the policies are passed as a table of cutoff dates.
+# Candidates are selected in pages ordered by upload date (and IRI, to make
+# the order total), so that each page can be deleted in its own, bounded
+# update. The common pattern has the parameters records_graph, gc_graph,
+# cutoff_date (the latest cutoff of all policies), policy_bind and policies.
+garbage_pattern = '''
+  graph <{gc_graph}> {{
+    ?r schema:uploadDate ?d .
+    filter ( ?d < {cutoff_date} )
+    optional {{ ?r schema:upvoteCount ?c }}
+    filter ( !bound(?c) || ?c = 0 )
+    optional {{ ?r schema:lastReviewed ?a }}
+    optional {{ ?r schema:userInteractionCount ?n }}
+  }}
+  optional {{
+    graph <{records_graph}> {{ ?r edpoprec:fromCatalog ?catalog }}
+  }}
+  {policy_bind}
+  values ( ?policy ?until ?frequent ?frequent_until ) {{ {policies} }}
+  filter ( ?d < ?until )
+  filter ( coalesce(?a, ?d) <
+           if(coalesce(?n, 0) >= ?frequent, ?frequent_until, ?until) )
+'''
+
+# Arguments: as garbage_pattern, plus after (a filter for keyset pagination or
+# an empty string) and limit.
+garbage_page_query = f'''
+select ?r ?d
+where {{{{
+  {garbage_pattern}
+  {{after}}
+}}}}
+order by ?d str(?r)
+limit {{limit}}
+'''.format
+
+# Arguments: date, iri.
+garbage_after_filter = '''
+  filter ( ?d > {date} || ( ?d = {date} && str(?r) > {iri} ) )
+'''.format
+
+# Arguments: as garbage_pattern.
+count_garbage_query = f'''
+select (count(distinct ?r) as ?count)
+where {{{{
+  {garbage_pattern}
+}}}}
+'''.format
+
+# Arguments: as garbage_pattern, plus records. The garbage conditions are
+# checked again, because a record may have been added to a collection or
+# opened again since its page was selected.
+garbage_collect_update = f'''
+delete {{{{
+  graph <{{records_graph}}> {{{{
     ?r ?p1 ?o1 .
     ?f ?p2 ?o2 .
-  }}
-  graph <{gc_graph}> {{
+  }}}}
+  graph <{{gc_graph}}> {{{{
     ?r schema:uploadDate ?d ;
-       schema:upvoteCount 0 .
+       schema:upvoteCount ?c ;
+       schema:lastReviewed ?a ;
+       schema:userInteractionCount ?n .
+  }}}}
+}}}}
+where {{{{
+  values ?r {{{{ {{records}} }}}}
+  {garbage_pattern}
+  optional {{{{
+    graph <{{records_graph}}> {{{{
+      {{{{ ?r ?p1 ?o1 . }}}}
+      union
+      {{{{
+        ?r ?pt ?f .
+        filter ( strstarts(str(?f), "bnode:") )
+        ?f ?p2 ?o2 .
+      }}}}
+    }}}}
+  }}}}
+}}}}
+'''.format
+
+# Field nodes are stored with a `bnode:` IRI (see `replace_blank_node`). When
+# a purge or save is interrupted, field nodes can remain in the records graph
+# without any record pointing to them. The following queries find such
+# orphaned field nodes and remove them. Arguments: records_graph, limit.
+orphaned_field_nodes_query = '''
+select distinct ?f
+where {{
+  graph <{records_graph}> {{
+    ?f ?p ?o .
+    filter ( strstarts(str(?f), "bnode:") )
+    filter not exists {{ ?x ?pt ?f }}
   }}
 }}
+limit {limit}
+'''.format
+
+count_orphaned_field_nodes_query = '''
+select (count(distinct ?f) as ?count)
 where {{
-  graph <{gc_graph}> {{
-    {{
-      ?r schema:uploadDate ?d ;
-         schema:upvoteCount 0 .
-    }}
-    union
-    {{
-      ?r schema:uploadDate ?d .
-      filter not exists {{ ?r schema:upvoteCount ?c }}
-    }}
-    filter ( ?d < {cutoff_date} )
+  graph <{records_graph}> {{
+    ?f ?p ?o .
+    filter ( strstarts(str(?f), "bnode:") )
+    filter not exists {{ ?x ?pt ?f }}
   }}
+}}
+'''.format
+
+# Arguments: records_graph, field_nodes. The orphan condition is checked again
+# in case a record started referring to the node in the meantime.
+delete_field_nodes_update = '''
+delete {{
   graph <{records_graph}> {{
-    ?r ?p1 ?o1 ;
-       ?pt ?f .
-    optional {{?f ?p2 ?o2 .}}
+    ?f ?p ?o .
   }}
 }}
+where {{
+  values ?f {{ {field_nodes} }}
+  graph <{records_graph}> {{
+    ?f ?p ?o .
+    filter not exists {{ ?x ?pt ?f }}
+  }}
+}}
+'''.format
+
+# GC graph entries (upload and access dates, access and upvote counts) are
+# dangling if the record they refer to is no longer in the records graph. An
+# upvote count is only dangling if no collection
+# contains the record anymore either. Arguments: records_graph, gc_graph and
+# (for the select query) limit.
+dangling_gc_entries_pattern = '''
+  graph <{gc_graph}> {{
+    ?r ?p ?o .
+    filter ( ?p in (schema:uploadDate, schema:upvoteCount,
+                    schema:lastReviewed, schema:userInteractionCount) )
+  }}
+  filter not exists {{
+    graph <{records_graph}> {{ ?r ?p1 ?o1 }}
+  }}
+  filter ( ?p != schema:upvoteCount || not exists {{
+    graph ?collection {{ ?collection rdfs:member ?r }}
+  }} )
+'''
+
+dangling_gc_entries_query = f'''
+select distinct ?r
+where {{{{
+  {dangling_gc_entries_pattern}
+}}}}
+limit {{limit}}
 '''.format
 
-# Argument: record_uris
+count_dangling_gc_entries_query = f'''
+select (count(distinct ?r) as ?count)
+where {{{{
+  {dangling_gc_entries_pattern}
+}}}}
+'''.format
+
+# Arguments: records_graph, gc_graph, records.
+delete_gc_entries_update = f'''
+delete {{{{
+  graph <{{gc_graph}}> {{{{
+    ?r ?p ?o .
+  }}}}
+}}}}
+where {{{{
+  values ?r {{{{ {{records}} }}}}
+  {dangling_gc_entries_pattern}
+}}}}
+'''.format
+
+# Arguments: record_uris, properties (a VALUES clause for ?p1 or nothing).
+# The objects of the records are their field nodes.
 get_records_query = '''
 construct {{
   ?r ?p1 ?o1.
-  ?f ?p2 ?o2.
+  ?o1 ?p2 ?o2.
 }}
 where {{
   values ?r {{ {record_uris} }}
+  {properties}
   graph ?records_graph {{
-    ?r ?p1 ?o1;
-       ?pt ?f.
-    optional {{?f ?p2 ?o2.}}
+    ?r ?p1 ?o1.
+    optional {{?o1 ?p2 ?o2.}}
+  }}
+}}
+'''.format
+
+# Argument: records, records_graph
+stored_records_query = '''
+select distinct ?r
+where {{
+  values ?r {{ {records} }}
+  graph <{records_graph}> {{
+    ?r a ?type.
+  }}
+}}
+'''.format
+
+# Arguments: gc_graph, after_filter, limit
+stored_records_page_query = '''
+select distinct ?r
+where {{
+  graph <{gc_graph}> {{
+    ?r schema:uploadDate ?d.
+  }}
+  {after_filter}
+}}
+order by str(?r)
+limit {limit}
+'''.format
+
+# Arguments: gc_graph, date, records
+mark_fresh_update = '''
+delete {{
+  graph <{gc_graph}> {{
+    ?r schema:uploadDate ?d.
+  }}
+}}
+insert {{
+  graph <{gc_graph}> {{
+    ?r schema:uploadDate {date}.
+  }}
+}}
+where {{
+  values ?r {{ {records} }}
+  graph <{gc_graph}> {{
+    ?r schema:uploadDate ?d.
   }}
 }}
 '''.format
@@ -108,19 +306,34 @@ def prune_recursively(graph: Graph, subject: Node):
     prune_triples(graph, related_by_subject)
 
 
-def remove_from_triplestore(records: list[Record]) -> None:
-    """Delete given records from triplestore."""
-    store = settings.RDFLIB_STORE
+def _purge(store, records: list[Record]) -> None:
+    """Delete the stored copies of records, without committing."""
     store.update(purge_old_update(
         records_graph=RECORDS_GRAPH_URI,
         gc_graph=RECORDS_GC_GRAPH_URI,
         obsolete_records=' '.join(f'<{x.iri}>' for x in records)
     ), initNs={'schema': SCHEMA})
-    store.commit()
+
+
+def remove_from_triplestore(
+        records: list[Record],
+        atomic: bool = False,
+        progress: Optional[Progress] = None,
+) -> None:
+    """Delete given records from triplestore, in batches of
+    `SPARQL_UPDATE_BATCH_SIZE` records. See `update_in_batches` for `atomic`
+    and `progress`."""
+    store = settings.RDFLIB_STORE
+    update_in_batches(
+        store, records, lambda batch: _purge(store, batch),
+        settings.SPARQL_UPDATE_BATCH_SIZE, atomic, progress,
+    )
 
 
 def save_to_triplestore(content_graph: Graph, records: list[Node]) -> None:
-    """Save the fetched records to triplestore."""
+    """Save the fetched records to triplestore, add them to the local
+    full-text index and write their summaries."""
+    records = list(records)
     # Create an empty named graph to provide the right context
     record_graph = Graph(identifier=RECORDS_GRAPH_IDENTIFIER)
     gc_graph = Graph(identifier=RECORDS_GC_GRAPH_IDENTIFIER)
@@ -137,27 +350,328 @@ def save_to_triplestore(content_graph: Graph, records: list[Node]) -> None:
     quads_gc = ((rec, SCHEMA.uploadDate, now, gc_graph) for rec in records)
     store.addN(chain(quads, quads_gc))
     store.commit()
+    index_records(content_graph, records)
+    summarize_records(content_graph, records)
 
 
-def collect_garbage(until: Optional[dt.date]=None) -> None:
-    """Forget all unused records that were added before `until`.
+GarbageCursor = tuple[Literal, URIRef]
+"""Position in the ordered garbage candidates: upload date and record IRI of
+the last candidate that was handled."""
 
-    `until` defaults to two weeks ago."""
-    if until is None:
-        until = dt.date.today() - dt.timedelta(weeks=2)
+
+def _garbage_parameters(until: Optional[dt.date]) -> dict[str, str]:
+    """Return the parameters of `garbage_pattern` according to the
+    configured retention policies. If `until` is given, it overrides the
+    cutoff of all policies for records that were not opened frequently."""
+    policies = get_retention_policies()
+    rows = []
+    cutoffs = []
+    for key, policy in policies.items():
+        cutoff, frequent_cutoff = policy.cutoffs(until)
+        cutoffs.append(cutoff)
+        rows.append('( {} {} {} {} )'.format(
+            Literal(key).n3() if key == DEFAULT_POLICY else key.n3(),
+            Literal(cutoff).n3(),
+            Literal(policy.frequent_accesses).n3(),
+            Literal(frequent_cutoff).n3(),
+        ))
+    catalogs = [key for key in policies if key != DEFAULT_POLICY]
+    default = Literal(DEFAULT_POLICY).n3()
+    if catalogs:
+        policy_bind = (
+            f'bind ( if(bound(?catalog) && ?catalog in '
+            f'({", ".join(x.n3() for x in catalogs)}), ?catalog, {default}) '
+            f'as ?policy )'
+        )
+    else:
+        policy_bind = f'bind ( {default} as ?policy )'
+    return {
+        'records_graph': RECORDS_GRAPH_URI,
+        'gc_graph': RECORDS_GC_GRAPH_URI,
+        'cutoff_date': Literal(max(cutoffs)).n3(),
+        'policy_bind': policy_bind,
+        'policies': ' '.join(rows),
+    }
+
+
+def count_garbage(until: Optional[dt.date] = None) -> int:
+    """Count the unused records that may be forgotten according to the
+    retention policies. See `collect_garbage` for the meaning of `until`."""
+    store = settings.RDFLIB_STORE
+    return _count(store.query(
+        count_garbage_query(**_garbage_parameters(until)),
+        initNs=GARBAGE_NS,
+    ))
+
+
+def find_garbage(
+        until: Optional[dt.date],
+        limit: int,
+        after: Optional[GarbageCursor] = None,
+) -> list[GarbageCursor]:
+    """Return at most `limit` unused records that may be forgotten, as
+    (upload date, record) pairs ordered by upload date. If `after` is given,
+    start after this position."""
+    after_filter = ''
+    if after is not None:
+        date, iri = after
+        after_filter = garbage_after_filter(
+            date=date.n3(), iri=Literal(str(iri)).n3(),
+        )
+    store = settings.RDFLIB_STORE
+    result = store.query(garbage_page_query(
+        after=after_filter,
+        limit=int(limit),
+        **_garbage_parameters(until),
+    ), initNs=GARBAGE_NS)
+    return [(row.d, row.r) for row in result]
+
+
+def delete_garbage(
+        records: list[URIRef], until: Optional[dt.date]
+) -> list[URIRef]:
+    """Delete the given records, provided that they may still be
+    forgotten. Return the records that were deleted."""
     store = settings.RDFLIB_STORE
     store.update(garbage_collect_update(
+        records=sparql_multivalues(records),
+        **_garbage_parameters(until),
+    ), initNs=GARBAGE_NS)
+    store.commit()
+    kept = find_stored_records(records)
+    deleted = [record for record in records if record not in kept]
+    unindex_records(deleted)
+    forget_summaries(deleted)
+    return deleted
+
+
+def get_upload_date(record: URIRef) -> Optional[dt.date]:
+    """Return the date on which the stored copy of a record was retrieved,
+    or `None` if the record is not tracked for garbage collection."""
+    gc_graph = Graph(
+        store=settings.RDFLIB_STORE, identifier=RECORDS_GC_GRAPH_IDENTIFIER
+    )
+    dates = [d.toPython() for d in gc_graph.objects(record, SCHEMA.uploadDate)]
+    return max(dates, default=None)
+
+
+def find_stored_records(records: list[URIRef]) -> set[URIRef]:
+    """Return which of the given records are stored in the triplestore,
+    querying `SPARQL_UPDATE_BATCH_SIZE` records at a time."""
+    store = settings.RDFLIB_STORE
+    stored = set()
+    for batch in batched(records, settings.SPARQL_UPDATE_BATCH_SIZE):
+        stored.update(row.r for row in store.query(stored_records_query(
+            records=sparql_multivalues(batch),
+            records_graph=RECORDS_GRAPH_URI,
+        )))
+    return stored
+
+
+def save_records_to_triplestore(
+        records: list[Record],
+        progress: Optional[Progress] = None,
+) -> None:
+    """Save freshly fetched records, replacing the stored copies if there
+    are any, in batches of `SPARQL_UPDATE_BATCH_SIZE` records. If given,
+    `progress` is called after every batch."""
+    saved = 0
+    for batch in batched(records, settings.SPARQL_UPDATE_BATCH_SIZE):
+        graph = Graph()
+        for record in batch:
+            graph += record.to_graph()
+        remove_from_triplestore(batch)
+        save_to_triplestore(graph, [URIRef(record.iri) for record in batch])
+        saved += len(batch)
+        if progress:
+            progress(saved, len(records))
+
+
+def iterate_stored_records(page_size: int) -> Iterator[list[URIRef]]:
+    """Iterate over the IRIs of all stored records, `page_size` at a time."""
+    store = settings.RDFLIB_STORE
+    after_filter = ''
+    while True:
+        page = [row.r for row in store.query(stored_records_page_query(
+            gc_graph=RECORDS_GC_GRAPH_URI,
+            after_filter=after_filter,
+            limit=page_size,
+        ), initNs={'schema': SCHEMA})]
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        after_filter = f'filter ( str(?r) > {Literal(str(page[-1])).n3()} )'
+
+
+def mark_records_fresh(records: list[URIRef]) -> None:
+    """Set the upload date of stored records to today, e.g. because they
+    were found to be unchanged in their catalog, in batches of
+    `SPARQL_UPDATE_BATCH_SIZE` records."""
+    store = settings.RDFLIB_STORE
+    today = Literal(dt.date.today()).n3()
+
+    def mark_batch(batch: list[URIRef]) -> None:
+        store.update(mark_fresh_update(
+            gc_graph=RECORDS_GC_GRAPH_URI,
+            date=today,
+            records=sparql_multivalues(batch),
+        ), initNs={'schema': SCHEMA})
+
+    update_in_batches(
+        store, records, mark_batch, settings.SPARQL_UPDATE_BATCH_SIZE,
+    )
+
+
+def replace_in_triplestore(record: Record) -> Graph:
+    """Save a freshly fetched record, replacing the stored copy if there is
+    one. The stored copy is deleted in the same request that saves the new
+    one. Return the graph of the record."""
+    graph = record.to_graph()
+    _purge(settings.RDFLIB_STORE, [record])
+    save_to_triplestore(graph, [URIRef(record.iri)])
+    return graph
+
+
+def collect_garbage(
+        until: Optional[dt.date] = None,
+        page_size: int = 500,
+        deadline: Optional[float] = None,
+        after: Optional[GarbageCursor] = None,
+) -> tuple[int, bool, Optional[GarbageCursor]]:
+    """Forget all unused records that were last retrieved or opened longer
+    ago than their retention policy allows (see `catalogs.retention`).
+
+    If `until` is given, it replaces the policies' cutoff date for records
+    that were not opened frequently. Records are deleted in pages of
+    `page_size`, each in its own update. If `deadline` (a value of
+    `time.monotonic()`) passes, no new page is started. Pass `after` to
+    continue from the cursor returned by an earlier, unfinished run.
+
+    Return the number of deleted records, whether garbage collection
+    finished and the cursor to resume from if it did not."""
+    deleted = 0
+    while deadline is None or time.monotonic() < deadline:
+        page = find_garbage(until, page_size, after)
+        if not page:
+            return deleted, True, None
+        deleted += len(delete_garbage([record for _, record in page], until))
+        after = page[-1]
+    return deleted, False, after
+
+
+def _count(result: Result) -> int:
+    """Return the single count from the result of a counting query."""
+    for row in result:
+        return int(row[0])
+    return 0
+
+
+def count_orphaned_field_nodes() -> int:
+    """Count the field nodes in the records graph that no record refers
+    to."""
+    store = settings.RDFLIB_STORE
+    return _count(store.query(count_orphaned_field_nodes_query(
+        records_graph=RECORDS_GRAPH_URI,
+    )))
+
+
+def find_orphaned_field_nodes(limit: int) -> list[URIRef]:
+    """Return at most `limit` field nodes that no record refers to."""
+    store = settings.RDFLIB_STORE
+    result = store.query(orphaned_field_nodes_query(
+        records_graph=RECORDS_GRAPH_URI,
+        limit=int(limit),
+    ))
+    return [row[0] for row in result]
+
+
+def delete_field_nodes(field_nodes: list[URIRef]) -> None:
+    """Delete the given field nodes, provided that they are still
+    orphaned."""
+    store = settings.RDFLIB_STORE
+    store.update(delete_field_nodes_update(
+        records_graph=RECORDS_GRAPH_URI,
+        field_nodes=sparql_multivalues(field_nodes),
+    ))
+    store.commit()
+
+
+def count_dangling_gc_entries() -> int:
+    """Count the records in the GC graph that are no longer in the records
+    graph."""
+    store = settings.RDFLIB_STORE
+    return _count(store.query(count_dangling_gc_entries_query(
         records_graph=RECORDS_GRAPH_URI,
         gc_graph=RECORDS_GC_GRAPH_URI,
-        cutoff_date=Literal(until).n3(),
-    ), initNs={'schema': SCHEMA})
+    ), initNs={'schema': SCHEMA, 'rdfs': RDFS}))
+
+
+def find_dangling_gc_entries(limit: int) -> list[URIRef]:
+    """Return at most `limit` records with dangling GC graph entries."""
+    store = settings.RDFLIB_STORE
+    result = store.query(dangling_gc_entries_query(
+        records_graph=RECORDS_GRAPH_URI,
+        gc_graph=RECORDS_GC_GRAPH_URI,
+        limit=int(limit),
+    ), initNs={'schema': SCHEMA, 'rdfs': RDFS})
+    return [row[0] for row in result]
+
+
+def delete_gc_entries(records: list[URIRef]) -> None:
+    """Delete the dangling GC graph entries of the given records."""
+    store = settings.RDFLIB_STORE
+    store.update(delete_gc_entries_update(
+        records_graph=RECORDS_GRAPH_URI,
+        gc_graph=RECORDS_GC_GRAPH_URI,
+        records=sparql_multivalues(records),
+    ), initNs={'schema': SCHEMA, 'rdfs': RDFS})
     store.commit()
 
 
-def get_single_record(record_iri: URIRef) -> Graph:
+def delete_in_batches(
+        find: Callable[[int], list[URIRef]],
+        delete: Callable[[list[URIRef]], None],
+        batch_size: int = 500,
+        deadline: Optional[float] = None,
+) -> tuple[int, bool]:
+    """Repeatedly find at most `batch_size` nodes with `find` and remove them
+    with `delete`, until nothing is found or the `deadline` (a value of
+    `time.monotonic()`) has passed. Every batch is committed separately, so
+    that no single update holds the triplestore for long. If `find` returns
+    nodes of the previous batch again, `delete` did not delete them; the
+    deletion then stops rather than finding the same nodes forever.
+
+    Return the number of deleted nodes and whether all nodes were deleted."""
+    deleted = 0
+    previous = set()
+    while deadline is None or time.monotonic() < deadline:
+        batch = find(batch_size)
+        remaining = previous.intersection(batch)
+        if remaining:
+            return deleted - len(remaining), False
+        if not batch:
+            return deleted, True
+        delete(batch)
+        deleted += len(batch)
+        previous = set(batch)
+    return deleted, False
+
+
+def get_stored_records(
+        record_iris: list[URIRef],
+        properties: Optional[list[URIRef]] = None,
+) -> Graph:
+    """Get the stored copies of the given records. If `properties` is
+    given, only get these properties (see `catalogs.projection`)."""
+    if not record_iris:
+        return Graph()
     store = settings.RDFLIB_STORE
-    record_uris = sparql_multivalues([record_iri])
-    query = get_records_query(record_uris=record_uris)
+    record_uris = sparql_multivalues(record_iris)
+    query = get_records_query(
+        record_uris=record_uris,
+        properties=property_values('?p1', properties),
+    )
     triples = store.query(
         query,
         initNs={
@@ -168,3 +682,24 @@ def get_single_record(record_iri: URIRef) -> Graph:
         }
     )
     return graph_from_triples(triples)
+
+
+def get_record_summaries(record_iris: list[URIRef]) -> Graph:
+    """Get the summaries of the given records (see `catalogs.summaries`).
+    Records without a summary, e.g. because they were stored before
+    summaries were kept, are summarized from the triplestore and their
+    summaries are written, so that all records have the same shape."""
+    graph, missing = get_summaries(record_iris)
+    if missing:
+        stored = get_stored_records(
+            missing, parse_projection(None, SUMMARY_PROFILE)
+        )
+        present = [record for record in missing if (record, None, None) in stored]
+        graph += summaries_graph(summarize_records(stored, present))
+    return graph
+
+
+def get_single_record(
+        record_iri: URIRef, properties: Optional[list[URIRef]] = None,
+) -> Graph:
+    return get_stored_records([record_iri], properties)
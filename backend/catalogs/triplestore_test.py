@@ -1,43 +1,17 @@
 import pytest
 import datetime as dt
 
-from edpop_explorer import Record, EDPOPREC, BibliographicalRecord, Field
+from edpop_explorer import EDPOPREC, BibliographicalRecord, Field
 from rdflib import Graph, RDF, URIRef, Literal
 
+from .conftest import record_nodes
 from .graphs_test import MockReader
 from .triplestore import collect_garbage, save_to_triplestore, \
-    remove_from_triplestore, SCHEMA, RECORDS_GC_GRAPH_IDENTIFIER
-from operator import attrgetter
-
-
-@pytest.fixture
-def working_data_records() -> list[Record]:
-    reader = MockReader()
-    reader.fetch(10)
-    record0 = reader.records[0]
-    record1 = reader.records[1]
-    return [record0, record1]
-
-
-@pytest.fixture
-def working_data_graph(working_data_records) -> tuple[list[Record], Graph]:
-    record0, record1 = working_data_records
-    """Create some data to work with, as a list of records (needed for
-    removal) and as a graph."""
-    graph = record0.to_graph() + record1.to_graph()
-    return [record0, record1], graph
-
-
-def record_nodes(record_instances):
-    return map(attrgetter('subject_node'), record_instances)
-
-
-@pytest.fixture
-def working_data_saved(working_data_graph, triplestore):
-    records, graph = working_data_graph
-    nodes = list(record_nodes(records))
-    save_to_triplestore(graph, nodes)
-    return nodes, records, graph
+    remove_from_triplestore, SCHEMA, RECORDS_GC_GRAPH_IDENTIFIER, \
+    RECORDS_GRAPH_URI, count_orphaned_field_nodes, find_orphaned_field_nodes, \
+    delete_field_nodes, count_dangling_gc_entries, find_dangling_gc_entries, \
+    delete_gc_entries, delete_in_batches, count_garbage, find_garbage, \
+    find_stored_records, save_records_to_triplestore
 
 
 def stored_records(triplestore):
@@ -56,7 +30,7 @@ def stored_records_match_tracked_records(triplestore):
     return stored == tracked
 
 
-def test_add_and_remove(working_data_graph, triplestore):
+def test_add_and_remove(db, working_data_graph, triplestore):
     records, graph = working_data_graph
     save_to_triplestore(graph, record_nodes(records))
     assert len(stored_records(triplestore)) == 2
@@ -66,7 +40,7 @@ def test_add_and_remove(working_data_graph, triplestore):
     assert stored_records_match_tracked_records(triplestore)
 
 
-def test_add_and_partial_remove(working_data_graph, triplestore):
+def test_add_and_partial_remove(db, working_data_graph, triplestore):
     records, graph = working_data_graph
     save_to_triplestore(graph, record_nodes(records))
     remove_from_triplestore([records[0]])  # Only remove first record
@@ -77,7 +51,7 @@ def test_add_and_partial_remove(working_data_graph, triplestore):
     assert stored_records_match_tracked_records(triplestore)
 
 
-def test_add_and_partial_remove_with_field(working_data_records, triplestore):
+def test_add_and_partial_remove_with_field(db, working_data_records, triplestore):
     record0, record1 = working_data_records
     assert isinstance(record0, BibliographicalRecord)
     # Add a field, which results in some additional triples with a blank
@@ -143,3 +117,143 @@ def test_gc_remove_obsolete(working_data_saved, triplestore):
     remaining_subjects = stored_records(triplestore)
     assert len(remaining_subjects) == 0
     assert stored_records_match_tracked_records(triplestore)
+
+
+def test_compact_orphaned_field_nodes(db, working_data_records, triplestore):
+    record0, record1 = working_data_records
+    record0.title = Field("title")
+    graph = record0.to_graph() + record1.to_graph()
+    save_to_triplestore(graph, record_nodes(working_data_records))
+    assert count_orphaned_field_nodes() == 0
+    # Simulate an interrupted purge that left the field node behind.
+    triplestore.update(f'''
+        delete where {{
+          graph <{RECORDS_GRAPH_URI}> {{ <{record0.iri}> ?p ?o }}
+        }}
+    ''')
+    assert count_orphaned_field_nodes() == 1
+    deleted, finished = delete_in_batches(
+        find_orphaned_field_nodes, delete_field_nodes, batch_size=1
+    )
+    assert (deleted, finished) == (1, True)
+    assert count_orphaned_field_nodes() == 0
+    assert len(stored_records(triplestore)) == 1
+
+
+def test_compact_dangling_gc_entries(working_data_saved, triplestore):
+    nodes, _, _ = working_data_saved
+    triplestore.update(f'''
+        delete where {{
+          graph <{RECORDS_GRAPH_URI}> {{ <{nodes[0]}> ?p ?o }}
+        }}
+    ''')
+    assert count_dangling_gc_entries() == 1
+    deleted, finished = delete_in_batches(
+        find_dangling_gc_entries, delete_gc_entries
+    )
+    assert (deleted, finished) == (1, True)
+    assert stored_records_match_tracked_records(triplestore)
+
+
+def test_delete_in_batches_budget(working_data_saved):
+    nodes, _, _ = working_data_saved
+    deleted, finished = delete_in_batches(
+        lambda limit: nodes[:limit], lambda batch: None, deadline=0
+    )
+    assert (deleted, finished) == (0, False)
+
+
+def test_delete_in_batches_stops_without_progress(working_data_saved):
+    nodes, _, _ = working_data_saved
+    deleted, finished = delete_in_batches(
+        lambda limit: nodes[:limit], lambda batch: None, batch_size=1
+    )
+    assert (deleted, finished) == (0, False)
+
+
+def test_gc_in_pages(working_data_saved, triplestore):
+    cutoff = dt.date.today() + dt.timedelta(weeks=1)
+    assert count_garbage(cutoff) == 2
+    page = find_garbage(cutoff, 1)
+    assert len(page) == 1
+    next_page = find_garbage(cutoff, 1, after=page[0])
+    assert len(next_page) == 1
+    assert next_page[0] != page[0]
+    assert find_garbage(cutoff, 1, after=next_page[0]) == []
+    deleted, finished, _ = collect_garbage(cutoff, page_size=1)
+    assert (deleted, finished) == (2, True)
+    assert len(stored_records(triplestore)) == 0
+
+
+def test_gc_counts_deleted_records(working_data_saved, monkeypatch):
+    cutoff = dt.date.today() + dt.timedelta(weeks=1)
+    # The records are no longer garbage by the time they are deleted
+    monkeypatch.setattr(
+        'catalogs.triplestore.delete_garbage', lambda records, until: []
+    )
+    deleted, finished, _ = collect_garbage(cutoff, page_size=1)
+    assert (deleted, finished) == (0, True)
+
+
+def test_gc_budget(working_data_saved, triplestore):
+    cutoff = dt.date.today() + dt.timedelta(weeks=1)
+    deleted, finished, _ = collect_garbage(cutoff, deadline=0)
+    assert (deleted, finished) == (0, False)
+    assert len(stored_records(triplestore)) == 2
+
+
+def test_gc_removes_field_nodes(db, working_data_records, triplestore):
+    record0, record1 = working_data_records
+    record0.title = Field("title")
+    graph = record0.to_graph() + record1.to_graph()
+    save_to_triplestore(graph, record_nodes(working_data_records))
+    collect_garbage(dt.date.today() + dt.timedelta(weeks=1))
+    assert len(list(triplestore.triples((None, None, None)))) == 0
+
+
+def test_gc_retain_frequently_opened(working_data_saved, triplestore):
+    cutoff = dt.date.today() + dt.timedelta(weeks=1)
+    nodes, _, _ = working_data_saved
+    chosen = nodes[0]
+    graph = Graph(identifier=RECORDS_GC_GRAPH_IDENTIFIER)
+    triplestore.addN([
+        (chosen, SCHEMA.lastReviewed, Literal(dt.date.today()), graph),
+        (chosen, SCHEMA.userInteractionCount, Literal(5), graph),
+    ])
+    collect_garbage(cutoff)
+    remaining_subjects = stored_records(triplestore)
+    assert remaining_subjects == [chosen]
+    assert stored_records_match_tracked_records(triplestore)
+
+
+def test_gc_catalog_policy(working_data_saved, triplestore, settings):
+    settings.RECORD_RETENTION = {
+        'default': {'max_idle': dt.timedelta(weeks=2)},
+        str(MockReader.CATALOG_URIREF): {'max_idle': dt.timedelta(days=-1)},
+    }
+    assert count_garbage() == 2
+    settings.RECORD_RETENTION = {
+        'default': {'max_idle': dt.timedelta(days=-1)},
+        'http://example.com/other': {'max_idle': dt.timedelta(weeks=2)},
+    }
+    assert count_garbage() == 2
+    settings.RECORD_RETENTION = {
+        'default': {'max_idle': dt.timedelta(days=-1)},
+        str(MockReader.CATALOG_URIREF): {'max_idle': dt.timedelta(weeks=2)},
+    }
+    assert count_garbage() == 0
+    collect_garbage()
+    assert len(stored_records(triplestore)) == 2
+
+
+def test_save_and_find_records(db, working_data_records, triplestore, settings):
+    settings.SPARQL_UPDATE_BATCH_SIZE = 1
+    iris = [URIRef(record.iri) for record in working_data_records]
+    assert find_stored_records(iris) == set()
+    save_records_to_triplestore(working_data_records)
+    assert find_stored_records(iris + [URIRef('http://example.com/other')]) \
+        == set(iris)
+    # Saving again replaces the stored copies
+    save_records_to_triplestore(working_data_records)
+    assert len(stored_records(triplestore)) == 2
+    assert stored_records_match_tracked_records(triplestore)
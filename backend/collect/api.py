@@ -1,8 +1,11 @@
 from urllib.parse import unquote
 from operator import attrgetter
 
+from django.http import StreamingHttpResponse
 from django.http.request import HttpRequest
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.fields import BooleanField
 from rest_framework.parsers import JSONParser
 from rest_framework.viewsets import ModelViewSet, ViewSetMixin
 from rest_framework.views import APIView, Request
@@ -21,47 +24,74 @@ from collect.blank_record import create_blank_record
 from triplestore.constants import EDPOPCOL, EDPOPREC, AS
 from triplestore.utils import sparql_multivalues
 from projects.api import user_projects
-from catalogs.triplestore import RECORDS_GRAPH_IDENTIFIER, save_to_triplestore
-from collect.rdf_models import EDPOPCollection
-from collect.utils import collection_exists, collection_graph, collection_uri
-from collect.serializers import CollectionSerializer, check_user_project_authorization
+from catalogs.projection import get_projection, property_values, is_summary
+from catalogs.triplestore import RECORDS_GRAPH_IDENTIFIER, save_to_triplestore, \
+    get_record_summaries
+from collect.rdf_models import EDPOPCollection, add_records_to_collections, \
+    get_record_collections, sync_membership_index, add_members_of_collections
+from collect.utils import collection_exists, collection_graph, collection_uri, \
+    collection_page, records_graph, collection_records
+from collect.serializers import CollectionSerializer, \
+    check_user_project_authorization, check_user_project_read_authorization
 from collect.permissions import CollectionPermission
+from collect.facets import get_facets, facet_filters, parse_facet_filters, \
+    get_collection_size
+from collect.export import EXPORT_FORMATS, export_collection
+from collect.importing import parse_record_list, import_records
+from collect.jobs import start_job, get_job
+from collect.refreshing import refresh_collection
 
 get_uri = attrgetter('uri')
 
+# The number of members of each collection is counted in a grouped subquery,
+# so that the members themselves need not be transferred.
 collections_query = '''
 construct {{
   ?collection ?property ?value.
+  ?collection as:totalItems ?total.
 }}
 where {{
-  values ?project {{ {} }}
+  values ?project {{ {0} }}
   graph ?collection {{
     ?collection a edpopcol:Collection ;
                 as:context ?project ;
                 ?property ?value .
     filter ( ?property != rdfs:member )
   }}
+  {{
+    select ?collection (count(?member) as ?total)
+    where {{
+      values ?project {{ {0} }}
+      graph ?collection {{
+        ?collection a edpopcol:Collection ;
+                    as:context ?project .
+        optional {{ ?collection rdfs:member ?member }}
+      }}
+    }}
+    group by ?collection
+  }}
 }}
 '''.format
 
+# The objects of the records are their field nodes
 collection_records_query = '''
-construct {
+construct {{
   ?record ?p ?o .
-  ?field ?p2 ?o2 .
-}
-where {
-  graph ?collection {
+  ?o ?p2 ?o2 .
+}}
+where {{
+  graph ?collection {{
     ?collection rdfs:member ?record .
-  }
-  graph ?records {
+  }}
+  {properties}
+  graph ?records {{
     ?record ?p ?o.
-    optional {
-      ?record ?f ?field .
-      ?field ?p2 ?o2 .
-    }
-  }
-}
-'''
+    optional {{
+      ?o ?p2 ?o2 .
+    }}
+  }}
+}}
+'''.format
 
 
 class CollectionsView(RDFView):
@@ -85,12 +115,16 @@ class CollectionsView(RDFView):
             '@id': 'rdfs:member',
             '@type': '@id',
         },
+        'totalItems': 'as:totalItems',
+        'updated': 'as:updated',
     }
 
     def get_graph(self, request: Request, **kwargs) -> Graph:
         projects = user_projects(request.user)
         project_uris = map(get_uri, projects)
-        project_urirefs = map(URIRef, project_uris)
+        project_urirefs = list(map(URIRef, project_uris))
+        if not project_urirefs:
+            return Graph()
         query = collections_query(sparql_multivalues(project_urirefs))
         store = settings.RDFLIB_STORE
         return graph_from_triples(store.query(query, initNs={
@@ -126,6 +160,7 @@ class CollectionsView(RDFView):
         quads = ((collection, p, o, graph) for p, o in props)
         graph.addN(quads)
         graph.set((collection, RDF.type, EDPOPCOL.Collection))
+        graph.set((collection, AS.updated, Literal(timezone.now())))
         graph.commit()
         return Response(graph, HTTP_201_CREATED)
 
@@ -157,6 +192,7 @@ class CollectionEditView(RDFResourceView):
         override_summary = overrides.value(subject=uri, predicate=AS.summary)
         if override_summary:
             graph.set((uri, AS.summary, override_summary))
+        graph.set((uri, AS.updated, Literal(timezone.now())))
         graph.commit()
         return Response(graph)
 
@@ -167,13 +203,31 @@ class CollectionEditView(RDFResourceView):
         check_user_project_authorization(request.user, existing_project)
         store = settings.RDFLIB_STORE
         store.remove_graph(graph)
+        sync_membership_index(store, [uri])
         store.commit()
         return Response(Graph(), HTTP_204_NO_CONTENT)
 
 
 class CollectionRecordsView(RDFView):
     '''
-    View the records inside a collection
+    View the records inside a collection.
+
+    If the `page_size` query parameter is given, the records are returned in
+    pages, ordered by record URI. Pass the URI of the last record of a page
+    as the `after` query parameter to get the next page; the `Link` header
+    of the response refers to it. The `X-Total-Count` header holds the
+    number of records in the collection that match the filters; it is
+    cached per change to the members of the collection.
+
+    Pass `fields` (a comma-separated list of edpoprec properties) and/or
+    `profile=summary` to get only some properties of the records; see
+    `catalogs.projection`. The summaries are read from the materialized
+    record summaries (see `catalogs.summaries`).
+
+    The records can be filtered by facet values (see
+    `CollectionFacetsView`) with one or more `filter` query parameters of
+    the form `facet:value`. Filtered records are always returned in pages;
+    `page_size` defaults to the maximum.
     '''
 
     renderer_classes = (JsonLdRenderer, TurtleRenderer)
@@ -181,21 +235,130 @@ class CollectionRecordsView(RDFView):
         'rdfs': str(RDFS),
         'edpoprec': str(EDPOPREC),
     }
+    max_page_size = 500
 
-    def get_graph(self, request: Request, collection: str, **kwargs) -> Graph:
-        collection_uri = URIRef(unquote(collection))
-
-        if not collection_exists(collection_uri):
-            raise NotFound('Collection does not exist')
+    def get(self, request: Request, format=None, **kwargs) -> Response:
+        filters = get_facet_filters(request)
+        if 'page_size' not in request.query_params and not filters:
+            return super().get(request, format, **kwargs)
+        try:
+            page_size = int(request.query_params.get(
+                'page_size', self.max_page_size
+            ))
+        except ValueError:
+            raise ParseError('page_size should be a number')
+        if not 0 < page_size <= self.max_page_size:
+            raise ParseError(
+                f'page_size should be between 1 and {self.max_page_size}'
+            )
+        after = request.query_params.get('after')
+        collection_uri = self.get_collection_uri(kwargs['collection'])
+
+        # Fetch one record more than requested to find out if there is a
+        # next page
+        filter_pattern = facet_filters(filters)
+        page = collection_page(collection_uri, page_size + 1, after, filter_pattern)
+        response = Response(self.get_records_graph(request, page[:page_size]))
+        response['X-Total-Count'] = str(
+            get_collection_size(collection_uri, filters)
+        )
+        if len(page) > page_size:
+            params = request.query_params.copy()
+            params['after'] = str(page[page_size - 1])
+            next_url = request.build_absolute_uri('?' + params.urlencode())
+            response['Link'] = f'<{next_url}>; rel="next"'
+        return response
 
+    def get_graph(self, request: Request, collection: str, **kwargs) -> Graph:
+        collection_uri = self.get_collection_uri(collection)
         store = settings.RDFLIB_STORE
-        return graph_from_triples(store.query(collection_records_query, initNs={
+        if is_summary(request):
+            return get_record_summaries(collection_records(collection_uri))
+        query = collection_records_query(
+            properties=property_values('?p', get_projection(request)),
+        )
+        return graph_from_triples(store.query(query, initNs={
             'rdfs': RDFS,
         }, initBindings={
             'collection': collection_uri,
             'records': RECORDS_GRAPH_IDENTIFIER,
         }))
 
+    def get_records_graph(self, request: Request, records: list) -> Graph:
+        if is_summary(request):
+            return get_record_summaries(records)
+        return records_graph(records, get_projection(request))
+
+    def get_collection_uri(self, collection: str) -> URIRef:
+        collection_uri = URIRef(unquote(collection))
+        if not collection_exists(collection_uri):
+            raise NotFound('Collection does not exist')
+        return collection_uri
+
+
+class CollectionFacetsView(APIView):
+    '''
+    Count the records in a collection per value of each of the properties
+    in `COLLECTION_FACETS`. Pass one or more `filter` query parameters of
+    the form `facet:value` to count only the records that have these
+    values; `CollectionRecordsView` accepts the same filters.
+    '''
+
+    def get(self, request: Request, collection: str, **kwargs) -> Response:
+        collection_uri = URIRef(unquote(collection))
+        if not collection_exists(collection_uri):
+            raise NotFound('Collection does not exist')
+        project = collection_graph(collection_uri).value(collection_uri, AS.context)
+        check_user_project_read_authorization(request.user, project)
+        return Response(get_facets(collection_uri, get_facet_filters(request)))
+
+
+class CollectionExportView(APIView):
+    '''
+    Download the records of a collection as a file.
+
+    The `output` query parameter selects the format: `csv` (default), `nt`
+    (N-Triples) or `jsonl` (JSON Lines). Pass `annotations=true` to include
+    the annotations of the records in the project of the collection. The
+    file is streamed while the records are read from the triplestore.
+    '''
+
+    def get(self, request: Request, collection: str, **kwargs):
+        collection_uri = URIRef(unquote(collection))
+        if not collection_exists(collection_uri):
+            raise NotFound('Collection does not exist')
+        project = collection_graph(collection_uri).value(collection_uri, AS.context)
+        check_user_project_read_authorization(request.user, project)
+        export_format = request.query_params.get('output', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            raise ParseError(
+                f'output should be one of: {", ".join(EXPORT_FORMATS)}'
+            )
+        annotations = request.query_params.get('annotations') == 'true'
+        content_type, extension, _ = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            export_collection(collection_uri, export_format, annotations),
+            content_type=content_type,
+        )
+        filename = collection_uri.rstrip('/').rsplit('/', 1)[-1]
+        response['Content-Disposition'] = \
+            f'attachment; filename="{filename}.{extension}"'
+        return response
+
+
+def get_facet_filters(request: Request) -> list:
+    try:
+        return parse_facet_filters(request.query_params.getlist('filter'))
+    except ValueError as e:
+        raise ParseError(str(e))
+
+
+def get_atomic(request: Request) -> bool:
+    '''
+    Parse the `atomic` flag of a request to add or remove records.
+    '''
+    return BooleanField().to_internal_value(request.data.get('atomic', False))
+
 
 class AddRecordsViewSet(ViewSetMixin, APIView):
     def create(self, request, pk=None):
@@ -206,13 +369,12 @@ class AddRecordsViewSet(ViewSetMixin, APIView):
         if not records:
             return Response("No records selected!", status=status.HTTP_400_BAD_REQUEST)
         record_uris = list(map(URIRef, records))
-        response_dict = {}
-        for collection in collections:
-            collection_uri = URIRef(collection)
-            collection_obj = EDPOPCollection(collection_graph(collection_uri), collection_uri)
-            record_counter = collection_obj.add_records(record_uris)
-            response_dict[collection] = record_counter
-        return Response(response_dict)
+        collection_uris = list(map(URIRef, collections))
+        atomic = get_atomic(request)
+        added = add_records_to_collections(collection_uris, record_uris, atomic)
+        return Response({
+            str(collection): count for collection, count in added.items()
+        })
 
 
 class RemoveRecordsViewSet(ViewSetMixin, APIView):
@@ -227,10 +389,142 @@ class RemoveRecordsViewSet(ViewSetMixin, APIView):
         record_uris = list(map(URIRef, records))
         collection_uri = URIRef(collection)
         collection_obj = EDPOPCollection(collection_graph(collection_uri), collection_uri)
-        removed_count = collection_obj.remove_records(record_uris)
+        atomic = get_atomic(request)
+        removed_count = collection_obj.remove_records(record_uris, atomic)
         return Response({collection: removed_count})
 
 
+class CollectionOperationViewSet(ViewSetMixin, APIView):
+    """Base class for operations that add the members of one or more source
+    collections to a target collection on the server."""
+    intersect = False
+
+    def get_sources(self, data) -> list:
+        return data.get('sources') or []
+
+    def create(self, request, pk=None):
+        sources = self.get_sources(request.data)
+        if not sources:
+            return Response("No source collection selected!", status=status.HTTP_400_BAD_REQUEST)
+        target = request.data.get('target')
+        if not target:
+            return Response("No target collection selected!", status=status.HTTP_400_BAD_REQUEST)
+        source_uris = list(map(URIRef, sources))
+        target_uri = URIRef(target)
+        for uri in source_uris + [target_uri]:
+            if not collection_exists(uri):
+                raise NotFound(f'Collection does not exist: {uri}')
+            project = collection_graph(uri).value(uri, AS.context)
+            if uri == target_uri:
+                check_user_project_authorization(request.user, project)
+            else:
+                check_user_project_read_authorization(request.user, project)
+        added = add_members_of_collections(source_uris, target_uri, self.intersect)
+        return Response({target: added})
+
+
+class CopyCollectionViewSet(CollectionOperationViewSet):
+    """POST method to add all records of the `source` collection to the
+    `target` collection."""
+    def get_sources(self, data) -> list:
+        source = data.get('source')
+        return [source] if source else []
+
+
+class MergeCollectionsViewSet(CollectionOperationViewSet):
+    """POST method to add all records of any of the `sources` collections to
+    the `target` collection."""
+
+
+class IntersectCollectionsViewSet(CollectionOperationViewSet):
+    """POST method to add the records that are in all of the `sources`
+    collections to the `target` collection."""
+    intersect = True
+
+
+class ImportRecordsViewSet(ViewSetMixin, APIView):
+    """POST method to import records into a `collection` in the background.
+    The records are given as a list of `records` or as an uploaded `file`,
+    with one record IRI, or reader slug and identifier, per line. Responds
+    with the job, of which the progress can be followed at
+    `collection-jobs/<id>/`."""
+    def create(self, request, pk=None):
+        collection = request.data.get('collection')
+        if not collection:
+            return Response("No collection selected!", status=status.HTTP_400_BAD_REQUEST)
+        collection_uri = URIRef(collection)
+        if not collection_exists(collection_uri):
+            raise NotFound('Collection does not exist')
+        project = collection_graph(collection_uri).value(collection_uri, AS.context)
+        check_user_project_authorization(request.user, project)
+        if 'file' in request.FILES:
+            lines = request.FILES['file'].read().decode('utf-8').splitlines()
+        else:
+            lines = request.data.get('records') or []
+        try:
+            iris = parse_record_list(lines)
+        except ValueError as e:
+            raise ValidationError(str(e))
+        if not iris:
+            return Response("No records selected!", status=status.HTTP_400_BAD_REQUEST)
+        job = start_job('import', request.user, import_records, collection_uri, iris)
+        return Response(job.to_dict(), status=status.HTTP_202_ACCEPTED)
+
+
+class RefreshCollectionViewSet(ViewSetMixin, APIView):
+    """POST method to refetch all records of a `collection` from their
+    catalogs in the background. Optionally, `max_requests` lowers the number
+    of requests that are sent to catalogs at the same time. Responds with
+    the job, of which the progress can be followed at
+    `collection-jobs/<id>/`."""
+    def create(self, request, pk=None):
+        collection = request.data.get('collection')
+        if not collection:
+            return Response("No collection selected!", status=status.HTTP_400_BAD_REQUEST)
+        collection_uri = URIRef(collection)
+        if not collection_exists(collection_uri):
+            raise NotFound('Collection does not exist')
+        project = collection_graph(collection_uri).value(collection_uri, AS.context)
+        check_user_project_authorization(request.user, project)
+        max_requests = settings.RECORD_FETCH_WORKERS
+        if request.data.get('max_requests'):
+            try:
+                max_requests = min(int(request.data['max_requests']), max_requests)
+            except ValueError:
+                raise ValidationError('max_requests should be a number')
+            if max_requests < 1:
+                raise ValidationError('max_requests should be positive')
+        job = start_job('refresh', request.user, refresh_collection,
+                        collection_uri, max_requests)
+        return Response(job.to_dict(), status=status.HTTP_202_ACCEPTED)
+
+
+class CollectionJobView(APIView):
+    """View the progress and outcome of a background job on a collection."""
+
+    def get(self, request: Request, job_id: str, **kwargs) -> Response:
+        job = get_job(job_id, request.user)
+        if job is None:
+            raise NotFound('Job does not exist')
+        return Response(job.to_dict())
+
+
+class RecordCollectionsViewSet(ViewSetMixin, APIView):
+    def create(self, request, pk=None):
+        """POST method to look up which of the user's collections contain
+        each of the given records."""
+        records = request.data.get('records')
+        if not records:
+            return Response("No records selected!", status=status.HTTP_400_BAD_REQUEST)
+        record_uris = map(URIRef, records)
+        project_uris = map(URIRef, map(get_uri, user_projects(request.user)))
+        collections = get_record_collections(record_uris, project_uris)
+        return Response({
+            str(record): list(map(str, record_collections))
+            for record, record_collections in collections.items()
+        })
+
+
 class BlankRecordView(RDFView):
     parser_classes = (JSONParser,)
     renderer_classes = (JsonLdRenderer, TurtleRenderer)
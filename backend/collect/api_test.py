@@ -1,6 +1,8 @@
+import pytest
 import json
 from operator import attrgetter
 
+from django.contrib.auth.models import User
 from django.test import Client
 from rest_framework.status import is_success, is_client_error
 from rdflib import URIRef, RDF, Graph, Literal
@@ -14,6 +16,9 @@ from projects.models import Project
 from collect.rdf_models import EDPOPCollection
 from collect.utils import collection_graph
 from collect.api import CollectionsView
+from collect.importing import import_records
+from collect.jobs import get_job, start_job, wait_for_job
+from collect.models import CollectionJob
 
 
 def example_collection_data(project_uri) -> Dict:
@@ -77,6 +82,25 @@ def test_list_collections(db, user, project, client: Client):
     assert len(response_json) == 1
     assert response_json[0]['uri'] == settings.RDF_NAMESPACE_ROOT + 'collections/my_collection'
     assert response_json[0]['name'] == 'My collection'
+    assert response_json[0]['totalItems'] == 0
+    assert 'updated' in response_json[0]
+
+
+def test_list_collections_member_count(db, user, project, client: Client, saved_records):
+    client.force_login(user)
+    response = post_collection(client, project.uri)
+    collection_uri = URIRef(response.json()['uri'])
+    collection_obj = EDPOPCollection(collection_graph(collection_uri), collection_uri)
+    collection_obj.records = saved_records
+    collection_obj.save()
+
+    response = client.get('/api/collections/')
+    assert is_success(response.status_code)
+    response_json = response.json()
+    response_json = response_json.get('@graph', [response_json])
+    assert len(response_json) == 1
+    assert response_json[0]['totalItems'] == 2
+    assert 'members' not in response_json[0]
 
 
 def collection_detail_url(collection_uri: str) -> str:
@@ -180,6 +204,32 @@ def test_collection_records(db, user, project, client: Client, saved_records):
     assert result.askAnswer
 
 
+def test_collection_records_paginated(db, user, project, client: Client, saved_records):
+    client.force_login(user)
+    create_response = post_collection(client, project.uri)
+    collection_uri = URIRef(create_response.json()['uri'])
+    collection_obj = EDPOPCollection(collection_graph(collection_uri), collection_uri)
+    collection_obj.records = saved_records
+    collection_obj.save()
+
+    records_url = '/api/collection-records/' + str(collection_uri) + '/'
+    response = client.get(records_url, {'page_size': 1})
+    assert is_success(response.status_code)
+    assert response.headers['X-Total-Count'] == '2'
+    g = Graph().parse(response.content, format='json-ld')
+    assert set(g.subjects()) == {saved_records[0]}
+
+    next_url = response.headers['Link'].split(';')[0].strip('<>')
+    response = client.get(next_url)
+    assert is_success(response.status_code)
+    assert 'Link' not in response.headers
+    g = Graph().parse(response.content, format='json-ld')
+    assert set(g.subjects()) == {saved_records[1]}
+
+    response = client.get(records_url, {'page_size': 0})
+    assert is_client_error(response.status_code)
+
+
 def test_add_single_record_preexisting(client, user, records, collection):
     client.force_login(user)
     collection_uri = str(collection.uri)
@@ -241,6 +291,30 @@ def test_remove_records(client, user, records, collection):
     assert collection.records == []
 
 
+def test_remove_records_atomic_flag(client, user, records, collection, monkeypatch):
+    client.force_login(user)
+    collection.save()
+    calls = []
+    monkeypatch.setattr(
+        EDPOPCollection, 'remove_records',
+        lambda self, records, atomic: calls.append(atomic) or 0,
+    )
+    for flag, expected in (('false', False), ('true', True), (False, False)):
+        response = client.post('/api/remove-selection/', data=json.dumps({
+            'records': list(map(str, records)),
+            'collection': str(collection.uri),
+            'atomic': flag,
+        }), content_type='application/json')
+        assert response.status_code == 200
+        assert calls.pop() is expected
+    response = client.post('/api/remove-selection/', data=json.dumps({
+        'records': list(map(str, records)),
+        'collection': str(collection.uri),
+        'atomic': 'sometimes',
+    }), content_type='application/json')
+    assert response.status_code == 400
+
+
 def test_remove_single_record(client, user, records, collection):
     client.force_login(user)
     collection_uri = str(collection.uri)
@@ -259,3 +333,187 @@ def test_remove_single_record(client, user, records, collection):
     assert response.status_code is 200
     collection.refresh_from_store()
     assert collection.records == records[1:]
+
+
+def test_record_collections(client, user, records, collection, collections):
+    client.force_login(user)
+    collection.save()
+    collection.add_records(records[:1])
+    response = client.post('/api/record-collections/',
+        data=json.dumps({'records': list(map(str, records))}),
+        content_type='application/json',
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        str(records[0]): [str(collection.uri)],
+        str(records[1]): [],
+    }
+
+
+def test_record_collections_other_user(client, records, collection):
+    other = User.objects.create(username='other', password='secret')
+    client.force_login(other)
+    collection.save()
+    collection.add_records(records)
+    response = client.post('/api/record-collections/',
+        data=json.dumps({'records': list(map(str, records))}),
+        content_type='application/json',
+    )
+    assert response.json() == {str(record): [] for record in records}
+
+
+def test_merge_collections(client, user, records, collection, collections):
+    client.force_login(user)
+    for c in [collection, *collections]:
+        c.save()
+    collections[0].add_records(records[:1])
+    collections[1].add_records(records)
+    response = client.post('/api/merge-collections/',
+        data=json.dumps({
+            'sources': [str(c.uri) for c in collections],
+            'target': str(collection.uri),
+        }),
+        content_type='application/json',
+    )
+    assert response.status_code == 200
+    assert response.json() == {str(collection.uri): 2}
+
+
+def test_copy_collection_other_user(client, records, collection, collections):
+    other = User.objects.create(username='other', password='secret')
+    client.force_login(other)
+    collection.save()
+    collections[0].save()
+    response = client.post('/api/copy-collection/',
+        data=json.dumps({
+            'source': str(collections[0].uri),
+            'target': str(collection.uri),
+        }),
+        content_type='application/json',
+    )
+    assert is_client_error(response.status_code)
+
+
+def test_collection_export(client, user, collection, saved_records):
+    client.force_login(user)
+    collection.save()
+    collection.add_records(saved_records)
+    response = client.get(
+        f'/api/collection-export/{quote(str(collection.uri))}/',
+        {'output': 'jsonl'},
+    )
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/jsonl'
+    lines = b''.join(response.streaming_content).decode().splitlines()
+    assert [json.loads(line)['uri'] for line in lines] == list(map(str, saved_records))
+
+
+def test_collection_export_unknown_format(client, user, collection):
+    client.force_login(user)
+    collection.save()
+    response = client.get(
+        f'/api/collection-export/{quote(str(collection.uri))}/',
+        {'output': 'xlsx'},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_import_records(client, user, collection, saved_records):
+    client.force_login(user)
+    collection.save()
+    response = client.post('/api/import-records/',
+        data=json.dumps({
+            'collection': str(collection.uri),
+            'records': list(map(str, saved_records)),
+        }),
+        content_type='application/json',
+    )
+    assert response.status_code == 202
+    job_id = response.json()['id']
+    wait_for_job(job_id)
+    response = client.get(f'/api/collection-jobs/{job_id}/')
+    assert response.status_code == 200
+    job = response.json()
+    assert job['state'] == 'done'
+    assert (job['done'], job['total']) == (2, 2)
+    assert job['result']['added'] == 2
+    assert set(collection.records) == set(saved_records)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_collection_job_other_user(client, user, collection, saved_records):
+    collection.save()
+    job = start_job('import', user, import_records, collection.uri, [])
+    wait_for_job(job.id)
+    other = User.objects.create(username='other', password='secret')
+    client.force_login(other)
+    response = client.get(f'/api/collection-jobs/{job.id}/')
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db(transaction=True)
+def test_refresh_collection(client, user, collection, saved_records):
+    client.force_login(user)
+    collection.save()
+    collection.add_records(saved_records)
+    response = client.post('/api/refresh-collection/',
+        data=json.dumps({'collection': str(collection.uri), 'max_requests': 1}),
+        content_type='application/json',
+    )
+    assert response.status_code == 202
+    job_id = response.json()['id']
+    wait_for_job(job_id)
+    job = get_job(job_id, user)
+    assert job.state == 'done'
+    # The test records do not belong to any catalog
+    assert set(job.result['failed']) == set(map(str, saved_records))
+
+
+def test_collection_facets(client, user, collection, saved_records):
+    client.force_login(user)
+    collection.save()
+    collection.add_records(saved_records)
+    response = client.get(f'/api/collection-facets/{quote(str(collection.uri))}/')
+    assert response.status_code == 200
+    assert response.json()['total'] == 2
+    response = client.get(
+        f'/api/collection-facets/{quote(str(collection.uri))}/',
+        {'filter': 'title:Emblemata'},
+    )
+    assert response.status_code == 400
+
+
+def test_collection_records_filtered(client, user, collection, saved_records):
+    client.force_login(user)
+    collection.save()
+    collection.add_records(saved_records)
+    response = client.get(
+        f'/api/collection-records/{quote(str(collection.uri))}/',
+        {'filter': 'placeOfPublication:Leiden'},
+    )
+    assert response.status_code == 200
+    assert response['X-Total-Count'] == '0'
+
+
+def test_collection_records_summary(client, user, collection, saved_records):
+    client.force_login(user)
+    collection.save()
+    collection.add_records(saved_records)
+    url = f'/api/collection-records/{quote(str(collection.uri))}/'
+    response = client.get(url, {'profile': 'summary', 'page_size': 10})
+    assert response.status_code == 200
+    response = client.get(url, {'profile': 'everything'})
+    assert response.status_code == 400
+
+
+def test_collection_job_from_database(client, user):
+    # A job that was started by another process
+    job = CollectionJob.objects.create(
+        kind='import', user=user, state=CollectionJob.RUNNING, done=1, total=2,
+    )
+    client.force_login(user)
+    response = client.get(f'/api/collection-jobs/{job.id}/')
+    assert response.status_code == 200
+    assert response.json()['state'] == 'running'
+    assert (response.json()['done'], response.json()['total']) == (1, 2)
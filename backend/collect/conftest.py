@@ -6,6 +6,8 @@ from rdflib import URIRef, Graph, RDF
 from triplestore.constants import EDPOPREC
 from projects.models import Project
 from projects.rdf_models import RDFProject
+from catalogs.conftest import LocalMockReader, LOCAL_MOCK_FRESHNESS, \
+    readers_installed
 from catalogs.triplestore import save_to_triplestore
 from collect.rdf_models import EDPOPCollection
 from collect.utils import collection_graph, collection_uri
@@ -68,3 +70,10 @@ def saved_records(records):
         record_contents.add((rec, RDF.type, EDPOPREC.BibliographicalRecord))
     save_to_triplestore(record_contents, records)
     return records
+
+
+@pytest.fixture
+def local_mockreader_installed(settings):
+    with readers_installed(settings, [LocalMockReader],
+                           RECORD_FRESHNESS=LOCAL_MOCK_FRESHNESS):
+        yield
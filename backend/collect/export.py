@@ -0,0 +1,174 @@
+'''
+Export the records of a collection as CSV, N-Triples or JSON Lines.
+
+Records are read from the triplestore one page at a time and each format is
+written as an iterator of text chunks, so exports of any size take constant
+memory and can be streamed to the client as they are produced.
+'''
+
+import csv
+import io
+import json
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from edpop_explorer import BibliographicalRecord, BiographicalRecord
+from rdflib import URIRef, Graph, RDF, DCTERMS
+from rdflib.term import Node
+
+from annotations.api import get_records_annotations
+from collect.utils import collection_pages, records_graph, collection_graph
+from triplestore.constants import EDPOPREC, OA, AS
+
+EXPORT_PAGE_SIZE = 500
+
+
+def _local_name(uri: URIRef) -> str:
+    return str(uri)[len(str(EDPOPREC)):]
+
+
+def _record_columns() -> List[Tuple[str, URIRef]]:
+    columns = [
+        ('type', RDF.type),
+        ('catalog', EDPOPREC.fromCatalog),
+        ('identifier', EDPOPREC.identifier),
+        ('link', EDPOPREC.publicURL),
+    ]
+    for record_class in (BibliographicalRecord, BiographicalRecord):
+        for _, prop, _ in record_class(None)._fields:
+            if prop not in (p for _, p in columns):
+                columns.append((_local_name(prop), prop))
+    return columns
+
+
+# Flattened record properties as (column name, predicate), in output order
+RECORD_COLUMNS = _record_columns()
+
+
+class Page(NamedTuple):
+    records: List[URIRef]
+    graph: Graph
+    annotations: Optional[Graph]
+
+
+def annotations_graph(records: List[URIRef], project: URIRef) -> Graph:
+    '''
+    Get the annotations of the given records in a project.
+    '''
+    return get_records_annotations([project], records)
+
+
+def read_pages(
+    collection: URIRef, annotations: bool = False,
+    page_size: int = EXPORT_PAGE_SIZE,
+) -> Iterator[Page]:
+    '''
+    Read the records of a collection, and optionally their annotations in
+    the project of the collection, one page at a time.
+    '''
+    project = collection_graph(collection).value(collection, AS.context)
+    for records in collection_pages(collection, page_size):
+        notes = annotations_graph(records, project) if annotations else None
+        yield Page(records, records_graph(records), notes)
+
+
+def _text(graph: Graph, node: Node) -> str:
+    '''
+    Flatten an object to text: field nodes are represented by their summary
+    text, or otherwise their original text.
+    '''
+    text = graph.value(node, EDPOPREC.summaryText) or \
+        graph.value(node, EDPOPREC.originalText)
+    return str(text if text is not None else node)
+
+
+def flatten_record(graph: Graph, record: URIRef) -> Dict[str, List[str]]:
+    return {
+        column: sorted(_text(graph, value) for value in graph.objects(record, prop))
+        for column, prop in RECORD_COLUMNS
+    }
+
+
+def flatten_annotations(graph: Graph, record: URIRef) -> List[Dict[str, str]]:
+    annotations = []
+    for target in graph.subjects(OA.hasSource, record):
+        for annotation in graph.subjects(OA.hasTarget, target):
+            motivation = graph.value(annotation, OA.motivatedBy, default=OA.commenting)
+            annotations.append({
+                'uri': str(annotation),
+                'motivation': str(motivation)[len(str(OA)):],
+                'body': str(graph.value(annotation, OA.hasBody)),
+                'creator': str(graph.value(annotation, DCTERMS.creator)),
+                'published': str(graph.value(annotation, AS.published)),
+            })
+    return sorted(annotations, key=lambda a: a['published'])
+
+
+def write_ntriples(pages: Iterable[Page], annotations: bool) -> Iterator[str]:
+    for page in pages:
+        graph = page.graph
+        if annotations:
+            graph += page.annotations
+        yield graph.serialize(format='nt')
+
+
+def write_jsonl(pages: Iterable[Page], annotations: bool) -> Iterator[str]:
+    for page in pages:
+        lines = []
+        for record in page.records:
+            data = {'uri': str(record), **flatten_record(page.graph, record)}
+            if annotations:
+                data['annotations'] = flatten_annotations(page.annotations, record)
+            lines.append(json.dumps(data) + '\n')
+        yield ''.join(lines)
+
+
+def write_csv(pages: Iterable[Page], annotations: bool) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    header = ['uri'] + [column for column, _ in RECORD_COLUMNS]
+    if annotations:
+        header.append('annotations')
+    writer.writerow(header)
+    yield flush()
+    for page in pages:
+        for record in page.records:
+            fields = flatten_record(page.graph, record)
+            row = [str(record)] + [' | '.join(fields[column]) for column, _ in RECORD_COLUMNS]
+            if annotations:
+                row.append(' | '.join(
+                    f"{a['motivation']}: {a['body']}"
+                    for a in flatten_annotations(page.annotations, record)
+                ))
+            writer.writerow(row)
+        yield flush()
+
+
+class ExportFormat(NamedTuple):
+    content_type: str
+    extension: str
+    write: Callable[[Iterable[Page], bool], Iterator[str]]
+
+
+EXPORT_FORMATS = {
+    'csv': ExportFormat('text/csv', 'csv', write_csv),
+    'nt': ExportFormat('application/n-triples', 'nt', write_ntriples),
+    'jsonl': ExportFormat('application/jsonl', 'jsonl', write_jsonl),
+}
+
+
+def export_collection(
+    collection: URIRef, export_format: str, annotations: bool = False,
+    page_size: int = EXPORT_PAGE_SIZE,
+) -> Iterator[str]:
+    '''
+    Export the records of a collection in one of `EXPORT_FORMATS`.
+    '''
+    pages = read_pages(collection, annotations, page_size)
+    return EXPORT_FORMATS[export_format].write(pages, annotations)
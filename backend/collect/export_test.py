@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+
+from django.conf import settings
+from rdflib import Graph, BNode, Literal, RDF, URIRef
+
+from annotations.api import annotation_graph_identifier
+from catalogs.triplestore import save_to_triplestore
+from triplestore.constants import EDPOPREC, OA, AS
+from collect.export import export_collection
+
+
+def save_titled_records(records):
+    content = Graph()
+    for number, record in enumerate(records, 1):
+        title = BNode()
+        content.add((record, RDF.type, EDPOPREC.BibliographicalRecord))
+        content.add((record, EDPOPREC.title, title))
+        content.add((title, RDF.type, EDPOPREC.Field))
+        content.add((title, EDPOPREC.originalText, Literal(f'Title {number}')))
+    save_to_triplestore(content, records)
+
+
+def annotate(record, project, body):
+    annotation = URIRef(str(record) + '/annotation')
+    target = BNode()
+    graph = Graph(settings.RDFLIB_STORE, annotation_graph_identifier(project))
+    graph.add((annotation, OA.hasTarget, target))
+    graph.add((annotation, OA.hasBody, Literal(body)))
+    graph.add((annotation, OA.motivatedBy, OA.commenting))
+    graph.add((annotation, AS.context, project))
+    graph.add((target, OA.hasSource, record))
+    graph.commit()
+
+
+def test_export_csv(collection, records):
+    save_titled_records(records)
+    collection.save()
+    collection.add_records(records)
+
+    output = ''.join(export_collection(collection.uri, 'csv', page_size=1))
+    rows = list(csv.DictReader(io.StringIO(output)))
+    assert [row['uri'] for row in rows] == list(map(str, records))
+    assert [row['title'] for row in rows] == ['Title 1', 'Title 2']
+    assert rows[0]['type'] == str(EDPOPREC.BibliographicalRecord)
+
+
+def test_export_jsonl_annotations(rdf_project, collection, records):
+    save_titled_records(records)
+    collection.save()
+    collection.add_records(records)
+    annotate(records[0], rdf_project.uri, 'Interesting')
+
+    output = ''.join(export_collection(collection.uri, 'jsonl', annotations=True))
+    lines = [json.loads(line) for line in output.splitlines()]
+    assert lines[0]['title'] == ['Title 1']
+    assert [a['body'] for a in lines[0]['annotations']] == ['Interesting']
+    assert lines[1]['annotations'] == []
+
+
+def test_export_ntriples(collection, records):
+    save_titled_records(records)
+    collection.save()
+    collection.add_records(records)
+
+    output = ''.join(export_collection(collection.uri, 'nt'))
+    graph = Graph().parse(data=output, format='nt')
+    assert set(graph.subjects(RDF.type, EDPOPREC.BibliographicalRecord)) == set(records)
@@ -0,0 +1,189 @@
+'''
+Facets of the records in a collection: for each of the properties in
+`COLLECTION_FACETS`, the number of members per value of that property.
+
+Facets are counted in the triplestore with a single grouped query, so the
+members are not transferred. They are cached per generation of the
+collection, i.e. per value of its `as:updated`, which is touched whenever
+its members change or when refreshing it changed its records. Other changes
+to stored records are picked up when the cached facets expire.
+Facets can be narrowed down with filters, which select the members that
+have the given value for a property, and the same filters select the pages
+of `CollectionRecordsView`. The number of members that match the filters,
+which is sent with every page, is cached in the same way.
+'''
+
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rdflib import RDFS, Literal, URIRef
+
+from catalogs.triplestore import RECORDS_GRAPH_IDENTIFIER
+from collect.utils import collection_graph, collection_size
+from triplestore.constants import EDPOPREC, AS
+
+CACHE_KEY_PREFIX = 'collection-facets:'
+SIZE_CACHE_KEY_PREFIX = 'collection-size:'
+
+# A (facet, value) pair
+FacetFilter = Tuple[str, str]
+
+# The value of a property of a record is the summary text of its field, or
+# otherwise the original text, or otherwise the object itself.
+facet_value_pattern = '''
+    ?record {property} {field} .
+    optional {{ {field} edpoprec:summaryText {summary} }}
+    optional {{ {field} edpoprec:originalText {original} }}
+'''.format
+
+facet_filter = '''
+  filter exists {{
+    graph {records_graph} {{
+      {value_pattern}
+      filter ( str(coalesce({summary}, {original}, {field})) = {value} )
+    }}
+  }}
+'''.format
+
+facet_counts_query = '''
+select ?property ?value (count(distinct ?record) as ?count)
+where {{
+  values ?property {{ {properties} }}
+  graph {collection} {{
+    {collection} rdfs:member ?record .
+  }}
+  {filters}
+  graph {records_graph} {{
+    {value_pattern}
+  }}
+  bind ( str(coalesce(?summary, ?original, ?field)) as ?value )
+}}
+group by ?property ?value
+'''.format
+
+
+def facet_property(facet: str) -> URIRef:
+    return EDPOPREC[facet]
+
+
+def parse_facet_filters(values: Iterable[str]) -> List[FacetFilter]:
+    '''
+    Parse filters of the form `facet:value`. Raise `ValueError` if a filter
+    does not have this form or refers to a property that is not a facet.
+    '''
+    filters = []
+    for value in values:
+        facet, separator, text = value.partition(':')
+        if not separator:
+            raise ValueError(f'Filter should be of the form facet:value: {value}')
+        if facet not in settings.COLLECTION_FACETS:
+            raise ValueError(f'Not a facet: {facet}')
+        filters.append((facet, text))
+    return filters
+
+
+def facet_filters(filters: Iterable[FacetFilter]) -> str:
+    '''
+    Get a SPARQL pattern that selects the records (`?record`) that match all
+    filters, for use with `collection_page` and `collection_size`.
+    '''
+    patterns = []
+    for n, (facet, value) in enumerate(filters):
+        variables = {
+            'field': f'?filterField{n}',
+            'summary': f'?filterSummary{n}',
+            'original': f'?filterOriginal{n}',
+        }
+        patterns.append(facet_filter(
+            records_graph=RECORDS_GRAPH_IDENTIFIER.n3(),
+            value_pattern=facet_value_pattern(
+                property=facet_property(facet).n3(), **variables,
+            ),
+            value=Literal(value).n3(),
+            **variables,
+        ))
+    return ''.join(patterns)
+
+
+def count_facets(
+    collection: URIRef, filters: Iterable[FacetFilter] = (),
+) -> Dict[str, List[Dict]]:
+    '''
+    Count the members of a collection that match the filters per value of
+    each facet. Values are ordered by descending count.
+    '''
+    facets = {facet: [] for facet in settings.COLLECTION_FACETS}
+    names = {facet_property(facet): facet for facet in facets}
+    if not names:
+        return facets
+    store = settings.RDFLIB_STORE
+    result = store.query(facet_counts_query(
+        properties=' '.join(prop.n3() for prop in names),
+        collection=collection.n3(),
+        filters=facet_filters(filters),
+        records_graph=RECORDS_GRAPH_IDENTIFIER.n3(),
+        value_pattern=facet_value_pattern(
+            property='?property', field='?field', summary='?summary',
+            original='?original',
+        ),
+    ), initNs={'rdfs': RDFS, 'edpoprec': EDPOPREC})
+    for row in result:
+        facets[names[row.property]].append({
+            'value': str(row.value),
+            'count': int(row['count']),
+        })
+    for values in facets.values():
+        values.sort(key=lambda v: (-v['count'], v['value']))
+    return facets
+
+
+def collection_generation(collection: URIRef) -> Optional[str]:
+    '''
+    Get the time of the last change to the members of a collection.
+    '''
+    updated = collection_graph(collection).value(collection, AS.updated)
+    return None if updated is None else str(updated)
+
+
+def _cache_key(
+    prefix: str, collection: URIRef, filters: List[FacetFilter],
+) -> str:
+    generation = repr((str(collection), collection_generation(collection), filters))
+    return prefix + hashlib.sha224(generation.encode()).hexdigest()
+
+
+def get_collection_size(
+    collection: URIRef, filters: Iterable[FacetFilter] = (),
+) -> int:
+    '''
+    Count the members of a collection that match the filters, from the
+    cache if this generation of the collection was counted before, so that
+    paging through a collection does not count its members for every page.
+    '''
+    filters = sorted(filters)
+    key = _cache_key(SIZE_CACHE_KEY_PREFIX, collection, filters)
+    size = cache.get(key)
+    if size is None:
+        size = collection_size(collection, facet_filters(filters))
+        cache.set(key, size, settings.COLLECTION_FACETS_CACHE_TIMEOUT)
+    return size
+
+
+def get_facets(collection: URIRef, filters: Iterable[FacetFilter] = ()) -> Dict:
+    '''
+    Get the number of members of a collection that match the filters and
+    their facets (see `count_facets`), from the cache if this generation of
+    the collection was counted before.
+    '''
+    filters = sorted(filters)
+    key = _cache_key(CACHE_KEY_PREFIX, collection, filters)
+    facets = cache.get(key)
+    if facets is None:
+        facets = {
+            'total': collection_size(collection, facet_filters(filters)),
+            'facets': count_facets(collection, filters),
+        }
+        cache.set(key, facets, settings.COLLECTION_FACETS_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,76 @@
+import pytest
+from rdflib import Graph, BNode, Literal, RDF
+
+from catalogs.triplestore import save_to_triplestore
+from triplestore.constants import EDPOPREC
+from collect.facets import get_facets, parse_facet_filters, facet_filters, \
+    get_collection_size
+from collect.utils import collection_page
+
+
+def save_placed_records(records, places):
+    content = Graph()
+    for record, place in zip(records, places):
+        field = BNode()
+        content.add((record, RDF.type, EDPOPREC.BibliographicalRecord))
+        content.add((record, EDPOPREC.placeOfPublication, field))
+        content.add((field, RDF.type, EDPOPREC.Field))
+        content.add((field, EDPOPREC.originalText, Literal(place)))
+    content.add((records[0], EDPOPREC.language, Literal('Dutch')))
+    save_to_triplestore(content, records)
+
+
+def test_facets(collection, records):
+    save_placed_records(records, ['Antwerpen', 'Leiden'])
+    collection.save()
+    collection.add_records(records)
+
+    facets = get_facets(collection.uri)
+    assert facets['total'] == 2
+    assert facets['facets']['placeOfPublication'] == [
+        {'value': 'Antwerpen', 'count': 1},
+        {'value': 'Leiden', 'count': 1},
+    ]
+    assert facets['facets']['language'] == [{'value': 'Dutch', 'count': 1}]
+    assert facets['facets']['dating'] == []
+
+
+def test_facets_filtered(collection, records):
+    save_placed_records(records, ['Antwerpen', 'Leiden'])
+    collection.save()
+    collection.add_records(records)
+
+    filters = [('placeOfPublication', 'Leiden')]
+    facets = get_facets(collection.uri, filters)
+    assert facets['total'] == 1
+    assert facets['facets']['language'] == []
+    assert collection_page(collection.uri, 10, filters=facet_filters(filters)) \
+        == [records[1]]
+
+
+def test_facets_new_generation(collection, records):
+    save_placed_records(records, ['Antwerpen', 'Leiden'])
+    collection.save()
+    collection.add_records(records[:1])
+    assert get_facets(collection.uri)['total'] == 1
+    collection.add_records(records[1:])
+    assert get_facets(collection.uri)['total'] == 2
+
+
+def test_parse_facet_filters():
+    assert parse_facet_filters(['dating:1650:1700']) == [('dating', '1650:1700')]
+    with pytest.raises(ValueError):
+        parse_facet_filters(['title:Emblemata'])
+    with pytest.raises(ValueError):
+        parse_facet_filters(['dating'])
+
+
+def test_collection_size_new_generation(collection, records):
+    save_placed_records(records, ['Antwerpen', 'Leiden'])
+    collection.save()
+    collection.add_records(records[:1])
+    assert get_collection_size(collection.uri) == 1
+    assert get_collection_size(collection.uri, [('placeOfPublication', 'Leiden')]) == 0
+    collection.add_records(records[1:])
+    assert get_collection_size(collection.uri) == 2
+    assert get_collection_size(collection.uri, [('placeOfPublication', 'Leiden')]) == 1
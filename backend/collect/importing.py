@@ -0,0 +1,90 @@
+"""Importing many records into a collection at once, e.g. from an external
+bibliography. Records that are not stored yet are fetched from their
+catalogs in parallel; see `catalogs.fetching`."""
+from typing import Iterable, Optional
+import re
+
+from rdflib import URIRef, IdentifiedNode
+
+from catalogs.fetching import fetch_records
+from catalogs.graphs import get_reader_by_slug
+from catalogs.triplestore import find_stored_records, save_records_to_triplestore
+from collect.rdf_models import add_records_to_collections
+from triplestore.utils import Progress
+
+# An absolute IRI: a scheme followed by characters that may appear in an IRI
+IRI_PATTERN = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*:[^\s<>"{}|\\^`]+')
+
+
+def parse_record_list(lines: Iterable[str]) -> list[str]:
+    """Read record IRIs from lines of text. Each line holds either the IRI of
+    a record, or the slug of a reader (as in `readers/<slug>/<record>`) and
+    the identifier of a record in its catalog, separated by whitespace.
+    Empty lines and lines starting with `#` are skipped. Raise ValueError if
+    a line holds something else than an absolute IRI or refers to an unknown
+    reader."""
+    iris = []
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        parts = line.split(maxsplit=1)
+        if len(parts) == 1:
+            if not IRI_PATTERN.fullmatch(parts[0]):
+                raise ValueError(f'Line {number}: not a record IRI: {parts[0]}')
+            iris.append(parts[0])
+            continue
+        slug, identifier = parts
+        try:
+            reader = get_reader_by_slug(slug)
+        except KeyError:
+            raise ValueError(f'Line {number}: unknown reader: {slug}')
+        iris.append(reader.identifier_to_iri(identifier))
+    return list(dict.fromkeys(iris))
+
+
+def import_records(
+        collection: IdentifiedNode,
+        iris: Iterable[str],
+        max_requests: Optional[int] = None,
+        progress: Optional[Progress] = None,
+) -> dict:
+    """Add the records with the given IRIs to a collection, fetching those
+    that are not stored yet. See `fetch_records` for `max_requests`. If
+    given, `progress` is called with the number of records that were looked
+    up so far.
+
+    Return a summary with the number of records that were already stored,
+    that were fetched and that were added to the collection, the IRIs of
+    records that could not be found or fetched, and a report per catalog."""
+    iris = list(dict.fromkeys(map(str, iris)))
+    stored = find_stored_records(list(map(URIRef, iris)))
+    missing = [iri for iri in iris if URIRef(iri) not in stored]
+    if progress:
+        progress(len(stored), len(iris))
+
+    def fetch_progress(done: int, total: int) -> None:
+        if progress:
+            progress(len(stored) + done, len(iris))
+
+    fetched = fetch_records(missing, max_requests, fetch_progress)
+    save_records_to_triplestore(list(fetched.records.values()))
+    # A catalog may return a record under another IRI than the one that was
+    # requested, e.g. its canonical IRI; that is the IRI that was saved.
+    available = [
+        URIRef(iri) if URIRef(iri) in stored else URIRef(fetched.records[iri].iri)
+        for iri in iris
+        if URIRef(iri) in stored or iri in fetched.records
+    ]
+    added = add_records_to_collections([collection], available)
+    return {
+        'stored': len(stored),
+        'fetched': len(fetched.records),
+        'added': added[collection],
+        'not_found': fetched.not_found,
+        'failed': fetched.failed,
+        'catalogs': {
+            catalog: report.to_dict()
+            for catalog, report in fetched.catalogs.items()
+        },
+    }
@@ -0,0 +1,54 @@
+import pytest
+from rdflib import URIRef
+
+from catalogs.conftest import LocalMockReader
+from catalogs.triplestore import find_stored_records, save_records_to_triplestore
+from collect.importing import parse_record_list, import_records
+
+PREFIX = LocalMockReader.IRI_PREFIX
+
+
+def test_parse_record_list(local_mockreader_installed):
+    lines = [
+        '# My bibliography',
+        PREFIX + '1',
+        '',
+        'mock 2',
+        '  mock 1  ',
+    ]
+    assert parse_record_list(lines) == [PREFIX + '1', PREFIX + '2']
+    with pytest.raises(ValueError):
+        parse_record_list(['nonexistent 2'])
+    with pytest.raises(ValueError, match='Line 2'):
+        parse_record_list([PREFIX + '1', 'Gulliver'])
+    with pytest.raises(ValueError):
+        parse_record_list(['https://example.org/<1>'])
+
+
+def test_import_records(local_mockreader_installed, collection):
+    collection.save()
+    save_records_to_triplestore([LocalMockReader.get_by_id('1')])
+    iris = [PREFIX + '1', PREFIX + '2', 'https://example.org/unknown']
+    progress = []
+    result = import_records(
+        collection.uri, iris,
+        progress=lambda done, total: progress.append((done, total)),
+    )
+    assert (result['stored'], result['fetched'], result['added']) == (1, 1, 2)
+    assert list(result['failed']) == ['https://example.org/unknown']
+    assert result['catalogs'][str(LocalMockReader.CATALOG_URIREF)]['fetched'] == 1
+    assert progress[0] == (1, 3)
+    assert progress[-1] == (3, 3)
+    assert find_stored_records([URIRef(PREFIX + '2')]) == {URIRef(PREFIX + '2')}
+    assert set(collection.records) == {URIRef(PREFIX + '1'), URIRef(PREFIX + '2')}
+
+
+def test_import_records_under_returned_iri(local_mockreader_installed, collection,
+                                           monkeypatch):
+    # The catalog returns the record under its canonical IRI
+    monkeypatch.setattr(LocalMockReader, 'get_by_iri',
+                        classmethod(lambda cls, iri: cls.get_by_id('4')))
+    collection.save()
+    result = import_records(collection.uri, [PREFIX + 'old/4'])
+    assert result['added'] == 1
+    assert set(collection.records) == {URIRef(PREFIX + '4')}
@@ -0,0 +1,106 @@
+"""Long-running operations on collections, such as importing or refreshing
+many records, run as jobs in background threads. The progress and outcome of
+a job are kept in the database (see `CollectionJob`), so that they can be
+looked up by its ID from any process while it runs and for a while after it
+has finished. A job that was interrupted, e.g. because its process was
+restarted, is not resumed.
+
+Jobs write to the triplestore from their own threads; the store keeps the
+pending edits of every thread apart (see `triplestore.store`)."""
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from collect.models import CollectionJob
+
+logger = logging.getLogger(__name__)
+
+# Number of finished jobs that are remembered
+FINISHED_JOBS_KEPT = 100
+
+# Minimum number of seconds between two writes of the progress of a job
+PROGRESS_INTERVAL = 1.0
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.COLLECTION_JOB_WORKERS,
+    thread_name_prefix='collection-job',
+)
+_lock = threading.Lock()
+# Jobs that run in this process
+_futures: dict[str, Future] = {}
+
+
+def _run(job_id: str, function: Callable, *args, **kwargs) -> None:
+    """Run `function(*args, progress=..., **kwargs)` as the given job. The
+    function should return a JSON-serializable result."""
+    jobs = CollectionJob.objects.filter(id=job_id)
+    jobs.update(state=CollectionJob.RUNNING)
+    last = {'done': 0, 'total': None, 'written': 0.0}
+
+    def progress(done: int, total: int) -> None:
+        last.update(done=done, total=total)
+        now = time.monotonic()
+        if now - last['written'] >= PROGRESS_INTERVAL:
+            last['written'] = now
+            jobs.update(done=done, total=total)
+
+    try:
+        result = function(*args, progress=progress, **kwargs)
+    except Exception as e:
+        logger.exception(f'Job {job_id} failed')
+        outcome = {'state': CollectionJob.FAILED, 'error': str(e)}
+    else:
+        outcome = {'state': CollectionJob.DONE, 'result': result}
+    try:
+        jobs.update(
+            done=last['done'], total=last['total'], finished=timezone.now(),
+            **outcome,
+        )
+    finally:
+        close_old_connections()
+
+
+def _forget_future(job_id: str) -> None:
+    with _lock:
+        _futures.pop(job_id, None)
+
+
+def _forget_finished_jobs() -> None:
+    kept = CollectionJob.objects.filter(finished__isnull=False) \
+        .order_by('-finished').values_list('id', flat=True)[:FINISHED_JOBS_KEPT]
+    CollectionJob.objects.filter(finished__isnull=False) \
+        .exclude(id__in=list(kept)).delete()
+
+
+def start_job(kind: str, user, function: Callable, *args, **kwargs) -> CollectionJob:
+    """Start running `function` as a job on behalf of `user`."""
+    _forget_finished_jobs()
+    job = CollectionJob.objects.create(
+        kind=kind, user=user if user is not None and user.is_authenticated else None,
+    )
+    future = _executor.submit(_run, job.id, function, *args, **kwargs)
+    with _lock:
+        _futures[job.id] = future
+    future.add_done_callback(lambda _: _forget_future(job.id))
+    return job
+
+
+def wait_for_job(job_id: str, timeout: Optional[float] = None) -> None:
+    """Wait until a job that runs in this process has finished."""
+    with _lock:
+        future = _futures.get(job_id)
+    if future is not None:
+        future.result(timeout)
+
+
+def get_job(job_id: str, user) -> Optional[CollectionJob]:
+    """Return a job that was started by `user`, or `None` if there is no
+    such job."""
+    return CollectionJob.objects.filter(id=job_id, user_id=user.id).first()
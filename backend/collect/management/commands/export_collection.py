@@ -0,0 +1,46 @@
+from django.core.management import BaseCommand, CommandError
+from rdflib import URIRef
+
+from collect.export import EXPORT_FORMATS, EXPORT_PAGE_SIZE, export_collection
+from collect.utils import collection_exists
+
+
+class Command(BaseCommand):
+    help = ('Export the records of a collection as CSV, N-Triples or '
+            'JSON Lines.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('collection', help='URI of the collection')
+        parser.add_argument(
+            '--format', choices=list(EXPORT_FORMATS), default='csv',
+            help='Output format (default: csv)',
+        )
+        parser.add_argument(
+            '--annotations', action='store_true',
+            help='Include the annotations of the records in the project of '
+                 'the collection',
+        )
+        parser.add_argument(
+            '--output', default=None,
+            help='File to write to; defaults to standard output',
+        )
+        parser.add_argument(
+            '--page-size', type=int, default=EXPORT_PAGE_SIZE,
+            help=f'Number of records to read per query (default: {EXPORT_PAGE_SIZE})',
+        )
+
+    def handle(self, **options):
+        collection = URIRef(options['collection'])
+        if not collection_exists(collection):
+            raise CommandError(f'Collection does not exist: {collection}')
+        chunks = export_collection(
+            collection, options['format'], options['annotations'],
+            options['page_size'],
+        )
+        if options['output'] is None:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output'], 'w', newline='', encoding='utf-8') as file:
+            for chunk in chunks:
+                file.write(chunk)
@@ -0,0 +1,54 @@
+import sys
+
+from django.core.management import BaseCommand, CommandError
+from rdflib import URIRef
+
+from collect.importing import parse_record_list, import_records
+from collect.utils import collection_exists
+
+
+class Command(BaseCommand):
+    help = ('Add records to a collection from a file with one record IRI, '
+            'or reader slug and record identifier, per line. Records that '
+            'are not stored yet are fetched from their catalogs.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('collection', help='URI of the collection')
+        parser.add_argument(
+            'file', help='File with the records; use - for standard input',
+        )
+        parser.add_argument(
+            '--max-requests', type=int, default=None,
+            help='Maximum number of requests to catalogs at the same time '
+                 '(default: RECORD_FETCH_WORKERS)',
+        )
+
+    def handle(self, **options):
+        collection = URIRef(options['collection'])
+        if not collection_exists(collection):
+            raise CommandError(f'Collection does not exist: {collection}')
+        if options['file'] == '-':
+            lines = sys.stdin.read().splitlines()
+        else:
+            with open(options['file'], encoding='utf-8') as file:
+                lines = file.read().splitlines()
+        try:
+            iris = parse_record_list(lines)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        def progress(done: int, total: int) -> None:
+            self.stdout.write(f'Looked up {done}/{total} records')
+
+        result = import_records(
+            collection, iris, options['max_requests'], progress,
+        )
+        self.stdout.write(
+            f"{result['stored']} records were stored already, "
+            f"{result['fetched']} were fetched; "
+            f"added {result['added']} to the collection."
+        )
+        for iri in result['not_found']:
+            self.stdout.write(f'Not found: {iri}')
+        for iri, message in result['failed'].items():
+            self.stdout.write(f'Failed: {iri}: {message}')
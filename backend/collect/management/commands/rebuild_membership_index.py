@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management import BaseCommand
+from rdflib import RDF
+
+from triplestore.constants import EDPOPCOL
+from collect.rdf_models import sync_membership_index, \
+    unindex_memberships_update, MEMBERSHIP_INDEX_GRAPH_URI, USE_INDEX
+
+
+class Command(BaseCommand):
+    help = ('Bring the index of which collections contain which records up '
+            'to date with the collections in the triplestore.')
+
+    def handle(self, **options):
+        store = settings.RDFLIB_STORE
+        collections = [
+            s for (s, _, _), _ in
+            store.triples((None, RDF.type, EDPOPCOL.Collection))
+        ]
+        # Remove index entries of memberships that no longer exist, including
+        # those of deleted collections
+        store.update(unindex_memberships_update(
+            values='',
+            index_graph=MEMBERSHIP_INDEX_GRAPH_URI,
+        ), initNs=USE_INDEX)
+        store.commit()
+        for number, collection in enumerate(collections, 1):
+            sync_membership_index(store, [collection])
+            store.commit()
+            self.stdout.write(
+                f'Indexed {number}/{len(collections)}: {collection}'
+            )
@@ -0,0 +1,50 @@
+from django.core.management import BaseCommand, CommandError
+from rdflib import URIRef
+
+from collect.refreshing import refresh_collection
+from collect.utils import collection_exists
+
+
+class Command(BaseCommand):
+    help = ('Refetch all records of a collection from their catalogs and '
+            'replace the stored copies that changed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('collection', help='URI of the collection')
+        parser.add_argument(
+            '--max-requests', type=int, default=None,
+            help='Maximum number of requests to catalogs at the same time '
+                 '(default: RECORD_FETCH_WORKERS)',
+        )
+        parser.add_argument(
+            '--page-size', type=int, default=None,
+            help='Number of records to handle at a time '
+                 '(default: SPARQL_UPDATE_BATCH_SIZE)',
+        )
+
+    def handle(self, **options):
+        collection = URIRef(options['collection'])
+        if not collection_exists(collection):
+            raise CommandError(f'Collection does not exist: {collection}')
+
+        def progress(done: int, total: int) -> None:
+            self.stdout.write(f'Refreshed {done}/{total} records')
+
+        result = refresh_collection(
+            collection, options['max_requests'], options['page_size'],
+            progress,
+        )
+        self.stdout.write(
+            f"Updated {result['updated']} records; {result['unchanged']} "
+            f"were unchanged and {result['skipped']} were skipped."
+        )
+        for catalog, report in result['catalogs'].items():
+            throughput = report['throughput']
+            rate = f'{throughput:.1f} records/s' if throughput else 'n/a'
+            self.stdout.write(
+                f"{catalog}: {report['updated']} updated, "
+                f"{report['fetched']} fetched, {report['not_found']} not "
+                f"found, {report['failed']} failed ({rate})"
+            )
+        for iri, message in result['failed'].items():
+            self.stdout.write(f'Failed: {iri}: {message}')
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.29 on 2026-10-19 15:19
+
+import collect.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionJob',
+            fields=[
+                ('id', models.CharField(default=collect.models._job_id, editable=False, max_length=32, primary_key=True, serialize=False)),
+                ('kind', models.CharField(help_text='Kind of operation, e.g. import or refresh', max_length=32)),
+                ('state', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=16)),
+                ('done', models.IntegerField(default=0, help_text='Number of items handled so far')),
+                ('total', models.IntegerField(help_text='Number of items to handle, once known', null=True)),
+                ('result', models.JSONField(help_text='Outcome of the job once it is done', null=True)),
+                ('error', models.TextField(help_text='Why the job failed', null=True)),
+                ('started', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished', models.DateTimeField(db_index=True, null=True)),
+                ('user', models.ForeignKey(help_text='User who started the job', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='collection_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
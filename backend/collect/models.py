@@ -0,0 +1,86 @@
+import uuid
+
+from django.contrib.auth.models import User
+from django.db import models
+from django.utils import timezone
+
+
+def _job_id() -> str:
+    return uuid.uuid4().hex
+
+
+class CollectionJob(models.Model):
+    '''
+    A long-running operation on a collection, such as importing or refreshing
+    many records, that runs in the background (see `collect.jobs`).
+
+    Jobs are kept in the database, so that their progress and outcome can be
+    looked up from any process.
+    '''
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    id = models.CharField(
+        max_length=32,
+        primary_key=True,
+        default=_job_id,
+        editable=False,
+    )
+    kind = models.CharField(
+        max_length=32,
+        help_text='Kind of operation, e.g. import or refresh',
+    )
+    user = models.ForeignKey(
+        to=User,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='collection_jobs',
+        help_text='User who started the job',
+    )
+    state = models.CharField(
+        max_length=16,
+        default=PENDING,
+        choices=[
+            (PENDING, 'Pending'),
+            (RUNNING, 'Running'),
+            (DONE, 'Done'),
+            (FAILED, 'Failed'),
+        ],
+    )
+    done = models.IntegerField(
+        default=0,
+        help_text='Number of items handled so far',
+    )
+    total = models.IntegerField(
+        null=True,
+        help_text='Number of items to handle, once known',
+    )
+    result = models.JSONField(
+        null=True,
+        help_text='Outcome of the job once it is done',
+    )
+    error = models.TextField(
+        null=True,
+        help_text='Why the job failed',
+    )
+    started = models.DateTimeField(default=timezone.now)
+    finished = models.DateTimeField(null=True, db_index=True)
+
+    def __str__(self) -> str:
+        return f'{self.kind} {self.id}'
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'state': self.state,
+            'done': self.done,
+            'total': self.total,
+            'result': self.result,
+            'error': self.error,
+            'started': self.started.isoformat(),
+            'finished': self.finished and self.finished.isoformat(),
+        }
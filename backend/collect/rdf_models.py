@@ -1,8 +1,9 @@
-from typing import Iterable
+from typing import Dict, Iterable, List, Optional
 from django.conf import settings
-from rdflib import RDFS, IdentifiedNode, RDF
+from rdflib import RDFS, IdentifiedNode, RDF, URIRef, DCTERMS
 
-from triplestore.utils import Triples, sparql_multivalues
+from triplestore.utils import Triples, Progress, sparql_multivalues, \
+    update_in_batches, batched
 from triplestore.constants import EDPOPCOL, AS
 from triplestore.rdf_model import RDFModel
 from triplestore.rdf_field import RDFField, RDFUniquePropertyField
@@ -104,8 +105,303 @@ where {{{{
 }}}}
 '''.format
 
+# Parameters: collections. Record the time of the last change to the
+# collections as as:updated.
+touch_collections_update = '''
+delete {{
+  graph ?collection {{ ?collection as:updated ?previous }}
+}}
+insert {{
+  graph ?collection {{ ?collection as:updated ?now }}
+}}
+where {{
+  values ?collection {{ {collections} }}
+  optional {{
+    graph ?collection {{ ?collection as:updated ?previous }}
+  }}
+  bind (now() as ?now)
+}}
+'''.format
+
+# Parameters: collection, records, negation ('' or 'not'). Count how many of
+# the records are (not) members of the collection.
+membership_count_query = '''
+select (count(distinct ?r) as ?count)
+where {{
+  values ?r {{ {records} }}
+  filter {negation} exists {{
+    graph <{collection}> {{ <{collection}> rdfs:member ?r }}
+  }}
+}}
+'''.format
+
+# Parameters: collections, records_pattern. Pairs of collections and records
+# in which the record is not a member of the collection yet. The records are
+# the bindings of ?r in `records_pattern`, which is one of the patterns below.
+new_memberships = '''
+  values ?collection {{ {collections} }}
+  {records_pattern}
+  filter not exists {{
+    graph ?collection {{ ?collection rdfs:member ?r }}
+  }}
+'''.format
+
+# Parameters: records. Patterns that bind ?r to the given records, to the
+# members of any of the given collections (`sources`), or to the members of
+# one collection (`source`); the last one can be repeated to intersect
+# collections.
+given_records = '''
+  values ?r {{ {records} }}
+'''.format
+
+members_of_any = '''
+  values ?source {{ {sources} }}
+  graph ?source {{ ?source rdfs:member ?r }}
+'''.format
+
+members_of = '''
+  graph <{source}> {{ <{source}> rdfs:member ?r }}
+'''.format
+
+# Parameters: new_memberships. Count the records that are not members yet
+# by collection.
+new_memberships_count_query = '''
+select ?collection (count(distinct ?r) as ?added)
+where {{
+  {new_memberships}
+}}
+group by ?collection
+'''.format
+
+# Parameters: new_memberships, gc_graph. Add all records to all
+# collections. The upvote count of each record is adjusted once, by the number
+# of collections it was added to.
+add_records_to_collections_update = '''
+delete {{
+  graph <{gc_graph}> {{ ?r schema:upvoteCount ?count }}
+}}
+insert {{
+  graph <{gc_graph}> {{ ?r schema:upvoteCount ?count_upd }}
+  graph ?collection {{ ?collection rdfs:member ?r }}
+}}
+where {{
+  {new_memberships}
+  {{
+    select ?r (count(distinct ?collection) as ?added)
+    where {{
+      {new_memberships}
+    }}
+    group by ?r
+  }}
+  optional {{
+    graph <{gc_graph}> {{ ?r schema:upvoteCount ?c }}
+  }}
+  bind (if(bound(?c), ?c, 0) as ?count)
+  bind (?count + ?added as ?count_upd)
+}}
+'''.format
+
+# The membership index holds a triple `record dcterms:isPartOf collection` for
+# every member of every collection, so that the collections that contain a
+# record can be found without reading all collections.
+MEMBERSHIP_INDEX_GRAPH_URI = settings.RDF_NAMESPACE_ROOT + 'memberships/'
+MEMBERSHIP_INDEX_GRAPH_IDENTIFIER = URIRef(MEMBERSHIP_INDEX_GRAPH_URI)
+
+# Parameters: values, index_graph. Index the memberships that are not indexed
+# yet, for the collections and records bound in `values`, if any.
+index_memberships_update = '''
+insert {{
+  graph <{index_graph}> {{ ?r dcterms:isPartOf ?collection }}
+}}
+where {{
+  {values}
+  graph ?collection {{
+    ?collection a edpopcol:Collection ;
+                rdfs:member ?r .
+  }}
+}}
+'''.format
+
+# Parameters: values, index_graph. Remove the memberships that no longer
+# exist from the index.
+unindex_memberships_update = '''
+delete {{
+  graph <{index_graph}> {{ ?r dcterms:isPartOf ?collection }}
+}}
+where {{
+  {values}
+  graph <{index_graph}> {{ ?r dcterms:isPartOf ?collection }}
+  filter not exists {{
+    graph ?collection {{ ?collection rdfs:member ?r }}
+  }}
+}}
+'''.format
+
+# Parameters: records, projects, index_graph.
+record_collections_query = '''
+select ?r ?collection
+where {{
+  values ?r {{ {records} }}
+  values ?project {{ {projects} }}
+  graph <{index_graph}> {{ ?r dcterms:isPartOf ?collection }}
+  graph ?collection {{ ?collection as:context ?project }}
+}}
+'''.format
+
 # Common parameter to all store.update calls below.
-USE_SCHEMA = {'schema': SCHEMA}
+USE_SCHEMA = {'schema': SCHEMA, 'as': AS}
+USE_INDEX = {'rdfs': RDFS, 'dcterms': DCTERMS, 'edpopcol': EDPOPCOL}
+
+
+def touch_collections(store, collections: Iterable[IdentifiedNode]) -> None:
+    '''
+    Record that the members of the collections changed, without committing.
+    '''
+    store.update(touch_collections_update(
+        collections=sparql_multivalues(collections),
+    ), initNs=USE_SCHEMA)
+
+
+def sync_membership_index(store, collections=None, records=None) -> None:
+    '''
+    Bring the membership index up to date for the given collections and records, or
+    for all collections and records if they are not given. Does not commit.
+    '''
+    values = ''
+    if collections is not None:
+        values += f'values ?collection {{ {sparql_multivalues(collections)} }}\n'
+    if records is not None:
+        values += f'values ?r {{ {sparql_multivalues(records)} }}\n'
+    for update in (unindex_memberships_update, index_memberships_update):
+        store.update(update(
+            values=values,
+            index_graph=MEMBERSHIP_INDEX_GRAPH_URI,
+        ), initNs=USE_INDEX)
+
+
+def get_record_collections(
+        records: Iterable[IdentifiedNode],
+        projects: Iterable[IdentifiedNode],
+) -> Dict[IdentifiedNode, List[IdentifiedNode]]:
+    '''
+    Look up which collections of the given projects contain each of the records.
+    '''
+    records = list(dict.fromkeys(records))
+    projects = list(projects)
+    collections = {record: [] for record in records}
+    if not projects:
+        return collections
+    store = settings.RDFLIB_STORE
+    for batch in batched(records, settings.SPARQL_UPDATE_BATCH_SIZE):
+        result = store.query(record_collections_query(
+            records=sparql_multivalues(batch),
+            projects=sparql_multivalues(projects),
+            index_graph=MEMBERSHIP_INDEX_GRAPH_URI,
+        ), initNs={'dcterms': DCTERMS, 'as': AS})
+        for row in result:
+            collections[row.r].append(row.collection)
+    return collections
+
+
+def _count_new_memberships(store, collections, records_pattern, added) -> None:
+    '''
+    Count the records bound by `records_pattern` that are not members of the
+    collections yet in `added`.
+    '''
+    memberships = new_memberships(
+        collections=sparql_multivalues(collections),
+        records_pattern=records_pattern,
+    )
+    result = store.query(
+        new_memberships_count_query(new_memberships=memberships),
+        initNs={'rdfs': RDFS},
+    )
+    for row in result:
+        added[row.collection] += int(row.added)
+
+
+def _add_to_collections(store, collections, records_pattern) -> None:
+    '''
+    Add the records bound by `records_pattern` to the collections, without
+    committing.
+    '''
+    memberships = new_memberships(
+        collections=sparql_multivalues(collections),
+        records_pattern=records_pattern,
+    )
+    store.update(add_records_to_collections_update(
+        new_memberships=memberships,
+        gc_graph=RECORDS_GC_GRAPH_URI,
+    ), initNs={**USE_SCHEMA, 'rdfs': RDFS})
+
+
+def add_records_to_collections(
+        collections: Iterable[IdentifiedNode],
+        records: Iterable[IdentifiedNode],
+        atomic: bool = False,
+        progress: Optional[Progress] = None,
+) -> Dict[IdentifiedNode, int]:
+    '''
+    Add records to several collections at once. Each batch of records (see
+    `SPARQL_UPDATE_BATCH_SIZE`) is added to all collections in a single SPARQL update;
+    see `update_in_batches` for `atomic` and `progress`.
+
+    Returns the number of records that were added to each collection, i.e. that were
+    not members of it yet.
+    '''
+    collections = list(collections)
+    added = {collection: 0 for collection in collections}
+    records = list(dict.fromkeys(records))
+    if not collections or not records:
+        return added
+    store = settings.RDFLIB_STORE
+    # Count before updating: a query would send the pending updates
+    for batch in batched(records, settings.SPARQL_UPDATE_BATCH_SIZE):
+        pattern = given_records(records=sparql_multivalues(batch))
+        _count_new_memberships(store, collections, pattern, added)
+
+    def add_batch(batch):
+        pattern = given_records(records=sparql_multivalues(batch))
+        _add_to_collections(store, collections, pattern)
+        sync_membership_index(store, collections, batch)
+
+    # Sent with the first batch, or with all of them if atomic
+    touch_collections(store, collections)
+    update_in_batches(
+        store, records, add_batch, settings.SPARQL_UPDATE_BATCH_SIZE,
+        atomic, progress,
+    )
+    return added
+
+
+def add_members_of_collections(
+        sources: Iterable[IdentifiedNode],
+        target: IdentifiedNode,
+        intersect: bool = False,
+) -> int:
+    '''
+    Add the members of the source collections to the target collection, in a single
+    SPARQL update that does not transfer the members. By default, the members of any
+    of the sources are added (a union); with `intersect`, only the records that are
+    members of all sources are.
+
+    Returns the number of records that were added to the target collection.
+    '''
+    sources = list(dict.fromkeys(sources))
+    if not sources:
+        return 0
+    if intersect:
+        pattern = ''.join(members_of(source=source) for source in sources)
+    else:
+        pattern = members_of_any(sources=sparql_multivalues(sources))
+    store = settings.RDFLIB_STORE
+    added = {target: 0}
+    _count_new_memberships(store, [target], pattern, added)
+    _add_to_collections(store, [target], pattern)
+    sync_membership_index(store, [target])
+    touch_collections(store, [target])
+    store.commit()
+    return added[target]
 
 
 class CollectionMembersField(RDFField):
@@ -113,8 +409,9 @@ class CollectionMembersField(RDFField):
     Field for the records that are contained in an EDPOP collection.
 
     This field class extends the common interface with add and remove
-    operations. These need to execute only one SPARQL update, while the set
-    method needs to execute three.
+    operations. These need to execute only one SPARQL update per batch of
+    records, while the set method needs to execute two. They count the
+    affected records in the triplestore, so the member list is not loaded.
     '''
 
     def get(self, instance: RDFModel):
@@ -128,12 +425,6 @@ class CollectionMembersField(RDFField):
             gc_graph=RECORDS_GC_GRAPH_URI,
         ), initNs=USE_SCHEMA)
 
-    def add(self, instance: RDFModel, value: Iterable[IdentifiedNode]) -> None:
-        g = self.get_graph(instance)
-        store = settings.RDFLIB_STORE
-        self._add(value, store, g)
-        store.commit()
-
     def _remove(self, value, store, g):
         store.update(remove_records_update(
             removed_records=sparql_multivalues(value),
@@ -141,22 +432,82 @@ class CollectionMembersField(RDFField):
             gc_graph=RECORDS_GC_GRAPH_URI,
         ), initNs=USE_SCHEMA)
 
-    def remove(self, instance: RDFModel, value: Iterable[IdentifiedNode]) -> None:
+    def _count(self, value, store, g, negation: str) -> int:
+        result = store.query(membership_count_query(
+            records=sparql_multivalues(value),
+            collection=g.identifier,
+            negation=negation,
+        ), initNs={'rdfs': RDFS})
+        for row in result:
+            return int(row[0])
+        return 0
+
+    def _update_members(self, instance, value, update, negation, atomic, progress):
+        '''
+        Apply `update` (`_add` or `_remove`) to the records in `value` in batches
+        and return the number of records that were affected.
+        '''
+        value = list(dict.fromkeys(value))
+        if not value:
+            return 0
         g = self.get_graph(instance)
         store = settings.RDFLIB_STORE
-        self._remove(value, store, g)
-        store.commit()
+        # Count before updating: a query would send the pending updates
+        affected = sum(
+            self._count(batch, store, g, negation)
+            for batch in batched(value, settings.SPARQL_UPDATE_BATCH_SIZE)
+        )
+
+        def update_batch(batch):
+            update(batch, store, g)
+            sync_membership_index(store, [g.identifier], batch)
+
+        # Sent with the first batch, or with all of them if atomic
+        touch_collections(store, [g.identifier])
+        update_in_batches(
+            store, value, update_batch, settings.SPARQL_UPDATE_BATCH_SIZE,
+            atomic, progress,
+        )
+        instance._values.pop(self.name, None)
+        return affected
+
+    def add(
+            self,
+            instance: RDFModel,
+            value: Iterable[IdentifiedNode],
+            atomic: bool = False,
+            progress: Optional[Progress] = None,
+    ) -> int:
+        '''
+        Add records to the collection. Return the number of records that were not
+        members yet. See `update_in_batches` for `atomic` and `progress`.
+        '''
+        return self._update_members(
+            instance, value, self._add, 'not', atomic, progress
+        )
+
+    def remove(
+            self,
+            instance: RDFModel,
+            value: Iterable[IdentifiedNode],
+            atomic: bool = False,
+            progress: Optional[Progress] = None,
+    ) -> int:
+        '''
+        Remove records from the collection. Return the number of records that were
+        members. See `update_in_batches` for `atomic` and `progress`.
+        '''
+        return self._update_members(
+            instance, value, self._remove, '', atomic, progress
+        )
 
     def set(self, instance: RDFModel, value: Iterable[IdentifiedNode]) -> None:
-        g = self.get_graph(instance)
-        store = settings.RDFLIB_STORE
+        value = list(value)
         existing = set(self.get(instance))
         override = set(value)
-        added = override - existing
-        removed = existing - override
-        self._remove(removed, store, g)
-        self._add(added, store, g)
-        store.commit()
+        self.remove(instance, existing - override)
+        self.add(instance, override - existing)
+        instance._values[self.name] = value
 
     def clear(self, instance: RDFModel) -> None:
         g = self.get_graph(instance)
@@ -165,6 +516,8 @@ class CollectionMembersField(RDFField):
             collection=g.identifier,
             gc_graph=RECORDS_GC_GRAPH_URI,
         ), initNs=USE_SCHEMA)
+        sync_membership_index(store, [g.identifier])
+        touch_collections(store, [g.identifier])
         store.commit()
 
 
@@ -177,17 +530,11 @@ class EDPOPCollection(RDFModel):
     name = RDFUniquePropertyField(AS.name)
     summary = RDFUniquePropertyField(AS.summary)
     project = RDFUniquePropertyField(AS.context)
+    updated = RDFUniquePropertyField(AS.updated)
     records = CollectionMembersField()
 
-    def add_records(self, records):
-        self.__class__.records.add(self, records)
-        added = set(records) - set(self.records)
-        self.records.extend(added)
-        return len(added)
-
-    def remove_records(self, records):
-        initial_size = len(self.records)
-        self.__class__.records.remove(self, records)
-        remaining = set(self.records) - set(records)
-        self.records = list(remaining)
-        return initial_size - len(self.records)
+    def add_records(self, records, atomic=False, progress=None) -> int:
+        return self.__class__.records.add(self, records, atomic, progress)
+
+    def remove_records(self, records, atomic=False, progress=None) -> int:
+        return self.__class__.records.remove(self, records, atomic, progress)
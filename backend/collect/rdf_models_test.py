@@ -1,11 +1,15 @@
 import pytest
-from rdflib import RDF, RDFS, Literal
+from rdflib import RDF, RDFS, Literal, URIRef
+from rdflib.plugins.stores.sparqlstore import SPARQLStore
 from django.conf import settings
 
 from triplestore.constants import AS, EDPOPCOL
+from triplestore.store_test import recording_store
 from catalogs.triplestore import SCHEMA
 
 from .conftest import empty_test_collection
+from .rdf_models import add_records_to_collections, get_record_collections, \
+    add_members_of_collections
 
 
 def test_collection_save_empty(collection):
@@ -56,6 +60,30 @@ def test_collection_add_records(collection, records):
     assert any(store.triples((records[1], SCHEMA.upvoteCount, Literal(1))))
 
 
+def test_collection_membership_counts(collection, records):
+    collection.save()
+    collection.refresh_from_store()
+
+    assert collection.add_records(records[:1]) == 1
+    assert collection.add_records(records) == 1
+    assert collection.add_records(records) == 0
+    assert collection.remove_records(records[1:]) == 1
+    assert collection.remove_records(records[1:]) == 0
+    # The member list was not loaded to count
+    assert 'records' not in collection._values
+    assert collection.records == records[:1]
+
+
+def test_collection_membership_updates_timestamp(collection, records):
+    store = settings.RDFLIB_STORE
+    collection.save()
+    collection.add_records(records)
+    updated = list(store.triples((collection.uri, AS.updated, None)))
+    assert len(updated) == 1
+    collection.remove_records(records)
+    assert len(list(store.triples((collection.uri, AS.updated, None)))) == 1
+
+
 def test_collection_remove_records(collection, records):
     collection.records = records
     collection.save()
@@ -95,3 +123,103 @@ def test_collection_track_multi_gc(rdf_project, collection, collections, records
     assert len(refcounts) == 2
     assert ((records[0], SCHEMA.upvoteCount, Literal(2)), None) in refcounts
     assert ((records[1], SCHEMA.upvoteCount, Literal(0)), None) in refcounts
+
+
+def test_add_records_to_collections(collection, collections, records):
+    all_collections = [collection, *collections]
+    for c in all_collections:
+        c.save()
+    collection.add_records(records[:1])
+
+    uris = [c.uri for c in all_collections]
+    added = add_records_to_collections(uris, records)
+    assert added == {collection.uri: 1, collections[0].uri: 2, collections[1].uri: 2}
+
+    store = settings.RDFLIB_STORE
+    for c in all_collections:
+        c.refresh_from_store()
+        assert set(c.records) == set(records)
+    assert any(store.triples((records[0], SCHEMA.upvoteCount, Literal(3))))
+    assert any(store.triples((records[1], SCHEMA.upvoteCount, Literal(3))))
+    assert len(list(store.triples((None, SCHEMA.upvoteCount, None)))) == 2
+
+    added = add_records_to_collections(uris, records)
+    assert added == {uri: 0 for uri in uris}
+    assert any(store.triples((records[0], SCHEMA.upvoteCount, Literal(3))))
+
+
+def test_add_records_in_batches(collection, collections, records, settings):
+    settings.SPARQL_UPDATE_BATCH_SIZE = 1
+    collection.save()
+    progress = []
+    added = collection.add_records(
+        records, progress=lambda done, total: progress.append(done)
+    )
+    assert added == 2
+    assert progress == [1, 2]
+    assert set(collection.records) == set(records)
+
+    uris = [c.uri for c in collections]
+    added = add_records_to_collections(uris, records, atomic=True)
+    assert added == {uri: 2 for uri in uris}
+    store = settings.RDFLIB_STORE
+    assert any(store.triples((records[0], SCHEMA.upvoteCount, Literal(3))))
+
+    assert collection.remove_records(records) == 2
+    assert collection.records == []
+
+
+def test_atomic_updates_are_sent_at_once(collection, collections, records,
+                                         settings, monkeypatch):
+    uris = [c.uri for c in collections]
+    store, requests = recording_store(monkeypatch)
+    # Counting queries find nothing, but still send pending updates
+    monkeypatch.setattr(SPARQLStore, 'query', lambda *args, **kwargs: [])
+    settings.RDFLIB_STORE = store
+    settings.SPARQL_UPDATE_BATCH_SIZE = 1
+    add_records_to_collections(uris, records + [URIRef('https://example.org/3')],
+                               atomic=True)
+    assert len(requests) == 1
+    collection.add_records(records, atomic=True)
+    assert len(requests) == 2
+    collection.remove_records(records, atomic=True)
+    assert len(requests) == 3
+
+
+def test_membership_index(rdf_project, collection, collections, records):
+    for c in [collection, *collections]:
+        c.save()
+    collection.add_records(records)
+    add_records_to_collections([c.uri for c in collections], records[:1])
+    collections[0].remove_records(records)
+
+    found = get_record_collections(records, [rdf_project.uri])
+    assert set(found[records[0]]) == {collection.uri, collections[1].uri}
+    assert found[records[1]] == [collection.uri]
+    assert get_record_collections(records, []) == {r: [] for r in records}
+
+    collection.delete()
+    found = get_record_collections(records, [rdf_project.uri])
+    assert found == {records[0]: [collections[1].uri], records[1]: []}
+
+
+def test_add_members_of_collections(rdf_project, collection, collections, records):
+    [source1, source2] = collections
+    for c in [collection, source1, source2]:
+        c.save()
+    source1.add_records(records)
+    source2.add_records(records[1:])
+
+    assert add_members_of_collections(
+        [source1.uri, source2.uri], collection.uri, intersect=True) == 1
+    assert collection.records == records[1:]
+    assert add_members_of_collections(
+        [source1.uri, source2.uri], collection.uri) == 1
+    collection.refresh_from_store()
+    assert set(collection.records) == set(records)
+
+    store = settings.RDFLIB_STORE
+    assert any(store.triples((records[0], SCHEMA.upvoteCount, Literal(2))))
+    assert any(store.triples((records[1], SCHEMA.upvoteCount, Literal(3))))
+    found = get_record_collections(records[:1], [rdf_project.uri])
+    assert set(found[records[0]]) == {source1.uri, collection.uri}
@@ -0,0 +1,168 @@
+"""Refreshing the stored copies of all records in a collection from their
+catalogs. The members are handled one page at a time; each page is fetched
+by catalog within the limits of `catalogs.fetching`, and only the records
+that changed in their catalog are written."""
+from typing import Optional
+
+from django.conf import settings
+from rdflib import Graph, URIRef, BNode
+from rdflib.compare import to_isomorphic
+from rdflib.term import Node
+
+from catalogs.fetching import fetch_records
+from catalogs.freshness import get_freshness_policy
+from catalogs.graphs import get_reader_by_record_iri
+from catalogs.triplestore import save_records_to_triplestore, mark_records_fresh
+from collect.rdf_models import touch_collections
+from collect.utils import collection_pages, collection_size, records_graph
+from triplestore.utils import Progress
+
+
+def _is_field_node(node: Node) -> bool:
+    """Return whether a node is a field node of a record: a blank node in a
+    freshly fetched record, or a `bnode:` IRI in a stored copy (see
+    `replace_blank_node`)."""
+    return isinstance(node, BNode) or \
+        (isinstance(node, URIRef) and str(node).startswith('bnode:'))
+
+
+def stored_records_graph(records: list[URIRef]) -> Graph:
+    """Get the stored copies of records with all their field nodes, however
+    deeply they are nested. `records_graph` gets two levels at a time."""
+    graph = records_graph(records)
+    queried = set(records)
+    while True:
+        nested = {
+            node for node in graph.objects()
+            if _is_field_node(node) and node not in queried
+            and (node, None, None) not in graph
+        }
+        if not nested:
+            return graph
+        graph += records_graph(list(nested))
+        queried |= nested
+
+
+def record_signature(graph: Graph, record: Node) -> int:
+    """Return a comparable representation of a record in a graph: a hash of
+    the subgraph of the record and its field nodes, however deeply they are
+    nested. Field nodes are compared as blank nodes, so that a freshly
+    fetched record compares equal to its stored copy, whose fields have been
+    given IRIs."""
+    subgraph = Graph()
+    field_nodes = {}
+
+    def node_value(node: Node) -> Node:
+        if _is_field_node(node):
+            return field_nodes.setdefault(node, BNode())
+        return node
+
+    visited = set()
+    pending = [record]
+    while pending:
+        subject = pending.pop()
+        if subject in visited:
+            continue
+        visited.add(subject)
+        for p, o in graph.predicate_objects(subject):
+            subgraph.add((node_value(subject), p, node_value(o)))
+            if _is_field_node(o):
+                pending.append(o)
+    return to_isomorphic(subgraph).graph_digest()
+
+
+def _refetchable(iri: str) -> bool:
+    """Return whether a record comes from a catalog that it can be fetched
+    from again. Records of unknown catalogs are considered refetchable, so
+    that they are reported as failures."""
+    try:
+        reader = get_reader_by_record_iri(iri)
+    except KeyError:
+        return True
+    policy = get_freshness_policy(reader.CATALOG_URIREF)
+    return policy.soft_ttl is not None or policy.hard_ttl is not None
+
+
+def refresh_collection(
+        collection: URIRef,
+        max_requests: Optional[int] = None,
+        page_size: Optional[int] = None,
+        progress: Optional[Progress] = None,
+) -> dict:
+    """Refetch all records of a collection from their catalogs and replace
+    the stored copies that changed. Unchanged records are marked as fresh.
+    Records of catalogs that are never refetched according to
+    `RECORD_FRESHNESS`, such as blank records, are skipped. If any record
+    was updated, the collection is touched, so that its facets are counted
+    again.
+
+    See `fetch_records` for `max_requests`. Members are handled `page_size`
+    at a time, by default `SPARQL_UPDATE_BATCH_SIZE`. If given, `progress`
+    is called with the number of members that were handled so far.
+
+    Return a summary with the number of records that were updated, were
+    unchanged or were skipped, the IRIs of records that could not be found
+    or fetched, and the number of updated records, fetched records, failures
+    and the throughput per catalog."""
+    page_size = page_size or settings.SPARQL_UPDATE_BATCH_SIZE
+    total = collection_size(collection)
+    handled = 0
+    summary = {
+        'updated': 0,
+        'unchanged': 0,
+        'skipped': 0,
+        'not_found': [],
+        'failed': {},
+        'catalogs': {},
+    }
+
+    def page_progress(done: int, _total: int) -> None:
+        if progress:
+            progress(handled + done, total)
+
+    for page in collection_pages(collection, page_size):
+        iris = [str(record) for record in page if _refetchable(str(record))]
+        summary['skipped'] += len(page) - len(iris)
+        handled += len(page) - len(iris)
+        stored = stored_records_graph(page)
+        fetched = fetch_records(iris, max_requests, page_progress)
+        changed = []
+        unchanged = []
+        for iri, record in fetched.records.items():
+            if record_signature(record.to_graph(), URIRef(record.iri)) == \
+                    record_signature(stored, URIRef(iri)):
+                unchanged.append(URIRef(iri))
+            else:
+                changed.append(record)
+        save_records_to_triplestore(changed)
+        mark_records_fresh(unchanged)
+        handled += len(iris)
+
+        summary['updated'] += len(changed)
+        summary['unchanged'] += len(unchanged)
+        summary['not_found'] += fetched.not_found
+        summary['failed'].update(fetched.failed)
+        updated_by_catalog = {}
+        for record in changed:
+            catalog = str(record.from_reader.CATALOG_URIREF)
+            updated_by_catalog[catalog] = updated_by_catalog.get(catalog, 0) + 1
+        for catalog, report in fetched.catalogs.items():
+            totals = summary['catalogs'].setdefault(catalog, {
+                'updated': 0, 'fetched': 0, 'not_found': 0, 'failed': 0,
+                'seconds': 0.0,
+            })
+            totals['updated'] += updated_by_catalog.get(catalog, 0)
+            totals['fetched'] += report.fetched
+            totals['not_found'] += report.not_found
+            totals['failed'] += len(report.failed)
+            totals['seconds'] += report.seconds
+
+    if summary['updated']:
+        store = settings.RDFLIB_STORE
+        touch_collections(store, [collection])
+        store.commit()
+    for totals in summary['catalogs'].values():
+        seconds = totals['seconds']
+        totals['seconds'] = round(seconds, 3)
+        totals['throughput'] = totals['fetched'] / seconds if seconds else None
+    return summary
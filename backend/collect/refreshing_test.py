@@ -0,0 +1,110 @@
+import pytest
+from edpop_explorer import Field
+from rdflib import URIRef, Graph, BNode, Literal
+
+from catalogs.conftest import LocalMockReader
+from catalogs.graphs import refresh_readers
+from catalogs.triplestore import save_records_to_triplestore, get_single_record, \
+    RECORDS_GRAPH_IDENTIFIER
+from collect.blank_record import BlankRecordReader, create_blank_record
+from collect.refreshing import refresh_collection, record_signature, \
+    stored_records_graph
+from triplestore.constants import EDPOPREC
+from triplestore.utils import replace_blank_nodes_in_triples
+
+
+class ChangingMockReader(LocalMockReader):
+    """Reader of which the records get a new title with every version."""
+    version = 1
+
+    @classmethod
+    def get_by_id(cls, identifier: str):
+        record = super().get_by_id(identifier)
+        record.title = Field(f'Title {identifier}, version {cls.version}')
+        return record
+
+
+@pytest.fixture
+def changing_reader_installed(settings):
+    readers = settings.CATALOG_READERS
+    settings.CATALOG_READERS = [ChangingMockReader, BlankRecordReader]
+    settings.RECORD_FRESHNESS = {
+        'default': {},
+        str(BlankRecordReader.CATALOG_URIREF): {
+            'soft_ttl': None, 'hard_ttl': None,
+        },
+    }
+    refresh_readers()
+    ChangingMockReader.version = 1
+    yield
+    settings.CATALOG_READERS = readers
+    refresh_readers()
+
+
+def title(record: URIRef) -> str:
+    graph = get_single_record(record)
+    field = graph.value(record, EDPOPREC.title)
+    return str(graph.value(field, EDPOPREC.originalText))
+
+
+def test_refresh_collection(changing_reader_installed, collection):
+    records = [ChangingMockReader.get_by_id(str(i)) for i in range(3)]
+    blank = create_blank_record()
+    save_records_to_triplestore(records + [blank])
+    iris = [URIRef(record.iri) for record in records + [blank]]
+    collection.save()
+    collection.add_records(iris)
+
+    result = refresh_collection(collection.uri, page_size=2)
+    assert (result['updated'], result['unchanged'], result['skipped']) == (0, 3, 1)
+
+    ChangingMockReader.version = 2
+    progress = []
+    result = refresh_collection(
+        collection.uri, page_size=2,
+        progress=lambda done, total: progress.append((done, total)),
+    )
+    assert (result['updated'], result['unchanged'], result['skipped']) == (3, 0, 1)
+    catalog = result['catalogs'][str(ChangingMockReader.CATALOG_URIREF)]
+    assert (catalog['updated'], catalog['fetched'], catalog['failed']) == (3, 3, 0)
+    assert progress[-1] == (4, 4)
+    assert title(iris[0]) == 'Title 0, version 2'
+
+
+def nested_record(record: URIRef, value: str) -> Graph:
+    """A record with a field that has a nested field node."""
+    graph = Graph()
+    field, place = BNode(), BNode()
+    graph.add((record, EDPOPREC.placeOfPublication, field))
+    graph.add((field, EDPOPREC.originalText, Literal('Amsterdam')))
+    graph.add((field, EDPOPREC.normalizedValue, place))
+    graph.add((place, EDPOPREC.originalText, Literal(value)))
+    return graph
+
+
+def stored_copy(graph: Graph) -> Graph:
+    stored = Graph()
+    for triple in replace_blank_nodes_in_triples(graph):
+        stored.add(triple)
+    return stored
+
+
+def test_record_signature_nested_fields():
+    record = URIRef('https://example.org/record')
+    graph = nested_record(record, 'Amsterdam, NL')
+    assert record_signature(graph, record) == \
+        record_signature(stored_copy(graph), record)
+    changed = nested_record(record, 'Amsterdam, Netherlands')
+    assert record_signature(changed, record) != \
+        record_signature(stored_copy(graph), record)
+
+
+def test_stored_records_graph_nested_fields(triplestore):
+    record = URIRef('https://example.org/record')
+    graph = nested_record(record, 'Amsterdam, NL')
+    records = Graph(store=triplestore, identifier=RECORDS_GRAPH_IDENTIFIER)
+    records += stored_copy(graph)
+    triplestore.commit()
+    stored = stored_records_graph([record])
+    assert len(stored) == 4
+    assert record_signature(stored, record) == record_signature(graph, record)
@@ -27,6 +27,14 @@ def check_user_project_authorization(user, project_uri):
         )
 
 
+def check_user_project_read_authorization(user, project_uri):
+    project_obj = Project.objects.get(uri=str(project_uri))
+    if not project_obj.permit_query_by(user):
+        raise serializers.ValidationError(
+            'No permission to read this project'
+        )
+
+
 def can_update_project(data):
     '''
     Validates that the specified project is one the user is allowed to write to.
@@ -6,5 +6,8 @@ urlpatterns = [
     path('collections/', api.CollectionsView.as_view()),
     re_path(r'^collections/(?P<collection>.+)/', api.CollectionEditView.as_view()),
     re_path(r'^collection-records/(?P<collection>.+)/', api.CollectionRecordsView.as_view()),
+    re_path(r'^collection-facets/(?P<collection>.+)/', api.CollectionFacetsView.as_view()),
+    re_path(r'^collection-export/(?P<collection>.+)/', api.CollectionExportView.as_view()),
+    path('collection-jobs/<str:job_id>/', api.CollectionJobView.as_view()),
     path('blank-record/', api.BlankRecordView.as_view()),
 ]
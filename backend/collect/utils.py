@@ -1,8 +1,68 @@
+from typing import Iterator, List, Optional
 from django.conf import settings
-from rdflib import RDF, URIRef, Graph
+from rdflib import RDF, RDFS, URIRef, Graph, Literal
+from rdf.utils import graph_from_triples
 import re
 
-from triplestore.constants import EDPOPCOL
+from triplestore.constants import EDPOPCOL, EDPOPREC, AS
+from triplestore.utils import sparql_multivalues
+from catalogs.projection import property_values
+from catalogs.triplestore import RECORDS_GRAPH_IDENTIFIER
+
+collection_page_query = '''
+select ?record
+where {{
+  graph {collection} {{
+    {collection} rdfs:member ?record .
+  }}
+  {filters}
+  {after_filter}
+}}
+order by str(?record)
+limit {limit}
+'''.format
+
+collection_page_after_filter = '''
+  filter ( str(?record) > {after} )
+'''.format
+
+collection_size_query = '''
+select (count(?record) as ?size)
+where {{
+  graph {collection} {{
+    {collection} rdfs:member ?record .
+  }}
+  {filters}
+}}
+'''.format
+
+project_records_query = '''
+select distinct ?record
+where {{
+  graph ?collection {{
+    ?collection as:context {project} ;
+                rdfs:member ?record .
+  }}
+}}
+'''.format
+
+# The objects of the records are their field nodes
+records_by_uri_query = '''
+construct {{
+  ?record ?p ?o .
+  ?o ?p2 ?o2 .
+}}
+where {{
+  values ?record {{ {records} }}
+  {properties}
+  graph {records_graph} {{
+    ?record ?p ?o.
+    optional {{
+      ?o ?p2 ?o2 .
+    }}
+  }}
+}}
+'''.format
 
 def _name_to_slug(name: str) -> str:
     lowered = name.lower()
@@ -26,3 +86,87 @@ def collection_exists(uri: URIRef):
 def collection_graph(uri: URIRef):
     store = settings.RDFLIB_STORE
     return Graph(store=store, identifier=uri)
+
+
+def collection_page(
+    collection: URIRef, limit: int, after: Optional[str] = None,
+    filters: str = '',
+) -> List[URIRef]:
+    '''
+    Select up to `limit` members of a collection, ordered by URI, that come
+    after the member with URI `after`. `filters` is a SPARQL pattern that
+    the selected members (`?record`) should match.
+    '''
+    store = settings.RDFLIB_STORE
+    after_filter = ''
+    if after:
+        after_filter = collection_page_after_filter(after=Literal(after).n3())
+    return [row.record for row in store.query(collection_page_query(
+        collection=collection.n3(),
+        filters=filters,
+        after_filter=after_filter,
+        limit=limit,
+    ), initNs={'rdfs': RDFS, 'edpoprec': EDPOPREC})]
+
+
+def collection_size(collection: URIRef, filters: str = '') -> int:
+    '''
+    Count the members of a collection that match `filters` (see
+    `collection_page`).
+    '''
+    store = settings.RDFLIB_STORE
+    result = store.query(
+        collection_size_query(collection=collection.n3(), filters=filters),
+        initNs={'rdfs': RDFS, 'edpoprec': EDPOPREC},
+    )
+    return int(next(iter(result)).size)
+
+
+def collection_pages(collection: URIRef, page_size: int) -> Iterator[List[URIRef]]:
+    '''
+    Iterate over all members of a collection, `page_size` at a time.
+    '''
+    after = None
+    while True:
+        page = collection_page(collection, page_size, after)
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        after = str(page[-1])
+
+
+def collection_records(collection: URIRef) -> List[URIRef]:
+    '''
+    List all members of a collection.
+    '''
+    return [record for page in collection_pages(collection, 10000) for record in page]
+
+
+def project_records(project: URIRef) -> List[URIRef]:
+    '''
+    List the records that are in any collection of a project.
+    '''
+    store = settings.RDFLIB_STORE
+    return [row.record for row in store.query(
+        project_records_query(project=project.n3()),
+        initNs={'rdfs': RDFS, 'as': AS},
+    )]
+
+
+def records_graph(
+    records: List[URIRef], properties: Optional[List[URIRef]] = None,
+) -> Graph:
+    '''
+    Get the stored records with the given URIs, including their fields. If
+    `properties` is given, only get these properties (see
+    `catalogs.projection`).
+    '''
+    if not records:
+        return Graph()
+    store = settings.RDFLIB_STORE
+    return graph_from_triples(store.query(records_by_uri_query(
+        records=sparql_multivalues(records),
+        properties=property_values('?p', properties),
+        records_graph=RECORDS_GRAPH_IDENTIFIER.n3(),
+    )))
@@ -11,13 +11,14 @@ https://docs.djangoproject.com/en/1.11/ref/settings/
 """
 
 from pathlib import Path
+import datetime as dt
 import os
 import socket
-from rdflib.plugins.stores.sparqlstore import SPARQLUpdateStore
 
 from edpop_explorer import readers
 
 from collect.blank_record import BlankRecordReader
+from triplestore.store import ThreadLocalSPARQLUpdateStore
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
@@ -217,7 +218,7 @@ RDF_NAMESPACE_ROOT = f'http://{RDF_NAMESPACE_HOST}:8000/rdf/'
 TRIPLESTORE_NAMESPACE = 'edpop'
 TRIPLESTORE_BASE_URL = os.getenv('EDPOP_TRIPLESTORE_BASE_URL', 'http://localhost:9999/blazegraph')
 TRIPLESTORE_SPARQL_ENDPOINT = f'{TRIPLESTORE_BASE_URL}/namespace/{TRIPLESTORE_NAMESPACE}/sparql'
-RDFLIB_STORE = SPARQLUpdateStore(
+RDFLIB_STORE = ThreadLocalSPARQLUpdateStore(
     query_endpoint=TRIPLESTORE_SPARQL_ENDPOINT,
     update_endpoint=TRIPLESTORE_SPARQL_ENDPOINT,
     autocommit=False,
@@ -232,6 +233,99 @@ CATALOG_READERS = [
     r for r in readers.ALL_READERS if r.__name__ not in OMITTED_READERS
 ] + [BlankRecordReader]
 
+# Maximum number of records that a single SPARQL update about many records
+# refers to. Larger operations are split into batches of this size.
+SPARQL_UPDATE_BATCH_SIZE = 500
+
+# RECORD_RETENTION: how long records that are not in any collection are kept
+# in the triplestore after they were last retrieved or opened, by catalog URI.
+# The 'default' entry applies to all catalogs. Records that were opened at
+# least `frequent_accesses` times are kept for `frequent_max_idle`.
+RECORD_RETENTION = {
+    'default': {
+        'max_idle': dt.timedelta(weeks=2),
+        'frequent_accesses': 5,
+        'frequent_max_idle': dt.timedelta(weeks=8),
+    },
+}
+
+# Record accesses are buffered and written to the triplestore in one update
+# when this many records were opened or after this many seconds.
+RECORD_ACCESS_FLUSH_SIZE = 100
+RECORD_ACCESS_FLUSH_INTERVAL = 60
+
+# RECORD_FRESHNESS: how long stored records are served as they are, by
+# catalog URI. Records older than `soft_ttl` are served and then refetched in
+# the background; records older than `hard_ttl` are refetched before they are
+# served. `None` means never. Blank records have no catalog to refetch from.
+RECORD_FRESHNESS = {
+    'default': {
+        'soft_ttl': dt.timedelta(weeks=1),
+        'hard_ttl': dt.timedelta(weeks=26),
+    },
+    'https://edpop.hum.uu.nl/readers/blank-records': {
+        'soft_ttl': None,
+        'hard_ttl': None,
+    },
+}
+
+# Number of threads that refetch stale records in the background.
+RECORD_REFRESH_WORKERS = 2
+
+# Failed record lookups are remembered for this many seconds, so that
+# repeated requests for the same record do not reach the catalog again.
+# Records that the catalog does not know are remembered longer than records
+# that could not be fetched because the catalog failed.
+RECORD_NOT_FOUND_CACHE_TIMEOUT = 60 * 60
+RECORD_ERROR_CACHE_TIMEOUT = 60
+
+# Maximum number of requests that are sent to catalogs at the same time when
+# many records are fetched at once, e.g. when importing them into a
+# collection.
+RECORD_FETCH_WORKERS = 8
+
+# CATALOG_RATE_LIMITS: limits on the requests that are sent to each catalog
+# when many records are fetched at once, by catalog URI. At most
+# `concurrency` requests are sent at the same time, started at least
+# `interval` seconds apart. The 'default' entry applies to all catalogs.
+CATALOG_RATE_LIMITS = {
+    'default': {
+        'concurrency': 2,
+        'interval': 0.2,
+    },
+}
+
+# PostgreSQL text search configuration of the local full-text index of
+# stored records and annotations. Records are in many languages, so words
+# are not stemmed.
+SEARCH_INDEX_CONFIG = 'simple'
+
+# Largest number of records to which a search of the local index is limited
+# in the database query. Searches in larger collections or projects filter
+# the ranked matches instead.
+SEARCH_SCOPE_MAX_RECORDS = 1000
+
+# COLLECTION_FACETS: the edpoprec properties by which the records in a
+# collection can be counted and filtered. Facets are cached per change to
+# the members of the collection, and for at most
+# COLLECTION_FACETS_CACHE_TIMEOUT seconds.
+COLLECTION_FACETS = [
+    'placeOfPublication',
+    'dating',
+    'publisherOrPrinter',
+    'language',
+]
+COLLECTION_FACETS_CACHE_TIMEOUT = 60 * 60
+
+# Statistics of the annotations in a project are cached per change to its
+# annotations or to the members of its collections, and for at most
+# ANNOTATION_STATS_CACHE_TIMEOUT seconds.
+ANNOTATION_STATS_CACHE_TIMEOUT = 60 * 60
+
+# Number of threads that run long operations on collections, such as
+# imports, in the background.
+COLLECTION_JOB_WORKERS = 2
+
 # Settings required to enable Django Debug Toolbar
 local_ip = socket.gethostbyname(socket.gethostname())
 docker_remote_ip = '.'.join(local_ip.split('.')[:-1]) + '.1'
@@ -20,7 +20,9 @@ from rest_framework import routers
 from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 
 from vre.api import RecordViewSet, AnnotationViewSet, SearchViewSet
-from collect.api import AddRecordsViewSet, RemoveRecordsViewSet
+from collect.api import AddRecordsViewSet, RemoveRecordsViewSet, \
+    RecordCollectionsViewSet, CopyCollectionViewSet, MergeCollectionsViewSet, \
+    IntersectCollectionsViewSet, ImportRecordsViewSet, RefreshCollectionViewSet
 
 api_router = routers.DefaultRouter()
 api_router.register(r'records', RecordViewSet)
@@ -32,6 +34,24 @@ api_router.register(r'add-selection',
 api_router.register(r'remove-selection',
                     RemoveRecordsViewSet,
                     basename='remove-selection')
+api_router.register(r'record-collections',
+                    RecordCollectionsViewSet,
+                    basename='record-collections')
+api_router.register(r'copy-collection',
+                    CopyCollectionViewSet,
+                    basename='copy-collection')
+api_router.register(r'merge-collections',
+                    MergeCollectionsViewSet,
+                    basename='merge-collections')
+api_router.register(r'intersect-collections',
+                    IntersectCollectionsViewSet,
+                    basename='intersect-collections')
+api_router.register(r'import-records',
+                    ImportRecordsViewSet,
+                    basename='import-records')
+api_router.register(r'refresh-collection',
+                    RefreshCollectionViewSet,
+                    basename='refresh-collection')
 
 urlpatterns = [
     path('', include('annotations.urls')),
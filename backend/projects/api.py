@@ -1,5 +1,6 @@
 from rest_framework import viewsets
 from django.contrib.auth.models import User, AnonymousUser
+from django.db.models import Q
 
 from projects.models import Project
 from projects.serializers import ProjectSerializer
@@ -15,6 +16,18 @@ def user_projects(user: User):
     access_through_group = Project.objects.filter(groups__user=user)
     return direct_access.union(access_through_group)
 
+def readable_projects(user: User):
+    '''
+    Projects of which the user may query the RDF data; see `Project.permit_query_by`.
+    '''
+    if user.is_superuser:
+        return Project.objects.all()
+    if isinstance(user, AnonymousUser):
+        return Project.objects.filter(public=True)
+    return Project.objects.filter(
+        Q(public=True) | Q(users=user) | Q(groups__user=user)
+    ).distinct()
+
 class ProjectView(viewsets.ReadOnlyModelViewSet):
     '''
     List all projects
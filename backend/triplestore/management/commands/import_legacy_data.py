@@ -4,20 +4,22 @@ import time
 
 from django.conf import settings
 from django.core.management import BaseCommand
-from rdflib import Graph, URIRef, Literal, RDF, DCTERMS, BNode
+from rdflib import URIRef, Literal, RDF, DCTERMS, BNode
 
 from edpop_explorer.readers import HPBReader
 from edpop_explorer import NotFoundError
 
 from accounts.utils import IMPORT_USER_URIREF
-from annotations.api import create_annotation_subject_node, ANNOTATION_GRAPH_IDENTIFIER
+from annotations.api import create_annotation_subject_node, touch_annotations
+from annotations.utils import annotation_graph_identifier
 from catalogs.triplestore import save_to_triplestore
 from catalogs.utils import record_exists
 from collect.blank_record import create_blank_record
 from collect.rdf_models import EDPOPCollection
 from collect.utils import collection_uri, collection_graph, collection_exists
 from triplestore.constants import AS, EDPOPCOL, OA
-from triplestore.utils import triples_to_quads, replace_blank_node
+from triplestore.utils import Triple, replace_blank_node, insert_data, \
+    update_in_batches
 
 RecordMapping = dict[str, str]
 
@@ -104,6 +106,7 @@ def add_collections(collections: dict, project_uri: str, record_mapping: RecordM
 
 
 def add_annotations(annotations: dict, project_uri: str, record_mapping: dict):
+    new_annotations = []
     for record_uri in annotations:
         try:
             record_iri = record_mapping[record_uri]
@@ -114,18 +117,37 @@ def add_annotations(annotations: dict, project_uri: str, record_mapping: dict):
             # We expect a dict with annotation keys as keys and annotation values as values
             assert isinstance(annotation, dict)
             for key in annotation:
-                add_annotation(record_iri, key, annotation[key], project_uri)
+                triples = annotation_triples(record_iri, key, annotation[key], project_uri)
+                if triples:
+                    new_annotations.append(triples)
 
+    store = settings.RDFLIB_STORE
+    graph = annotation_graph_identifier(URIRef(project_uri))
+
+    def insert(batch: list[list[Triple]]) -> None:
+        store.update(insert_data({graph: [t for triples in batch for t in triples]}))
+        touch_annotations(store, [graph])
+
+    def report(done: int, total: int) -> None:
+        print(f"Added {done} of {total} annotations")
 
-def add_annotation(
+    # Store the annotations in batches, so that no update grows too large
+    update_in_batches(
+        store, new_annotations, insert, settings.SPARQL_UPDATE_BATCH_SIZE,
+        progress=report,
+    )
+    print(f"Added annotations to {len(annotations)} records")
+
+
+def annotation_triples(
         record_iri: str, annotation_key: str, annotation_value: str, project: str
-):
+) -> list[Triple]:
     if annotation_key == "EDPOP Glossary":
         try:
             body = URIRef(glossary_mapping[annotation_value.strip()])
         except KeyError:
             print(f"Glossary value {annotation_value} not found in mapping; skipping.")
-            return
+            return []
         motivation = OA.tagging
     else:
         # Add as record comment - may be changed to field comment manually
@@ -135,8 +157,7 @@ def add_annotation(
     target_node = replace_blank_node(BNode())
     as_published = Literal(datetime.datetime.now())
     dcterms_creator = IMPORT_USER_URIREF
-    graph = Graph(identifier=ANNOTATION_GRAPH_IDENTIFIER)
-    triples = [
+    return [
         (subject_node, RDF.type, EDPOPCOL.Annotation),
         (subject_node, AS.context, URIRef(project)),
         (subject_node, OA.hasTarget, target_node),
@@ -146,11 +167,6 @@ def add_annotation(
         (subject_node, AS.published, as_published),
         (subject_node, DCTERMS.creator, dcterms_creator),
     ]
-    quads = list(triples_to_quads(triples, graph))
-    store = settings.RDFLIB_STORE
-    store.addN(quads)
-    store.commit()
-    print(f"Added annotation {annotation_key}={annotation_value} to record {record_iri}")
 
 
 class Command(BaseCommand):
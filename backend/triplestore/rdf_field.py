@@ -30,6 +30,11 @@ class RDFField(ABC):
     Alternatively, you could implement `set` and `clear` directly; in that case, it's not
     necessary to implement `_stored_triples` and `_triples_to_store`.
 
+    Fields are descriptors: on a model instance, the value of a field is read from the
+    graph (using `get`) when it is first accessed. Assigning a value marks the field as
+    changed, so that `RDFModel.save` only writes the fields that were changed. On the
+    model class, the attribute gives access to the field itself.
+
     The implementations of the methods listed above should use `self.get_graph()` to
     fetch the correct graph for reading and writing triples. By default, this will be the
     graph of the model instance. To use a constant graph, you can pass a `graph` in the
@@ -40,6 +45,20 @@ class RDFField(ABC):
     def __init__(self, graph: Optional[Graph] = None, **kwargs):
         self.graph = graph
 
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        if self.name not in instance._values:
+            instance._values[self.name] = self.get(instance)
+        return instance._values[self.name]
+
+    def __set__(self, instance, value) -> None:
+        instance._values[self.name] = value
+        instance._changed.add(self.name)
+
     def get_graph(self, instance):
         '''
         Return the graph in which to save data.
@@ -3,7 +3,7 @@ Base class for Django-esque management of RDF data.
 '''
 
 from rdflib import URIRef, Graph, RDF
-from typing import Dict, Optional
+from typing import Any, Dict, Optional, Set
 from django.conf import settings
 from abc import ABC
 
@@ -33,18 +33,26 @@ class RDFModel(ABC):
         self.graph = graph
         self.uri = uri
 
-        self.refresh_from_store()
+        self._values: Dict[str, Any] = {}
+        '''Field values that were read from the graph or assigned'''
+        self._changed: Set[str] = set()
+        '''Names of fields that were assigned since the last save'''
 
 
     def save(self) -> None:
         '''
         Store the data of this instance in the graph
+
+        Only the fields that were assigned since the instance was created, refreshed or
+        last saved are written.
         '''
 
         self.graph.addN(triples_to_quads(self._class_triples(), self.graph))
 
         for name, field in self._fields().items():
-            field.set(self, getattr(self, name))
+            if name in self._changed:
+                field.set(self, self._values[name])
+        self._changed.clear()
 
         self.store.commit()
 
@@ -66,13 +74,12 @@ class RDFModel(ABC):
         '''
         Refresh the model state based on the graph.
 
-        Updates field values by reading them from the graph. This method is called when
-        the model is first initialised; you can call it manually if the graph was
-        updated since then.
+        Discards the field values that were read or assigned so far; each field is read
+        from the graph again when it is next accessed. Call this method if the graph was
+        updated since the values were read.
         '''
-        for name, field in self._fields().items():
-            value = field.get(self)
-            self.__setattr__(name, value)
+        self._values.clear()
+        self._changed.clear()
 
 
     def _class_triples(self) -> Triples:
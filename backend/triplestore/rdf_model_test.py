@@ -27,3 +27,32 @@ def test_rdf_model(empty_graph):
 
     assert not triple_exists(g, (uri, RDF.type, Test.Example))
     assert not triple_exists(g, (uri, Test.name, Literal('Test')))
+
+def test_rdf_model_lazy(empty_graph):
+    g = empty_graph
+    uri = URIRef('example', 'https://example.org/')
+    g.add((uri, Test.name, Literal('Test')))
+    example = Example(g, uri)
+    assert example._values == {}
+
+    g.set((uri, Test.name, Literal('Changed')))
+    assert example.name == 'Changed' # read on first access
+
+    g.set((uri, Test.name, Literal('Changed again')))
+    assert example.name == 'Changed'
+    example.refresh_from_store()
+    assert example.name == 'Changed again'
+
+def test_rdf_model_save_changed_fields(empty_graph):
+    g = empty_graph
+    uri = URIRef('example', 'https://example.org/')
+    g.add((uri, Test.name, Literal('Test')))
+    example = Example(g, uri)
+    example.save() # name was not assigned, so it is not written
+    assert triple_exists(g, (uri, Test.name, Literal('Test')))
+
+    g.set((uri, Test.name, Literal('Changed')))
+    example.name = Literal('Assigned')
+    example.save()
+    assert triple_exists(g, (uri, Test.name, Literal('Assigned')))
+    assert not triple_exists(g, (uri, Test.name, Literal('Changed')))
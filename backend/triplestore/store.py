@@ -0,0 +1,29 @@
+"""The store through which the application accesses the triplestore."""
+import threading
+from typing import Optional
+
+from rdflib.plugins.stores.sparqlstore import SPARQLUpdateStore
+
+
+class ThreadLocalSPARQLUpdateStore(SPARQLUpdateStore):
+    """SPARQLUpdateStore that keeps the pending edits of every thread apart.
+
+    Without `autocommit`, SPARQLUpdateStore collects updates in a single list
+    until they are committed. A store that is shared by request threads and
+    background threads (e.g. record refreshes and collection jobs) would
+    then mix their edits: one thread would commit the edits of another, or
+    half of them. Here, every thread has its own pending edits, which only
+    that thread commits or rolls back, so that the edits of one thread are
+    always sent together in one request."""
+
+    def __init__(self, *args, **kwargs):
+        self._local = threading.local()
+        super().__init__(*args, **kwargs)
+
+    @property
+    def _edits(self) -> Optional[list[str]]:
+        return getattr(self._local, 'edits', None)
+
+    @_edits.setter
+    def _edits(self, edits: Optional[list[str]]) -> None:
+        self._local.edits = edits
@@ -0,0 +1,66 @@
+import threading
+
+from .store import ThreadLocalSPARQLUpdateStore
+
+ENDPOINT = 'http://localhost:9999/blazegraph/namespace/test/sparql'
+
+
+def recording_store(monkeypatch) -> tuple[ThreadLocalSPARQLUpdateStore, list]:
+    """A store that records the requests it would send."""
+    store = ThreadLocalSPARQLUpdateStore(
+        query_endpoint=ENDPOINT, update_endpoint=ENDPOINT, autocommit=False,
+    )
+    requests = []
+    lock = threading.Lock()
+
+    def send(update):
+        with lock:
+            requests.append(update)
+
+    monkeypatch.setattr(store, '_update', send)
+    return store, requests
+
+
+def insert(name: str) -> str:
+    return f'insert data {{ <urn:{name}> <urn:p> <urn:o> }}'
+
+
+def test_concurrent_writers(monkeypatch):
+    store, requests = recording_store(monkeypatch)
+    queued = threading.Barrier(2)
+    first_committed = threading.Event()
+
+    def purge_and_save():
+        store.update(insert('purge'))
+        queued.wait()
+        # The other thread commits while this one still has pending edits
+        first_committed.wait()
+        store.update(insert('save'))
+        store.commit()
+
+    def other_write():
+        store.update(insert('other'))
+        queued.wait()
+        store.commit()
+        first_committed.set()
+
+    threads = [threading.Thread(target=purge_and_save),
+               threading.Thread(target=other_write)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert requests == [
+        insert('other'),
+        insert('purge') + '\n;\n' + insert('save'),
+    ]
+
+
+def test_rollback_is_per_thread(monkeypatch):
+    store, requests = recording_store(monkeypatch)
+    store.update(insert('kept'))
+    thread = threading.Thread(target=store.rollback)
+    thread.start()
+    thread.join()
+    store.commit()
+    assert requests == [insert('kept')]
@@ -1,6 +1,8 @@
-from typing import Iterator, Tuple, Callable, Dict, Any, Iterable
+from typing import Iterator, Tuple, Callable, Dict, Any, Iterable, Optional, TypeVar
 from rdflib import Graph, URIRef, RDF
+from rdflib.store import Store
 from functools import reduce
+from itertools import islice
 from operator import methodcaller
 
 from rdflib.term import Node, BNode
@@ -9,6 +11,9 @@ Triple = tuple[Node, Node, Node]
 Triples = Iterable[Triple]
 Quad = tuple[Node, Node, Node, Graph]
 Quads = Iterable[Quad]
+T = TypeVar('T')
+Progress = Callable[[int, int], None]
+'''Callback that receives the number of values handled so far and the total.'''
 
 def triple_exists(graph: Graph, triple: Tuple[URIRef]) -> bool:
     '''
@@ -91,3 +96,55 @@ n3 = methodcaller('n3')
 def sparql_multivalues(values: Iterable[Node]) -> str:
     """Format a bunch of values for insertion as x in VALUES ?v { x }."""
     return ' '.join(map(n3, values))
+
+
+def insert_data(graphs: Dict[URIRef, Triples]) -> str:
+    """Format a single INSERT DATA update that adds triples to named graphs.
+    The triples should not contain blank nodes."""
+    blocks = (
+        f'graph {identifier.n3()} {{\n' +
+        ''.join(f'{s.n3()} {p.n3()} {o.n3()} .\n' for s, p, o in triples) +
+        '}\n'
+        for identifier, triples in graphs.items()
+    )
+    return 'insert data {\n' + ''.join(blocks) + '}'
+
+
+def batched(values: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Split values into consecutive lists of at most `size` values."""
+    iterator = iter(values)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def update_in_batches(
+        store: Store,
+        values: Iterable[T],
+        update: Callable[[list[T]], None],
+        batch_size: int,
+        atomic: bool = False,
+        progress: Optional[Progress] = None,
+) -> None:
+    """Apply an update to many values in batches, so that no single SPARQL
+    update grows too large for the triplestore.
+
+    `update` is called with each batch and should add its changes to `store`
+    without committing. Unless `atomic` is set, every batch is committed on
+    its own, so that the batches that were committed stay applied if a later
+    one fails. If `atomic` is set, all batches are committed together; the
+    store sends them in one request, which the triplestore applies either
+    completely or not at all. `update` should not query the store, because
+    reading from the store sends the pending updates.
+
+    If given, `progress` is called after every batch."""
+    values = list(values)
+    done = 0
+    for batch in batched(values, batch_size):
+        update(batch)
+        if not atomic:
+            store.commit()
+        done += len(batch)
+        if progress:
+            progress(done, len(values))
+    if atomic:
+        store.commit()
@@ -1,12 +1,16 @@
-from rdflib import BNode, Graph, URIRef, Literal
+from rdflib import BNode, Dataset, Graph, URIRef, Literal
 from rdflib.namespace import RDF
 
+from .store_test import recording_store
 from .utils import (
     replace_blank_node,
     replace_blank_nodes_in_triples,
     replace_node,
     sparql_multivalues,
+    insert_data,
     triples_to_quads,
+    batched,
+    update_in_batches,
 )
 
 
@@ -95,3 +99,58 @@ def test_sparql_multivalues():
     formatted = sparql_multivalues(values)
     expected = '<http://example.com/uri> <https://example.com/name> "banana"'
     assert formatted == expected
+
+
+def test_insert_data():
+    graph = URIRef('http://example.com/graph')
+    triples = [
+        (URIRef('http://example.com/s'), RDF.type, URIRef('http://example.com/T')),
+        (URIRef('http://example.com/s'), URIRef('http://example.com/p'), Literal('banana')),
+    ]
+    update = insert_data({graph: triples})
+    assert update == (
+        'insert data {\n'
+        'graph <http://example.com/graph> {\n'
+        '<http://example.com/s> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <http://example.com/T> .\n'
+        '<http://example.com/s> <http://example.com/p> "banana" .\n'
+        '}\n'
+        '}'
+    )
+    dataset = Dataset()
+    dataset.update(update)
+    assert set(dataset.graph(graph)) == set(triples)
+
+
+def test_batched():
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batched([], 2)) == []
+
+
+class CommitCounter:
+    def __init__(self):
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_update_in_batches():
+    store = CommitCounter()
+    batches = []
+    progress = []
+    update_in_batches(store, range(5), batches.append, 2,
+                      progress=lambda done, total: progress.append((done, total)))
+    assert batches == [[0, 1], [2, 3], [4]]
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+    assert store.commits == 3
+
+
+def test_update_in_batches_atomic(monkeypatch):
+    store, requests = recording_store(monkeypatch)
+    update_in_batches(
+        store, range(5),
+        lambda batch: store.update(f'insert data {{ <urn:s> <urn:p> {len(batch)} }}'),
+        2, atomic=True,
+    )
+    assert len(requests) == 1
+    assert requests[0].count('insert data') == 3